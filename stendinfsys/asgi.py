@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stendinfsys.settings')
 
 application = get_asgi_application()
+
+# Load influxdb_client/numpy and the metadata registry before the first request
+# (TELEMETRY_WARMUP, on by default; see telemetry/warmup.py).
+from telemetry.warmup import warmup_if_enabled  # noqa: E402
+
+warmup_if_enabled()
@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -34,12 +35,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'telemetry.middleware.CompressionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'telemetry.middleware.SlowQueryViewMiddleware',
 ]
 
 ROOT_URLCONF = 'stendinfsys.urls'
@@ -76,6 +80,62 @@ DATABASES = {
     }
 }
 
+# Cache
+# Shared between workers when REDIS_URL is set (metadata registry versions etc.);
+# the local-memory fallback is only consistent within a single process.
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# API responses (JSON/CSV) at least this large are gzip/brotli-compressed.
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+# Preload heavy dependencies in WSGI/ASGI workers (telemetry/warmup.py).
+TELEMETRY_WARMUP = os.getenv("TELEMETRY_WARMUP", "1").lower() in ("1", "true", "yes")
+# CSV import: rows buffered to restore time order, and how equal timestamps are merged
+# (first/last/average); an ImportProfile may override both.
+CSV_REORDER_WINDOW = int(os.getenv("CSV_REORDER_WINDOW", "1000"))
+CSV_DUPLICATE_POLICY = os.getenv("CSV_DUPLICATE_POLICY", "last")
+# Writer threads per CSV import and how many point batches may wait for them (0 writers = write inline).
+CSV_IMPORT_WRITERS = int(os.getenv("CSV_IMPORT_WRITERS", "2"))
+CSV_IMPORT_WRITE_QUEUE = int(os.getenv("CSV_IMPORT_WRITE_QUEUE", "8"))
+
+# Concurrent imports / Flux queries per scope; over the limit a request waits
+# up to "wait" seconds, then gets 429 with Retry-After. 0 means unlimited.
+ADMISSION_LIMITS = {
+    "import": {
+        "global": int(os.getenv("ADMISSION_IMPORT_GLOBAL", "4")),
+        "user": int(os.getenv("ADMISSION_IMPORT_PER_USER", "2")),
+        "session": int(os.getenv("ADMISSION_IMPORT_PER_SESSION", "1")),
+        "wait": float(os.getenv("ADMISSION_IMPORT_WAIT", "5")),
+        "lease": 3600,
+        "retry_after": 10,
+    },
+    "query": {
+        "global": int(os.getenv("ADMISSION_QUERY_GLOBAL", "32")),
+        "user": int(os.getenv("ADMISSION_QUERY_PER_USER", "8")),
+        "session": int(os.getenv("ADMISSION_QUERY_PER_SESSION", "16")),
+        "wait": float(os.getenv("ADMISSION_QUERY_WAIT", "2")),
+        "lease": 120,
+        "retry_after": 2,
+    },
+}
+# Memory-mapped raw series of closed sessions (telemetry/series_cache.py); 0 disables it.
+SERIES_CACHE_DIR = Path(os.getenv("SERIES_CACHE_DIR", BASE_DIR / "var" / "series_cache"))
+SERIES_CACHE_MAX_BYTES = int(os.getenv("SERIES_CACHE_MAX_BYTES", str(2 * 1024**3)))
+# Largest decompressed body accepted by one PUT of a resumable CSV upload.
+CSV_UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("CSV_UPLOAD_CHUNK_MAX_BYTES", str(16 * 1024 * 1024)))
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -115,6 +175,8 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PAGINATION_CLASS": "telemetry.pagination.TelemetryCursorPagination",
+    "PAGE_SIZE": 50,
 }
 
 INFLUX_SETTINGS = {
@@ -122,7 +184,34 @@ INFLUX_SETTINGS = {
     "org": os.getenv("INFLUXDB_ORG", "telemetry-org"),
     "bucket": os.getenv("INFLUXDB_BUCKET", "telemetry-bucket"),
     "token": os.getenv("INFLUXDB_TOKEN", "telemetry-token"),
+    # Downsampled min/max/mean copies written by `manage.py rollup_sessions`.
+    "rollup_buckets": {
+        "1s": os.getenv("INFLUXDB_BUCKET_1S", "telemetry-bucket-1s"),
+        "1m": os.getenv("INFLUXDB_BUCKET_1M", "telemetry-bucket-1m"),
+    },
+    # Raw points of rolled-up sessions older than this are deleted (0 keeps them forever).
+    "raw_retention_days": int(os.getenv("INFLUXDB_RAW_RETENTION_DAYS", "90")),
+    # Connections kept by the per-event-loop async client (ASGI series endpoints).
+    "async_pool_size": int(os.getenv("INFLUXDB_ASYNC_POOL_SIZE", "200")),
+    # In-memory stand-in instead of a server (telemetry/standin.py), for load tests.
+    "standin": os.getenv("INFLUXDB_STANDIN", "").lower() in ("1", "true", "yes"),
+    # Send tag values and time bounds as Flux query parameters (InfluxDB Cloud only, OSS rejects them).
+    "query_params": os.getenv("INFLUXDB_QUERY_PARAMS", "").lower() in ("1", "true", "yes"),
+    # Connections kept by each shard's pooled sync client.
+    "pool_size": int(os.getenv("INFLUXDB_POOL_SIZE", "20")),
+}
+# Extra InfluxDB shards (telemetry/shards.py): name -> INFLUX_SETTINGS keys to override, e.g.
+# {"stand2": {"url": "http://influx2:8086", "token": "...", "bucket": "telemetry"}}.
+INFLUX_SHARDS = json.loads(os.getenv("INFLUXDB_SHARDS", "{}"))
+# Shard a session's first import writes to: by the import profile's stand name, then by motor group name.
+INFLUX_SHARD_MAP = {
+    "stands": json.loads(os.getenv("INFLUXDB_SHARD_BY_STAND", "{}")),
+    "motor_groups": json.loads(os.getenv("INFLUXDB_SHARD_BY_MOTOR_GROUP", "{}")),
 }
+# Flux queries at least this slow (ms) are logged to the SlowQuery table (0 disables);
+# only the newest INFLUX_SLOW_QUERY_LOG_SIZE rows are kept.
+INFLUX_SLOW_QUERY_MS = float(os.getenv("INFLUX_SLOW_QUERY_MS", "500"))
+INFLUX_SLOW_QUERY_LOG_SIZE = int(os.getenv("INFLUX_SLOW_QUERY_LOG_SIZE", "1000"))
 
 LOGIN_REDIRECT_URL = "/sessions/"
 LOGOUT_REDIRECT_URL = "/accounts/login/"
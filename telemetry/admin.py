@@ -1,6 +1,26 @@
 from django.contrib import admin
+from django.db.models import Avg, Count, Max, Sum
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from .models import CsvImport, MeasuredQuantity, MotorGroup, Sensor, SensorChannel, Session, Stand
+from .models import (
+    AnomalyEvent,
+    CsvImport,
+    DetectorRule,
+    ImportProfile,
+    ImportProfileColumn,
+    InfluxDeletionJob,
+    MeasuredQuantity,
+    MotorGroup,
+    Sensor,
+    SensorChannel,
+    Session,
+    SessionRollup,
+    SlowQuery,
+    Stand,
+    StepMetric,
+    ThrottleStep,
+)
 
 
 @admin.register(Stand)
@@ -22,6 +42,12 @@ class SessionAdmin(admin.ModelAdmin):
     search_fields = ("name", "notes")
 
 
+@admin.register(SessionRollup)
+class SessionRollupAdmin(admin.ModelAdmin):
+    list_display = ("session", "tier", "is_stale", "created_at")
+    list_filter = ("tier", "is_stale")
+
+
 @admin.register(MeasuredQuantity)
 class MeasuredQuantityAdmin(admin.ModelAdmin):
     list_display = ("key", "name", "unit")
@@ -41,8 +67,109 @@ class SensorAdmin(admin.ModelAdmin):
     inlines = [SensorChannelInline]
 
 
+class ImportProfileColumnInline(admin.TabularInline):
+    model = ImportProfileColumn
+    extra = 0
+
+
+@admin.register(ImportProfile)
+class ImportProfileAdmin(admin.ModelAdmin):
+    list_display = ("name", "timestamp_column", "created_at")
+    search_fields = ("name", "description")
+    inlines = [ImportProfileColumnInline]
+
+
 @admin.register(CsvImport)
 class CsvImportAdmin(admin.ModelAdmin):
-    list_display = ("id", "session", "status", "rows_processed", "rows_failed", "created_at", "finished_at")
+    list_display = (
+        "id",
+        "session",
+        "status",
+        "profile",
+        "rows_processed",
+        "rows_failed",
+        "rows_duplicate",
+        "rows_reordered",
+        "created_at",
+        "finished_at",
+    )
     list_filter = ("status", "created_at")
     search_fields = ("session__name",)
+
+
+@admin.register(InfluxDeletionJob)
+class InfluxDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "label", "reason", "status", "batches_done", "batches_total", "created_at", "finished_at")
+    list_filter = ("status", "reason")
+    search_fields = ("label",)
+
+
+@admin.register(DetectorRule)
+class DetectorRuleAdmin(admin.ModelAdmin):
+    list_display = ("name", "quantity", "kind", "min_value", "max_value", "max_rate", "window", "threshold", "is_active")
+    list_filter = ("kind", "is_active", "quantity")
+    search_fields = ("name",)
+
+
+@admin.register(AnomalyEvent)
+class AnomalyEventAdmin(admin.ModelAdmin):
+    list_display = ("session", "kind", "quantity", "sensor", "started_at", "ended_at", "point_count", "peak_value")
+    list_filter = ("kind", "quantity", "motor_group")
+    list_select_related = ("session", "quantity", "sensor")
+    raw_id_fields = ("session", "motor_group", "csv_import", "rule", "sensor")
+
+
+class StepMetricInline(admin.TabularInline):
+    model = StepMetric
+    extra = 0
+
+
+@admin.register(ThrottleStep)
+class ThrottleStepAdmin(admin.ModelAdmin):
+    list_display = ("session", "index", "throttle", "started_at", "ended_at", "point_count")
+    list_select_related = ("session",)
+    inlines = [StepMetricInline]
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "duration_ms", "rows", "bytes", "method", "view", "shape", "error")
+    list_filter = ("method", "view")
+    search_fields = ("flux", "view", "shape")
+    readonly_fields = [field.name for field in SlowQuery._meta.fields]
+    change_list_template = "admin/telemetry/slowquery/change_list.html"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        shapes = path("shapes/", self.admin_site.admin_view(self.shapes_view), name="telemetry_slowquery_shapes")
+        return [shapes, *super().get_urls()]
+
+    def shapes_view(self, request):
+        """Logged queries grouped by shape, the most total time first."""
+        groups = (
+            SlowQuery.objects.values("shape")
+            .annotate(
+                count=Count("id"),
+                total_ms=Sum("duration_ms"),
+                avg_ms=Avg("duration_ms"),
+                max_ms=Max("duration_ms"),
+                avg_rows=Avg("rows"),
+                avg_bytes=Avg("bytes"),
+                last_at=Max("created_at"),
+                method=Max("method"),
+                shape_text=Max("shape_text"),
+            )
+            .order_by("-total_ms")
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Медленные запросы Flux по форме",
+            "groups": groups,
+        }
+        return TemplateResponse(request, "admin/telemetry/slowquery/shapes.html", context)
@@ -0,0 +1,162 @@
+"""Admission control for CSV imports and Flux queries.
+
+Each request that is about to hit InfluxDB takes a slot in three scopes —
+global, per user and per session — with limits from ``ADMISSION_LIMITS``.
+A slot is a cache key added with ``cache.add`` (atomic in Redis and
+locmem) and a lease timeout, so the limits hold across all workers sharing
+``REDIS_URL`` and a crashed worker's slots free themselves once the lease
+runs out. A request that finds a scope full waits up to ``wait`` seconds
+for a slot and is then rejected with 429 and ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+
+IMPORT = "import"
+QUERY = "query"
+KINDS = (IMPORT, QUERY)
+SCOPES = ("global", "user", "session")
+POLL_SECONDS = 0.05
+
+
+class AdmissionRejected(Throttled):
+    """Raised when no slot frees up in time; DRF turns it into 429 with ``Retry-After``."""
+
+    default_detail = "Сервер перегружен."
+    extra_detail_singular = extra_detail_plural = "Повторите запрос через {wait} с."
+
+
+def _limits(kind: str) -> dict:
+    return settings.ADMISSION_LIMITS[kind]
+
+
+def _key(kind: str, *parts) -> str:
+    return ":".join(("telemetry:admission", kind, *map(str, parts)))
+
+
+def _bump(key: str, delta: int = 1) -> None:
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, max(delta, 0), timeout=None)
+
+
+class Lease:
+    def __init__(self, kind: str, keys: List[str], token: str) -> None:
+        self.kind = kind
+        self.keys = keys
+        self.token = token
+
+    def release(self) -> None:
+        # A slot whose lease already expired may belong to someone else by now.
+        owned = [key for key, value in cache.get_many(self.keys).items() if value == self.token]
+        cache.delete_many(owned)
+
+
+def _try_acquire(kind: str, user_id, session_id) -> Optional[Lease]:
+    limits = _limits(kind)
+    token = uuid.uuid4().hex
+    owners = {"global": "all", "user": user_id, "session": session_id}
+    taken: List[str] = []
+    for scope in SCOPES:
+        limit = limits.get(scope) or 0
+        if limit <= 0 or owners[scope] is None:
+            continue  # unlimited, or the request has no such owner
+        keys = [_key(kind, scope, owners[scope], slot) for slot in range(limit)]
+        occupied = cache.get_many(keys)
+        for key in keys:
+            if key not in occupied and cache.add(key, token, timeout=limits["lease"]):
+                taken.append(key)
+                break
+        else:
+            cache.delete_many(taken)
+            return None
+    return Lease(kind, taken, token)
+
+
+def _rejected(kind: str) -> AdmissionRejected:
+    _bump(_key(kind, "rejected"))
+    return AdmissionRejected(wait=_limits(kind)["retry_after"])
+
+
+def acquire(kind: str, user_id=None, session_id=None) -> Lease:
+    """Take a slot in every scope, waiting up to the configured time; raises :class:`AdmissionRejected`."""
+    lease = _try_acquire(kind, user_id, session_id)
+    if lease is None:
+        deadline = time.monotonic() + _limits(kind)["wait"]
+        _bump(_key(kind, "waiting"))
+        try:
+            while lease is None and time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+                lease = _try_acquire(kind, user_id, session_id)
+        finally:
+            _bump(_key(kind, "waiting"), -1)
+        if lease is None:
+            raise _rejected(kind)
+    _bump(_key(kind, "admitted"))
+    return lease
+
+
+async def aacquire(kind: str, user_id=None, session_id=None) -> Lease:
+    """Async :func:`acquire`: waits on the event loop instead of sleeping in a thread."""
+    try_acquire = sync_to_async(_try_acquire)
+    bump = sync_to_async(_bump)
+    lease = await try_acquire(kind, user_id, session_id)
+    if lease is None:
+        deadline = time.monotonic() + _limits(kind)["wait"]
+        await bump(_key(kind, "waiting"))
+        try:
+            while lease is None and time.monotonic() < deadline:
+                await asyncio.sleep(POLL_SECONDS)
+                lease = await try_acquire(kind, user_id, session_id)
+        finally:
+            await bump(_key(kind, "waiting"), -1)
+        if lease is None:
+            raise await sync_to_async(_rejected)(kind)
+    await bump(_key(kind, "admitted"))
+    return lease
+
+
+@contextmanager
+def admit(kind: str, user_id=None, session_id=None):
+    lease = acquire(kind, user_id, session_id)
+    try:
+        yield lease
+    finally:
+        lease.release()
+
+
+@asynccontextmanager
+async def aadmit(kind: str, user_id=None, session_id=None):
+    lease = await aacquire(kind, user_id, session_id)
+    try:
+        yield lease
+    finally:
+        await sync_to_async(lease.release)()
+
+
+def stats() -> dict:
+    """Limits, global slots in use, requests waiting now, and admitted/rejected totals per kind."""
+    result = {}
+    for kind in KINDS:
+        limits = _limits(kind)
+        counters = cache.get_many([_key(kind, name) for name in ("waiting", "admitted", "rejected")])
+        in_use = len(cache.get_many([_key(kind, "global", "all", slot) for slot in range(limits.get("global") or 0)]))
+        result[kind] = {
+            "limits": {scope: limits.get(scope) or 0 for scope in SCOPES},
+            "in_use": in_use,
+            "waiting": max(counters.get(_key(kind, "waiting"), 0), 0),
+            "admitted": counters.get(_key(kind, "admitted"), 0),
+            "rejected": counters.get(_key(kind, "rejected"), 0),
+        }
+    return result
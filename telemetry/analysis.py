@@ -0,0 +1,110 @@
+"""Vectorized post-processing of series read from InfluxDB."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def interpolate_gaps(values: List[Optional[float]], times: Optional[List[datetime]] = None) -> List[Optional[float]]:
+    """Linearly fill ``None`` cells between known values; leading/trailing gaps stay ``None``.
+
+    Pass the cell ``times`` whenever the grid may skip cells (empty windows
+    are dropped from the Flux result), otherwise the row index is the x axis.
+    """
+    column = np.array(values, dtype=np.float64)
+    known = ~np.isnan(column)
+    if known.all() or not known.any():
+        return values
+    index = np.arange(len(column))
+    x = index if times is None else np.array([ts.timestamp() for ts in times], dtype=np.float64)
+    filled = np.interp(x, x[known], column[known])
+    first, last = index[known][0], index[known][-1]
+    inside = (index >= first) & (index <= last)
+    return [float(v) if ok else None for v, ok in zip(filled, inside)]
+
+
+def align_columns(
+    columns: Dict[str, List[Optional[float]]], times: Optional[List[datetime]] = None, interpolate: bool = True
+) -> Dict[str, List[Optional[float]]]:
+    if not interpolate:
+        return columns
+    return {key: interpolate_gaps(values, times) for key, values in columns.items()}
+
+
+def xy_pairs(x: List[Optional[float]], y: List[Optional[float]]) -> List[List[float]]:
+    """Pairs of grid cells where both quantities have a value, in time order."""
+    xs = np.array(x, dtype=np.float64)
+    ys = np.array(y, dtype=np.float64)
+    both = ~(np.isnan(xs) | np.isnan(ys))
+    return np.column_stack((xs[both], ys[both])).tolist()
+
+
+@dataclass(frozen=True)
+class StepSegment:
+    """Grid cells ``start:stop`` of one throttle plateau, transients already trimmed."""
+
+    start: int
+    stop: int
+    throttle: float
+
+
+def segment_throttle_steps(
+    throttle: List[Optional[float]],
+    resolution: float,
+    tolerance: float = 1.0,
+    min_duration: float = 3.0,
+    settle: float = 1.0,
+) -> List[StepSegment]:
+    """Split a gridded throttle column into steady plateaus.
+
+    A new segment starts wherever throttle moves by more than ``tolerance``
+    between cells or data is missing. Segments whose spread exceeds
+    ``tolerance`` (ramps), or that are shorter than ``min_duration`` seconds
+    once the first ``settle`` seconds of spin-up are trimmed, are dropped.
+    """
+    values = np.array(throttle, dtype=np.float64)
+    if not len(values):
+        return []
+    valid = ~np.isnan(values)
+    jumps = np.abs(np.diff(values)) > tolerance
+    gaps = ~valid[1:] | ~valid[:-1]
+    boundary = np.concatenate(([True], jumps | gaps))
+    starts = np.flatnonzero(boundary)
+    stops = np.append(starts[1:], len(values))
+
+    filled = np.where(valid, values, 0.0)
+    spread = np.maximum.reduceat(np.where(valid, values, -np.inf), starts) - np.minimum.reduceat(
+        np.where(valid, values, np.inf), starts
+    )
+    trim = math.ceil(settle / resolution) if settle > 0 else 0
+    min_cells = max(math.ceil(min_duration / resolution), 1)
+    trimmed = starts + trim
+    keep = valid[starts] & (spread <= tolerance) & (stops - trimmed >= min_cells)
+
+    sums = np.concatenate(([0.0], np.cumsum(filled)))
+    segments = []
+    for start, stop in zip(trimmed[keep], stops[keep]):
+        segments.append(StepSegment(int(start), int(stop), float((sums[stop] - sums[start]) / (stop - start))))
+    return segments
+
+
+def segment_stats(values: List[Optional[float]], segments: List[StepSegment]) -> List[tuple[float, float, int]]:
+    """``(mean, std, count)`` of ``values`` over each segment, ignoring missing cells."""
+    column = np.array(values, dtype=np.float64)
+    valid = ~np.isnan(column)
+    filled = np.where(valid, column, 0.0)
+    sums = np.concatenate(([0.0], np.cumsum(filled)))
+    squares = np.concatenate(([0.0], np.cumsum(filled * filled)))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    starts = np.array([segment.start for segment in segments], dtype=np.int64)
+    stops = np.array([segment.stop for segment in segments], dtype=np.int64)
+    n = counts[stops] - counts[starts]
+    safe = np.maximum(n, 1)
+    mean = (sums[stops] - sums[starts]) / safe
+    var = np.maximum((squares[stops] - squares[starts]) / safe - mean * mean, 0.0)
+    return [(float(m), float(math.sqrt(v)), int(c)) for m, v, c in zip(mean, var, n)]
@@ -1,129 +1,663 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
-from rest_framework import permissions, viewsets
+from rest_framework import permissions, status, viewsets
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .admission import IMPORT, QUERY, admit
+from .admission import stats as admission_stats
+from .caching import (
+    RESULT_CACHE_TIMEOUT,
+    annotate_data_version,
+    data_version,
+    etag_matches,
+    make_etag,
+    result_cache_key,
+    set_validators,
+)
+from .deletion import delete_motor_group, delete_session
 from .influx_repo import get_influx_repo
-from .models import CsvImport, MeasuredQuantity, MotorGroup, Sensor, SensorChannel, Session
+from .models import (
+    AnomalyEvent,
+    CsvImport,
+    DetectorRule,
+    ImportProfile,
+    InfluxDeletionJob,
+    MeasuredQuantity,
+    MotorGroup,
+    Session,
+    StepMetric,
+    ThrottleStep,
+)
+from .pagination import AnomalyEventCursorPagination, NamedCursorPagination, SensorChannelCursorPagination, SessionCursorPagination
+from .previews import preview_span
+from .queries import (
+    motor_group_list_queryset,
+    sensor_channel_list_queryset,
+    sensor_list_queryset,
+    session_list_queryset,
+)
+from .registry import get_registry
+from .resumable import UploadError, append_chunk, create_upload, finalize_upload, parse_content_range
 from .serializers import (
+    AnomalyEventSerializer,
+    ThrottleStepSerializer,
+    CsvUploadSerializer,
+    DetectorRuleSerializer,
+    ImportProfileSerializer,
+    InfluxDeletionJobSerializer,
     MeasuredQuantitySerializer,
     MotorGroupSerializer,
     SensorChannelSerializer,
     SensorSerializer,
     SessionSerializer,
 )
-from .services import import_csv_to_session
+from .series_cache import cached_series
+from .services import available_rollup_tiers, import_csv_to_session, motor_group_dashboard
+from .uploads import CORRUPT_INPUT_ERRORS, CsvStreamParser, detect_compression, read_body
 
 
 class MotorGroupViewSet(viewsets.ModelViewSet):
-    queryset = MotorGroup.objects.all()
+    queryset = motor_group_list_queryset()
     serializer_class = MotorGroupSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NamedCursorPagination
+
+    def destroy(self, request, *args, **kwargs):
+        job = delete_motor_group(self.get_object())
+        return Response(InfluxDeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 class SessionViewSet(viewsets.ModelViewSet):
-    queryset = Session.objects.select_related("motor_group").all()
+    queryset = session_list_queryset()
     serializer_class = SessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SessionCursorPagination
+
+    def get_queryset(self):
+        motor_group = self.request.query_params.get("motor_group")
+        if motor_group and motor_group.isdigit():
+            return session_list_queryset(motor_group_id=int(motor_group))
+        return super().get_queryset()
+
+    def destroy(self, request, *args, **kwargs):
+        job = delete_session(self.get_object())
+        return Response(InfluxDeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 class SensorViewSet(viewsets.ModelViewSet):
-    queryset = Sensor.objects.select_related("stand").all()
+    queryset = sensor_list_queryset()
     serializer_class = SensorSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NamedCursorPagination
 
 
 class SensorChannelViewSet(viewsets.ModelViewSet):
-    queryset = SensorChannel.objects.select_related("sensor", "quantity").all()
+    queryset = sensor_channel_list_queryset()
     serializer_class = SensorChannelSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SensorChannelCursorPagination
 
 
 class MeasuredQuantityViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = MeasuredQuantity.objects.all()
     serializer_class = MeasuredQuantitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NamedCursorPagination
 
 
-class SessionSeriesView(APIView):
+class ImportProfileViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ImportProfile.objects.prefetch_related("columns__quantity").all()
+    serializer_class = ImportProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
-    default_limit = 500
+    pagination_class = NamedCursorPagination
 
-    def _parse_dt(self, raw):
-        if not raw:
-            return None
-        dt = parse_datetime(raw)
-        if not dt:
-            raise ValueError("invalid datetime")
-        if dt and timezone.is_naive(dt):
-            dt = timezone.make_aware(dt)
-        return dt
 
-    def get(self, request, pk: int):
-        quantity_key = request.query_params.get("quantity")
+class DetectorRuleViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = DetectorRule.objects.select_related("quantity").all()
+    serializer_class = DetectorRuleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class AnomalyEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """Detected events; filter with ``session``, ``motor_group``, ``quantity`` (key) and ``kind``."""
+
+    queryset = AnomalyEvent.objects.select_related("quantity").all()
+    serializer_class = AnomalyEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AnomalyEventCursorPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        params = self.request.query_params
+        for param in ("session", "motor_group"):
+            value = params.get(param)
+            if value and value.isdigit():
+                qs = qs.filter(**{f"{param}_id": int(value)})
+        if params.get("quantity"):
+            quantity = get_registry().quantity(params["quantity"])
+            qs = qs.filter(quantity_id=quantity.id if quantity else None)
+        if params.get("kind"):
+            qs = qs.filter(kind=params["kind"])
+        return qs
+
+
+class InfluxDeletionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = InfluxDeletionJob.objects.all()
+    serializer_class = InfluxDeletionJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class SeriesQueryError(Exception):
+    def __init__(self, detail: str, status: int = 400) -> None:
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _parse_dt(raw):
+    if not raw:
+        return None
+    dt = parse_datetime(raw)
+    if not dt:
+        raise ValueError("invalid datetime")
+    if dt and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+# Coarser buckets than a year make no sense for a test session.
+MAX_RESOLUTION = timedelta(days=366)
+
+
+@dataclass
+class SeriesQuery:
+    """Validated query parameters of the series endpoints (sync and async)."""
+
+    quantity_key: str
+    from_dt: Optional[datetime] = None
+    to_dt: Optional[datetime] = None
+    sensor_id: Optional[int] = None
+    resolution: Optional[timedelta] = None
+
+    @classmethod
+    def from_params(cls, params) -> "SeriesQuery":
+        quantity_key = params.get("quantity")
         if not quantity_key:
-            return Response({"detail": "quantity is required"}, status=400)
+            raise SeriesQueryError("quantity is required")
+        try:
+            from_dt = _parse_dt(params.get("from"))
+            to_dt = _parse_dt(params.get("to"))
+        except ValueError:
+            raise SeriesQueryError("invalid datetime format") from None
+        if from_dt and to_dt and from_dt > to_dt:
+            raise SeriesQueryError("from must be before to")
 
-        session = get_object_or_404(Session, pk=pk)
+        sensor_id = params.get("sensor")
+        if sensor_id is not None and not sensor_id.isdigit():
+            raise SeriesQueryError("sensor must be an integer id")
+
+        try:
+            resolution = cls._parse_resolution(params, from_dt, to_dt)
+        except (ValueError, OverflowError):
+            raise SeriesQueryError("resolution and points must be positive numbers") from None
+        return cls(quantity_key, from_dt, to_dt, int(sensor_id) if sensor_id else None, resolution)
+
+    @staticmethod
+    def _parse_resolution(params, from_dt, to_dt):
+        """Requested bucket width: ``resolution`` in seconds, or the span split into ``points``."""
+        raw_resolution = params.get("resolution")
+        if raw_resolution:
+            seconds = float(raw_resolution)
+            if not math.isfinite(seconds) or seconds <= 0:
+                raise ValueError("resolution must be positive")
+            if seconds > MAX_RESOLUTION.total_seconds():
+                raise ValueError("resolution is too large")
+            return timedelta(seconds=seconds)
+        raw_points = params.get("points")
+        if raw_points:
+            points = int(raw_points)
+            if points <= 0:
+                raise ValueError("points must be positive")
+            if from_dt and to_dt:
+                return (to_dt - from_dt) / points
+        return None
+
+    def needs_tiers(self, session: Session) -> bool:
+        return self.resolution is not None or session.raw_expired_at is not None
+
+    def execute(self, repo, session: Session, tiers, limit: int, *, asynchronous: bool = False):
+        """Run the matching repository query; returns a coroutine when ``asynchronous``."""
+        common = {
+            "session_id": session.id,
+            "quantity": self.quantity_key,
+            "sensor_id": self.sensor_id,
+            "tiers": tiers,
+            "raw_available": session.raw_expired_at is None,
+            # Pinning the group lets a single-sensor read skip the sort (telemetry/flux.py).
+            "motor_group_id": None if session.motor_group_changed else session.motor_group_id,
+        }
+        if self.from_dt or self.to_dt:
+            method = repo.aquery_series if asynchronous else repo.query_series
+            return method(from_dt=self.from_dt, to_dt=self.to_dt, resolution=self.resolution, **common)
+        method = repo.aquery_last_points if asynchronous else repo.query_last_points
+        return method(limit=limit, **common)
+
+
+SERIES_SESSION_FIELDS = ("id", "motor_group_id", "motor_group_changed", "ended_at", "raw_expired_at", "influx_shard")
+
+
+class SessionSeriesView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 500
+
+    def get(self, request, pk: int):
         try:
-            quantity = MeasuredQuantity.objects.get(key=quantity_key)
-        except MeasuredQuantity.DoesNotExist:
+            query = SeriesQuery.from_params(request.query_params)
+        except SeriesQueryError as exc:
+            return Response({"detail": exc.detail}, status=exc.status)
+
+        if get_registry().quantity(query.quantity_key) is None:
             return Response({"detail": "unknown quantity"}, status=404)
+        session = get_object_or_404(annotate_data_version(Session.objects.only(*SERIES_SESSION_FIELDS)), pk=pk)
+        version = data_version(session)
+        etag = make_etag(version, request.query_params, "series") if version is not None else None
+        if etag and etag_matches(request.headers.get("If-None-Match"), etag):
+            return set_validators(Response(status=304), etag)
+        tiers = available_rollup_tiers(session) if query.needs_tiers(session) else []
 
+        repo = get_influx_repo(session)
+        with admit(QUERY, request.user.id, session.id):
+            try:
+                data = cached_series(session, version, query, self.default_limit)
+                if data is None:
+                    data = query.execute(repo, session, tiers, self.default_limit)
+            except Exception as exc:  # noqa: BLE001
+                return Response({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+
+        return set_validators(Response(data), etag)
+
+
+class SessionResampleView(APIView):
+    """Several quantities of a session on one time grid, as columns or XY pairs.
+
+    ``quantities=thrust,rpm`` returns aligned columns; ``x=rpm&y=thrust``
+    returns the pairs for a scatter plot. The grid is ``resolution`` seconds or
+    ``points`` cells over ``from``–``to`` (the span of the imported data by default).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    default_points = 1000
+    max_points = 5000
+    max_quantities = 8
+
+    def get(self, request, pk: int):
+        params = request.query_params
+        x_key, y_key = params.get("x"), params.get("y")
+        if bool(x_key) != bool(y_key):
+            return Response({"detail": "x and y must be given together"}, status=400)
+        keys = [key.strip() for key in params.get("quantities", "").split(",") if key.strip()]
+        for key in (x_key, y_key):
+            if key and key not in keys:
+                keys.append(key)
+        if not keys:
+            return Response({"detail": "quantities is required"}, status=400)
+        if len(keys) > self.max_quantities:
+            return Response({"detail": f"at most {self.max_quantities} quantities"}, status=400)
+        registry = get_registry()
+        unknown = [key for key in keys if registry.quantity(key) is None]
+        if unknown:
+            return Response({"detail": f"unknown quantity: {', '.join(unknown)}"}, status=404)
         try:
-            from_dt = self._parse_dt(request.query_params.get("from"))
-            to_dt = self._parse_dt(request.query_params.get("to"))
-        except ValueError:
-            return Response({"detail": "invalid datetime format"}, status=400)
+            from_dt = _parse_dt(params.get("from"))
+            to_dt = _parse_dt(params.get("to"))
+            resolution = SeriesQuery._parse_resolution(params, from_dt, to_dt)
+        except (ValueError, OverflowError):
+            return Response({"detail": "invalid from/to/resolution/points"}, status=400)
 
-        if from_dt and to_dt and from_dt > to_dt:
-            return Response({"detail": "from must be before to"}, status=400)
+        session = get_object_or_404(
+            annotate_data_version(Session.objects.only(*SERIES_SESSION_FIELDS, "started_at", "ended_at", "preview")), pk=pk
+        )
+        version = data_version(session)
+        etag = make_etag(version, params, "resample", session.started_at, session.ended_at) if version is not None else None
+        if etag and etag_matches(request.headers.get("If-None-Match"), etag):
+            return set_validators(Response(status=304), etag)
+
+        repo = get_influx_repo(session)
+        with admit(QUERY, request.user.id, session.id):
+            try:
+                start, stop = from_dt, to_dt
+                if start is None or stop is None:
+                    data_start, data_stop = self.data_span(session, repo)
+                    start, stop = start or data_start, stop or data_stop
+                # The grid and the query cover one interval, so the cell limits hold.
+                if stop > start:
+                    span = stop - start
+                    points = int(params.get("points") or self.default_points)
+                    resolution = max(resolution or span / points, span / self.max_points)
+                resolution = resolution or timedelta(seconds=1)
+                times, columns = repo.query_aligned(
+                    session.id,
+                    keys,
+                    resolution,
+                    from_dt=start,
+                    to_dt=stop,
+                    tiers=available_rollup_tiers(session),
+                    raw_available=session.raw_expired_at is None,
+                )
+            except Exception as exc:  # noqa: BLE001
+                return Response({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+        from .analysis import align_columns, xy_pairs  # numpy on first use only
+
+        columns = align_columns(columns, times, interpolate=params.get("fill", "linear") != "none")
+
+        data = {"resolution": resolution.total_seconds()}
+        if x_key:
+            data.update(x=x_key, y=y_key, points=xy_pairs(columns[x_key], columns[y_key]))
+        else:
+            data.update(ts=[ts.isoformat() for ts in times], columns=columns)
+        return set_validators(Response(data), etag)
+
+    @staticmethod
+    def data_span(session: Session, repo) -> tuple[datetime, datetime]:
+        """Interval of the session's points: per the preview, else InfluxDB, else the session times.
+
+        Imported CSVs keep their own timestamps, often long before ``started_at``.
+        """
+        span = preview_span(session.preview)
+        if span is not None:
+            start, stop = (datetime.fromtimestamp(t, tz=dt_timezone.utc) for t in span)
+            return start, stop
+        if session.raw_expired_at is None:
+            bounds = repo.data_bounds("session_id", session.id, repo.bucket)
+            if bounds is not None:
+                # range() excludes its stop; step past the last point.
+                return bounds[0], bounds[1] + timedelta(microseconds=1)
+        # A running session has no end yet; its grid reaches up to now.
+        return session.started_at, session.ended_at or timezone.now()
 
-        repo = get_influx_repo()
+
+class SessionStepsView(APIView):
+    """Throttle steps of a session with steady-state metrics, as stored by ``analyze_steps``."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk: int):
+        session = get_object_or_404(Session.objects.only("id", "steps_analyzed_at"), pk=pk)
+        steps = ThrottleStep.objects.filter(session_id=session.id).prefetch_related(
+            Prefetch("metrics", queryset=StepMetric.objects.select_related("quantity"))
+        )
+        return Response(
+            {"analyzed_at": session.steps_analyzed_at, "steps": ThrottleStepSerializer(steps, many=True).data}
+        )
+
+
+class MotorGroupPerformanceView(APIView):
+    """Performance curves of a motor group (``y`` against ``x``, throttle by default), one per session.
+
+    Every point is a precomputed throttle step, so no raw series are read.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk: int):
+        group = get_object_or_404(MotorGroup.objects.only("id"), pk=pk)
+        x_key = request.query_params.get("x", "throttle")
+        y_key = request.query_params.get("y")
+        if not y_key:
+            return Response({"detail": "y is required"}, status=400)
+        rows = (
+            StepMetric.objects.filter(step__session__motor_group_id=group.id, quantity__key__in={x_key, y_key})
+            .order_by("-step__session__started_at", "step__session_id", "step__index")
+            .values("step_id", "step__session_id", "step__session__name", "quantity__key", "mean", "std")
+        )
+        curves: dict[int, dict] = {}
+        steps: dict[int, dict] = {}
+        for row in rows:
+            curve = curves.setdefault(
+                row["step__session_id"],
+                {"session": row["step__session_id"], "name": row["step__session__name"], "points": []},
+            )
+            step = steps.get(row["step_id"])
+            if step is None:
+                step = steps[row["step_id"]] = {}
+                curve["points"].append(step)
+            if row["quantity__key"] == x_key:
+                step["x"] = row["mean"]
+            if row["quantity__key"] == y_key:
+                step["y"], step["y_std"] = row["mean"], row["std"]
+        for curve in curves.values():
+            curve["points"] = [point for point in curve["points"] if "x" in point and "y" in point]
+        return Response({"x": x_key, "y": y_key, "sessions": list(curves.values())})
+
+
+class MotorGroupDashboardView(APIView):
+    """Peak thrust, max temperature, max rpm and duration of every session of a motor group."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk: int):
+        group = get_object_or_404(MotorGroup.objects.only("id", "name"), pk=pk)
+        with admit(QUERY, request.user.id):
+            try:
+                rows = motor_group_dashboard(group)
+            except Exception as exc:  # noqa: BLE001
+                return Response({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+        return Response({"motor_group": group.id, "name": group.name, "sessions": rows})
+
+
+class SessionDistributionView(APIView):
+    """Histogram and percentiles of one quantity, cached until the session's next import."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    default_bins = 20
+    max_bins = 200
+
+    def get(self, request, pk: int):
         try:
-            if from_dt or to_dt:
-                data = repo.query_series(session_id=session.id, quantity=quantity.key, from_dt=from_dt, to_dt=to_dt)
-            else:
-                data = repo.query_last_points(session_id=session.id, quantity=quantity.key, limit=self.default_limit)
-        except Exception as exc:  # noqa: BLE001
-            return Response({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+            query = SeriesQuery.from_params(request.query_params)
+        except SeriesQueryError as exc:
+            return Response({"detail": exc.detail}, status=exc.status)
+        raw_bins = request.query_params.get("bins") or str(self.default_bins)
+        if not raw_bins.isdigit() or not 1 <= int(raw_bins) <= self.max_bins:
+            return Response({"detail": f"bins must be an integer from 1 to {self.max_bins}"}, status=400)
+
+        if get_registry().quantity(query.quantity_key) is None:
+            return Response({"detail": "unknown quantity"}, status=404)
+        session = get_object_or_404(annotate_data_version(Session.objects.only(*SERIES_SESSION_FIELDS)), pk=pk)
+        version = data_version(session)
+        etag = make_etag(version, request.query_params, "distribution") if version is not None else None
+        if etag and etag_matches(request.headers.get("If-None-Match"), etag):
+            return set_validators(Response(status=304), etag)
 
-        return Response(data)
+        key = result_cache_key("distribution", etag) if etag else None
+        data = cache.get(key) if key else None
+        if data is None:
+            with admit(QUERY, request.user.id, session.id):
+                try:
+                    data = get_influx_repo(session).query_distribution(
+                        session.id,
+                        query.quantity_key,
+                        bins=int(raw_bins),
+                        from_dt=query.from_dt,
+                        to_dt=query.to_dt,
+                        sensor_id=query.sensor_id,
+                        tiers=available_rollup_tiers(session),
+                        raw_available=session.raw_expired_at is None,
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    return Response({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+            if key:
+                cache.set(key, data, RESULT_CACHE_TIMEOUT)
+        return set_validators(Response(data), etag)
 
 
 class SessionImportCsvView(APIView):
+    """CSV import: multipart ``file`` field or a raw ``text/csv`` body.
+
+    Uploads may be gzip/zstd compressed — by file suffix (``.csv.gz``,
+    ``.csv.zst``) for multipart, or by ``Content-Encoding`` for a raw body.
+    """
+
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = (MultiPartParser, FormParser)
+    parser_classes = (MultiPartParser, FormParser, CsvStreamParser)
 
     def post(self, request, pk: int):
         session = get_object_or_404(Session, pk=pk)
-        upload = request.FILES.get("file")
-        if not upload:
-            return Response({"detail": "file is required"}, status=400)
+        content_encoding = None
+        if request.content_type.startswith(CsvStreamParser.media_type):
+            upload = request.data
+            if not hasattr(upload, "read"):
+                return Response({"detail": "request body is empty"}, status=400)
+            file_name = request.query_params.get("file_name", "upload.csv")
+            content_encoding = request.headers.get("Content-Encoding")
+            profile_id = request.query_params.get("profile")
+        else:
+            upload = request.FILES.get("file")
+            if not upload:
+                return Response({"detail": "file is required"}, status=400)
+            file_name = upload.name
+            profile_id = request.data.get("profile")
+        profile = None
+        if profile_id:
+            try:
+                profile = ImportProfile.objects.get(pk=profile_id)
+            except (ImportProfile.DoesNotExist, ValueError):
+                return Response({"detail": "unknown import profile"}, status=400)
         csv_import = None
-        try:
-            csv_import = import_csv_to_session(session, upload, file_name=upload.name, rethrow=True)
-        except Exception:  # noqa: BLE001
-            error_message = csv_import.error_message if csv_import else "Ошибка импорта"
-            return Response(
-                {
-                    "status": CsvImport.STATUS_FAILED,
-                    "rows_processed": csv_import.rows_processed if csv_import else 0,
-                    "rows_failed": csv_import.rows_failed if csv_import else 0,
-                    "error_message": error_message,
-                },
-                status=500,
-            )
+        with admit(IMPORT, request.user.id, session.id):
+            try:
+                csv_import = import_csv_to_session(
+                    session,
+                    upload,
+                    file_name=file_name,
+                    profile=profile,
+                    content_encoding=content_encoding,
+                    rethrow=True,
+                )
+            except Exception:  # noqa: BLE001
+                error_message = csv_import.error_message if csv_import else "Ошибка импорта"
+                return Response(
+                    {
+                        "status": CsvImport.STATUS_FAILED,
+                        "rows_processed": csv_import.rows_processed if csv_import else 0,
+                        "rows_failed": csv_import.rows_failed if csv_import else 0,
+                        "error_message": error_message,
+                    },
+                    status=500,
+                )
         status_code = 200 if csv_import.status == CsvImport.STATUS_SUCCESS else 400
         return Response(
             {
                 "status": csv_import.status,
                 "rows_processed": csv_import.rows_processed,
                 "rows_failed": csv_import.rows_failed,
+                "rows_duplicate": csv_import.rows_duplicate,
+                "rows_reordered": csv_import.rows_reordered,
                 "error_message": csv_import.error_message,
             },
             status=status_code,
         )
+
+
+def _upload_response(csv_import: CsvImport, status_code: int = 200) -> Response:
+    if csv_import.status == CsvImport.STATUS_FAILED:
+        status_code = 400
+    return Response(CsvUploadSerializer(csv_import).data, status=status_code)
+
+
+class CsvUploadCreateView(APIView):
+    """Start a resumable upload: ``file_name``, optional ``size`` (bytes) and ``profile``."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk: int):
+        session = get_object_or_404(Session, pk=pk)
+        size = request.data.get("size")
+        if size is not None and not str(size).isdigit():
+            return Response({"detail": "size must be a non-negative integer"}, status=400)
+        file_name = request.data.get("file_name") or "upload.csv"
+        if len(file_name) > CsvImport._meta.get_field("file_name").max_length:
+            return Response({"detail": "file_name is too long"}, status=400)
+        profile = None
+        profile_id = request.data.get("profile")
+        if profile_id:
+            try:
+                profile = ImportProfile.objects.get(pk=profile_id)
+            except (ImportProfile.DoesNotExist, ValueError):
+                return Response({"detail": "unknown import profile"}, status=400)
+        csv_import = create_upload(session, file_name, profile, int(size) if size is not None else None)
+        return _upload_response(csv_import, status.HTTP_201_CREATED)
+
+
+class CsvUploadView(APIView):
+    """Upload progress (GET) and the next byte range of the CSV (PUT).
+
+    A PUT body may carry ``Content-Range: bytes a-b/total``; without it the
+    bytes are appended at ``bytes_received``. ``Content-Encoding: gzip|zstd``
+    compresses a single chunk, offsets always refer to the uncompressed CSV.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk: int):
+        return _upload_response(get_object_or_404(CsvImport, pk=pk))
+
+    def put(self, request, pk: int):
+        upload = get_object_or_404(CsvImport.objects.only("id", "session_id"), pk=pk)
+        try:
+            start, total = parse_content_range(request.headers.get("Content-Range"))
+            compression = detect_compression(None, "", request.headers.get("Content-Encoding"))
+            data = read_body(request.stream, compression, settings.CSV_UPLOAD_CHUNK_MAX_BYTES)
+        except UploadError as exc:
+            return Response({"detail": exc.detail}, status=exc.status)
+        except (ValueError, *CORRUPT_INPUT_ERRORS) as exc:
+            return Response({"detail": str(exc)}, status=400)
+        with admit(IMPORT, request.user.id, upload.session_id):
+            try:
+                csv_import = append_chunk(pk, data, start, total)
+            except UploadError as exc:
+                body = {"detail": exc.detail}
+                if exc.csv_import is not None:
+                    body["bytes_received"] = exc.csv_import.bytes_received
+                return Response(body, status=exc.status)
+            except (ValueError, *CORRUPT_INPUT_ERRORS) as exc:
+                return Response({"detail": str(exc)}, status=400)
+            except Exception as exc:  # noqa: BLE001
+                # The chunk's transaction is rolled back, so it stays unacknowledged and can be resent.
+                return Response({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+        return _upload_response(csv_import)
+
+
+class CsvUploadFinalizeView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk: int):
+        upload = get_object_or_404(CsvImport.objects.only("id", "session_id"), pk=pk)
+        with admit(IMPORT, request.user.id, upload.session_id):
+            try:
+                csv_import = finalize_upload(pk)
+            except UploadError as exc:
+                return Response({"detail": exc.detail}, status=exc.status)
+            except Exception as exc:  # noqa: BLE001
+                return Response({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+        return _upload_response(csv_import)
+
+
+class AdmissionStatsView(APIView):
+    """Concurrency limits, slots in use, queue depth and rejections of imports and Flux queries."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(admission_stats())
@@ -0,0 +1,64 @@
+"""Async endpoints for ASGI deployments.
+
+The Flux round trip is awaited on the event loop instead of holding a worker
+thread, so one process keeps many series requests in flight. Run under
+``stendinfsys.asgi`` (e.g. uvicorn); under WSGI the views still work but
+each request occupies a thread as before.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views import View
+
+from .admission import QUERY, AdmissionRejected, aadmit
+from .api_views import SERIES_SESSION_FIELDS, SeriesQuery, SeriesQueryError
+from .caching import annotate_data_version, data_version, etag_matches, make_etag, set_validators
+from .influx_repo import get_influx_repo
+from .models import Session
+from .registry import get_registry
+from .series_cache import cached_series
+from .services import aavailable_rollup_tiers
+
+
+class AsyncSessionSeriesView(View):
+    http_method_names = ["get"]
+    default_limit = 500
+
+    async def get(self, request, pk: int):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+
+        try:
+            query = SeriesQuery.from_params(request.GET)
+        except SeriesQueryError as exc:
+            return JsonResponse({"detail": exc.detail}, status=exc.status)
+
+        if await get_registry().aquantity(query.quantity_key) is None:
+            return JsonResponse({"detail": "unknown quantity"}, status=404)
+        try:
+            session = await annotate_data_version(Session.objects.only(*SERIES_SESSION_FIELDS)).aget(pk=pk)
+        except Session.DoesNotExist:
+            return JsonResponse({"detail": "No Session matches the given query."}, status=404)
+        version = data_version(session)
+        etag = make_etag(version, request.GET, "series") if version is not None else None
+        if etag and etag_matches(request.headers.get("If-None-Match"), etag):
+            return set_validators(HttpResponseNotModified(), etag)
+        tiers = await aavailable_rollup_tiers(session) if query.needs_tiers(session) else []
+
+        # An unpinned session is routed by its motor group's name, which takes a query.
+        repo = get_influx_repo(session) if session.influx_shard else await sync_to_async(get_influx_repo)(session)
+        try:
+            async with aadmit(QUERY, user.id, session.id):
+                try:
+                    data = await sync_to_async(cached_series)(session, version, query, self.default_limit)
+                    if data is None:
+                        data = await query.execute(repo, session, tiers, self.default_limit, asynchronous=True)
+                except Exception as exc:  # noqa: BLE001
+                    return JsonResponse({"detail": f"Ошибка запроса к InfluxDB: {exc}"}, status=502)
+        except AdmissionRejected as exc:
+            response = JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+            response["Retry-After"] = str(exc.wait)
+            return response
+
+        return set_validators(JsonResponse(data, safe=False), etag)
@@ -0,0 +1,106 @@
+"""Data versions and conditional-request helpers for Influx-backed endpoints.
+
+A session's series only change when an import writes to it or its rollups
+are rebuilt, so a version derived from those Postgres rows is enough to
+build strong ETags and cache keys without asking InfluxDB anything. Failed
+imports count as well as successful ones: their batches written before the
+failure stay in InfluxDB.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from django.db.models import Count, Max, Q
+
+from .models import CsvImport
+
+# Encoding suffixes appended to strong ETags by CompressionMiddleware.
+ETAG_ENCODING_SUFFIXES = ("-br", "-gzip")
+# Results cached under a versioned key are never read again once the session
+# changes; the timeout only bounds how long such dead entries linger.
+RESULT_CACHE_TIMEOUT = 7 * 24 * 3600
+# Imports that may have written points and will write no more.
+FINISHED_STATUSES = (CsvImport.STATUS_SUCCESS, CsvImport.STATUS_FAILED)
+
+
+def annotate_data_version(qs):
+    """Annotate a Session queryset with what its data version is derived from."""
+    finished = Q(csv_imports__status__in=FINISHED_STATUSES)
+    return qs.annotate(
+        last_import_id=Max("csv_imports__id", filter=finished),
+        last_import_finished_at=Max("csv_imports__finished_at", filter=finished),
+        pending_imports=Count("csv_imports", filter=Q(csv_imports__status=CsvImport.STATUS_PENDING), distinct=True),
+        last_rollup_at=Max("rollups__created_at"),
+    )
+
+
+def data_version(session) -> str | None:
+    """Version string of an annotated session, or ``None`` while an import is still writing."""
+    if session.pending_imports:
+        return None
+    parts = [
+        session.last_import_id,
+        session.last_import_finished_at.timestamp() if session.last_import_finished_at else None,
+        session.last_rollup_at.timestamp() if session.last_rollup_at else None,
+        session.raw_expired_at.timestamp() if session.raw_expired_at else None,
+    ]
+    return ":".join("" if part is None else str(part) for part in parts)
+
+
+def motor_group_data_version(motor_group_id: int) -> str | None:
+    """Data version over every session of a group, or ``None`` while any of them is importing."""
+    finished = Q(status__in=FINISHED_STATUSES)
+    row = CsvImport.objects.filter(session__motor_group_id=motor_group_id).aggregate(
+        last_import_id=Max("id", filter=finished),
+        last_import_finished_at=Max("finished_at", filter=finished),
+        pending_imports=Count("id", filter=Q(status=CsvImport.STATUS_PENDING)),
+        last_raw_expired_at=Max("session__raw_expired_at"),
+    )
+    if row["pending_imports"]:
+        return None
+    parts = [
+        row["last_import_id"],
+        row["last_import_finished_at"].timestamp() if row["last_import_finished_at"] else None,
+        row["last_raw_expired_at"].timestamp() if row["last_raw_expired_at"] else None,
+    ]
+    return ":".join("" if part is None else str(part) for part in parts)
+
+
+def make_etag(version: str, params, *extra) -> str:
+    """Strong ETag over the data version, the query parameters and any extra parts."""
+    items = sorted((key, tuple(params.getlist(key))) for key in params)
+    digest = hashlib.sha1(repr((version, items, extra)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def result_cache_key(name: str, etag: str) -> str:
+    return f"telemetry:{name}:" + etag.strip('"')
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for suffix in ETAG_ENCODING_SUFFIXES:
+            if candidate.endswith(suffix):
+                candidate = candidate[: -len(suffix)]
+                break
+        if candidate == bare:
+            return True
+    return False
+
+
+def set_validators(response, etag: str | None):
+    """Attach the ETag and make clients revalidate instead of reusing blindly."""
+    if etag:
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,135 @@
+"""Deferred removal of Influx points that belong to deleted sessions and motor groups.
+
+Deleting the Postgres row is instant; the matching series are queued as an
+InfluxDeletionJob and removed by ``manage.py process_influx_deletions`` in
+time-bounded batches, so one huge session never turns into a single
+long-running delete request against InfluxDB. A job without a ``shard``
+runs against every InfluxDB shard (telemetry/shards.py).
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .influx_repo import InfluxRepository
+from .models import InfluxDeletionJob, MotorGroup, Session
+from .shards import all_shard_repos, shard_repo
+
+DEFAULT_BATCH = timedelta(hours=24)
+
+
+def delete_session(session: Session) -> InfluxDeletionJob:
+    with transaction.atomic():
+        job = InfluxDeletionJob.objects.create(
+            session_id=session.id,
+            motor_group_id=session.motor_group_id,
+            label=str(session),
+            reason=InfluxDeletionJob.REASON_SESSION,
+            shard=session.influx_shard,
+        )
+        session.delete()
+    return job
+
+
+def delete_motor_group(group: MotorGroup) -> InfluxDeletionJob:
+    # One job filtered by motor_group_id covers every session of the group.
+    with transaction.atomic():
+        job = InfluxDeletionJob.objects.create(
+            motor_group_id=group.id,
+            label=group.name,
+            reason=InfluxDeletionJob.REASON_MOTOR_GROUP,
+        )
+        group.delete()
+    return job
+
+
+def claim_next_job() -> InfluxDeletionJob | None:
+    with transaction.atomic():
+        job = (
+            InfluxDeletionJob.objects.select_for_update(skip_locked=True)
+            .filter(status=InfluxDeletionJob.STATUS_PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = InfluxDeletionJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def _windows(start, stop, batch: timedelta):
+    # Delete ranges are inclusive of the last point; step one microsecond past it.
+    stop = stop + timedelta(microseconds=1)
+    while start < stop:
+        end = min(start + batch, stop)
+        yield start, end
+        start = end
+
+
+def run_deletion_job(
+    job: InfluxDeletionJob,
+    repo: InfluxRepository | None = None,
+    batch: timedelta = DEFAULT_BATCH,
+) -> InfluxDeletionJob:
+    tag, value = job.tag
+    try:
+        repos = [repo] if repo else [shard_repo(job.shard)] if job.shard else all_shard_repos()
+        plan = []
+        for shard in repos:
+            for bucket in shard.all_buckets():
+                bounds = shard.data_bounds(tag, value, bucket)
+                if bounds is not None:
+                    plan.extend((shard, bucket, start, end) for start, end in _windows(*bounds, batch))
+        job.batches_total = len(plan)
+        job.batches_done = 0
+        job.save(update_fields=["batches_total", "batches_done"])
+        for shard, bucket, start, end in plan:
+            shard.delete_range(tag, value, start, end, bucket)
+            job.batches_done += 1
+            job.save(update_fields=["batches_done"])
+        job.status = InfluxDeletionJob.STATUS_DONE
+    except Exception as exc:  # noqa: BLE001
+        job.status = InfluxDeletionJob.STATUS_FAILED
+        job.error_message = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error_message", "finished_at"])
+    return job
+
+
+def find_orphans(repo: InfluxRepository | None = None) -> list[tuple[str, int]]:
+    """Tag values present in InfluxDB that no longer have a Postgres row or a queued job.
+
+    Sessions of an orphaned motor group are reported too; whichever job runs
+    second simply finds nothing left to delete.
+    """
+    repos = [repo] if repo else all_shard_repos()
+    # Finished jobs don't count: points that reappeared after one ran are orphans again.
+    active = InfluxDeletionJob.objects.filter(
+        status__in=(InfluxDeletionJob.STATUS_PENDING, InfluxDeletionJob.STATUS_RUNNING)
+    )
+    checks = [
+        ("motor_group_id", MotorGroup, set(active.filter(session_id__isnull=True).values_list("motor_group_id", flat=True))),
+        ("session_id", Session, set(active.values_list("session_id", flat=True))),
+    ]
+    orphans = []
+    for tag, model, queued in checks:
+        values = set()
+        for shard in repos:
+            for bucket in shard.all_buckets():
+                values.update(int(v) for v in shard.tag_values(tag, bucket) if str(v).isdigit())
+        existing = set(model.objects.filter(pk__in=values).values_list("pk", flat=True))
+        orphans.extend((tag, value) for value in sorted(values - existing - queued))
+    return orphans
+
+
+def enqueue_orphan(tag: str, value: int) -> InfluxDeletionJob:
+    return InfluxDeletionJob.objects.create(
+        reason=InfluxDeletionJob.REASON_ORPHAN,
+        label=f"{tag}={value}",
+        **{tag: value},
+    )
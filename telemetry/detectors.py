@@ -0,0 +1,224 @@
+"""Rule-based anomaly detection evaluated on each import chunk.
+
+Every active DetectorRule of an imported quantity gets one detector per CSV
+column. A chunk's values are turned into numpy arrays once and each detector
+scores them in a single vectorized pass; only what is needed to continue at
+the next chunk is carried over (the previous point, the z-score window tail
+and an event that is still open at the chunk boundary).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .models import AnomalyEvent, CsvImport, DetectorRule, Session
+
+if TYPE_CHECKING:
+    from .services import ColumnTarget
+
+
+class _RuleDetector:
+    def __init__(self, rule: DetectorRule, target: ColumnTarget, quantity_id: int) -> None:
+        self.rule = rule
+        self.target = target
+        self.quantity_id = quantity_id
+        self.prev_t: float | None = None
+        self.prev_v: float | None = None
+        self.tail = np.empty(0)
+        self.open: dict | None = None
+
+    # -- scoring -------------------------------------------------------------
+    # Each scorer returns a non-negative array; a point violates the rule when
+    # its score is positive.
+
+    def _limit_scores(self, t: np.ndarray, v: np.ndarray) -> np.ndarray:
+        scores = np.zeros_like(v)
+        if self.rule.min_value is not None:
+            scores = np.maximum(scores, self.rule.min_value - v)
+        if self.rule.max_value is not None:
+            scores = np.maximum(scores, v - self.rule.max_value)
+        return scores
+
+    def _rate_scores(self, t: np.ndarray, v: np.ndarray) -> np.ndarray:
+        if self.prev_t is not None:
+            tt = np.concatenate(([self.prev_t], t))
+            vv = np.concatenate(([self.prev_v], v))
+        else:
+            tt = np.concatenate((t[:1], t))
+            vv = np.concatenate((v[:1], v))
+        dt = np.diff(tt)
+        dv = np.abs(np.diff(vv))
+        rate = np.divide(dv, dt, out=np.zeros_like(dv), where=dt > 0)
+        self.prev_t, self.prev_v = float(t[-1]), float(v[-1])
+        return np.where(rate > self.rule.max_rate, rate, 0.0)
+
+    def _zscore_scores(self, t: np.ndarray, v: np.ndarray) -> np.ndarray:
+        window = self.rule.window
+        history = np.concatenate((self.tail, v))
+        offset = len(self.tail)
+        sums = np.concatenate(([0.0], np.cumsum(history)))
+        squares = np.concatenate(([0.0], np.cumsum(history * history)))
+        pos = np.arange(offset, len(history))
+        ready = pos >= window
+        lo = np.where(ready, pos - window, 0)
+        mean = (sums[pos] - sums[lo]) / window
+        var = np.maximum((squares[pos] - squares[lo]) / window - mean * mean, 0.0)
+        std = np.sqrt(var)
+        z = np.divide(np.abs(v - mean), std, out=np.zeros_like(v), where=ready & (std > 1e-12))
+        self.tail = history[-window:]
+        return np.where(z > self.rule.threshold, z, 0.0)
+
+    # -- events --------------------------------------------------------------
+
+    def feed(self, timestamps: list[datetime], t: np.ndarray, v: np.ndarray) -> list[dict]:
+        """Score one chunk; returns events that ended inside it."""
+        scorer = {
+            DetectorRule.KIND_LIMIT: self._limit_scores,
+            DetectorRule.KIND_RATE: self._rate_scores,
+            DetectorRule.KIND_ZSCORE: self._zscore_scores,
+        }[self.rule.kind]
+        scores = scorer(t, v)
+        mask = scores > 0
+        closed = []
+        if not mask[0] and self.open is not None:
+            closed.append(self.open)
+            self.open = None
+        if not mask.any():
+            return closed
+
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        for start, end in zip(starts, ends):
+            peak = start + int(np.argmax(scores[start:end]))
+            run = {
+                "started_at": timestamps[start],
+                "ended_at": timestamps[end - 1],
+                "point_count": int(end - start),
+                "peak_value": float(v[peak]),
+                "peak_score": float(scores[peak]),
+            }
+            if start == 0 and self.open is not None:
+                run = self._merge(self.open, run)
+                self.open = None
+            if end == len(v):
+                self.open = run
+            else:
+                closed.append(run)
+        return closed
+
+    def state(self) -> dict:
+        open_event = None
+        if self.open is not None:
+            open_event = {
+                **self.open,
+                "started_at": self.open["started_at"].isoformat(),
+                "ended_at": self.open["ended_at"].isoformat(),
+            }
+        return {"prev_t": self.prev_t, "prev_v": self.prev_v, "tail": self.tail.tolist(), "open": open_event}
+
+    def restore(self, state: dict) -> None:
+        self.prev_t = state["prev_t"]
+        self.prev_v = state["prev_v"]
+        self.tail = np.array(state["tail"], dtype=np.float64)
+        self.open = state["open"]
+        if self.open is not None:
+            self.open["started_at"] = datetime.fromisoformat(self.open["started_at"])
+            self.open["ended_at"] = datetime.fromisoformat(self.open["ended_at"])
+
+    @staticmethod
+    def _merge(first: dict, second: dict) -> dict:
+        peak = first if first["peak_score"] >= second["peak_score"] else second
+        return {
+            "started_at": first["started_at"],
+            "ended_at": second["ended_at"],
+            "point_count": first["point_count"] + second["point_count"],
+            "peak_value": peak["peak_value"],
+            "peak_score": peak["peak_score"],
+        }
+
+
+class AnomalyDetector:
+    """Runs the active detector rules over an import, chunk by chunk."""
+
+    def __init__(self, session: Session, csv_import: CsvImport, plan: list[ColumnTarget], rules) -> None:
+        self.session = session
+        self.csv_import = csv_import
+        self.detectors: list[tuple[int, _RuleDetector]] = []
+        by_quantity: dict[str, list[DetectorRule]] = {}
+        for rule in rules:
+            by_quantity.setdefault(rule.quantity.key, []).append(rule)
+        for position, target in enumerate(plan):
+            for rule in by_quantity.get(target.quantity_key, ()):
+                self.detectors.append((position, _RuleDetector(rule, target, rule.quantity_id)))
+        self.event_count = 0
+
+    @classmethod
+    def for_import(cls, session: Session, csv_import: CsvImport, plan: list[ColumnTarget]) -> "AnomalyDetector":
+        rules = DetectorRule.objects.filter(
+            is_active=True, quantity__key__in={target.quantity_key for target in plan}
+        ).select_related("quantity")
+        return cls(session, csv_import, plan, list(rules))
+
+    def feed(self, timestamps: list[datetime], columns: list[list[float | None]]) -> None:
+        """Evaluate one parsed chunk: ``columns`` are aligned with the column plan, None for blanks."""
+        if not self.detectors or not timestamps:
+            return
+        t = np.fromiter((ts.timestamp() for ts in timestamps), dtype=np.float64, count=len(timestamps))
+        arrays: dict[int, np.ndarray] = {}
+        events = []
+        for position, detector in self.detectors:
+            if position not in arrays:
+                arrays[position] = np.array(columns[position], dtype=np.float64)
+            values = arrays[position]
+            valid = np.flatnonzero(~np.isnan(values))
+            if not len(valid):
+                continue
+            column_ts = timestamps if len(valid) == len(values) else [timestamps[i] for i in valid]
+            for run in detector.feed(column_ts, t[valid], values[valid]):
+                events.append(self._event(detector, run))
+        self._save(events)
+
+    def finish(self) -> int:
+        """Close events still open at the end of the file; returns the import's event count."""
+        events = []
+        for _, detector in self.detectors:
+            if detector.open is not None:
+                events.append(self._event(detector, detector.open))
+                detector.open = None
+        self._save(events)
+        return self.event_count
+
+    def state(self) -> list[dict]:
+        """JSON-serialisable carry-over state, for imports resumed in another request."""
+        return [
+            {"position": position, "rule": detector.rule.id, **detector.state()}
+            for position, detector in self.detectors
+        ]
+
+    def restore(self, state: list[dict]) -> None:
+        saved = {(item["position"], item["rule"]): item for item in state}
+        for position, detector in self.detectors:
+            item = saved.get((position, detector.rule.id))
+            if item is not None:
+                detector.restore(item)
+
+    def _event(self, detector: _RuleDetector, run: dict) -> AnomalyEvent:
+        return AnomalyEvent(
+            session=self.session,
+            motor_group_id=self.session.motor_group_id,
+            csv_import=self.csv_import,
+            rule=detector.rule,
+            kind=detector.rule.kind,
+            quantity_id=detector.quantity_id,
+            sensor_id=detector.target.sensor_id,
+            **run,
+        )
+
+    def _save(self, events: list[AnomalyEvent]) -> None:
+        if events:
+            AnomalyEvent.objects.bulk_create(events)
+            self.event_count += len(events)
@@ -0,0 +1,277 @@
+"""Flux query builder for :class:`~telemetry.influx_repo.InfluxRepository`.
+
+Every query the repository sends goes through :class:`FluxQuery`. Data
+values (tag values, time bounds) pass through :meth:`FluxQuery.param`, and
+function arguments through :meth:`FluxQuery.literal`. Both escape their
+value, so nothing from a request can change the query's structure.
+With ``use_params`` the data values are sent as Flux query parameters
+(``params.p0``) instead. Only InfluxDB Cloud accepts those; OSS rejects
+them, so the default is escaped inline literals.
+
+:class:`Pipeline` also plans the query a little:
+
+* consecutive ``where`` calls become one ``filter``, with ``_measurement``
+  and ``_field`` first, so ``from |> range |> filter`` is pushed down to
+  the storage engine as a single read;
+* ``sort`` on ``_time`` is only emitted when tables were merged or
+  reshaped; one series straight from storage is already in time order.
+  A series is one only when every tag in SERIES_TAGS is pinned, so the
+  series queries pin ``motor_group_id`` for sessions that never changed
+  groups;
+* ``group()`` right after a ``keep`` of value columns only is dropped,
+  since that ``keep`` already left one ungrouped table.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+# Tags that, with the measurement and field, identify one series as written by write_points.
+# motor_group_id does not follow from session_id: a session moved to another group has points under both.
+SERIES_TAGS = ("session_id", "motor_group_id", "quantity", "sensor_id")
+# Columns that are never part of a group key.
+VALUE_COLUMNS = frozenset({"_time", "_value", "_start", "_stop"})
+FILTER_ORDER = ("_measurement", "_field")
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Stream order after the last stage.
+ORDERED = "ordered"  # every table in time order, as read from storage
+MERGED = "merged"  # tables concatenated: in order only if there was one to begin with
+UNORDERED = "unordered"  # reshaped (pivot, union): order unknown
+
+
+class Raw(str):
+    """Flux code inserted verbatim — function names, identifiers. Never data."""
+
+
+def escape(value: str) -> str:
+    """Escape a Flux string literal's content (including ``${`` interpolation)."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("${", "\\${")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\t", "\\t")
+    )
+
+
+def duration(value: timedelta) -> str:
+    return f"{max(int(value.total_seconds() * 1000), 1)}ms"
+
+
+def identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Недопустимое имя колонки Flux: {name!r}")
+    return name
+
+
+def delete_predicate(measurement: str, **tags) -> str:
+    """Predicate for the delete API (its own syntax, not Flux), with values escaped."""
+    parts = [f'_measurement="{escape(measurement)}"']
+    parts += [f'{identifier(tag)}="{escape(str(value))}"' for tag, value in tags.items()]
+    return " AND ".join(parts)
+
+
+class FluxQuery:
+    def __init__(self, use_params: bool = False) -> None:
+        self.use_params = use_params
+        self.params: Dict[str, Union[str, datetime]] = {}
+        self._imports: List[str] = []
+        self._statements: List[Union[str, "Pipeline"]] = []
+
+    # -- values ---------------------------------------------------------------
+
+    def literal(self, value) -> str:
+        """``value`` as inline Flux: escaped string, ``time(v: ...)``, duration, number or array."""
+        if isinstance(value, Raw):
+            return str(value)
+        if isinstance(value, Pipeline):
+            return value.render()
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, int):
+            return str(value)
+        if isinstance(value, float):
+            text = repr(value)
+            # Flux float literals have no exponent or infinity.
+            return text if math.isfinite(value) and "e" not in text else f'float(v: "{"+Inf" if value == math.inf else text}")'
+        if isinstance(value, timedelta):
+            return duration(value)
+        if isinstance(value, datetime):
+            return f'time(v: "{value.isoformat()}")'
+        if isinstance(value, (list, tuple)):
+            return "[" + ", ".join(self.literal(item) for item in value) + "]"
+        return f'"{escape(str(value))}"'
+
+    def param(self, value) -> str:
+        """A data value: ``params.pN`` in params mode, an escaped literal otherwise."""
+        if not self.use_params or not isinstance(value, (str, datetime)):
+            return self.literal(value)
+        for name, existing in self.params.items():
+            if type(existing) is type(value) and existing == value:
+                return f"params.{name}"
+        name = f"p{len(self.params)}"
+        self.params[name] = value
+        return f"params.{name}"
+
+    def call(self, fn: str, /, **kwargs) -> str:
+        args = ", ".join(f"{identifier(key)}: {self.literal(value)}" for key, value in kwargs.items())
+        return f"{fn}({args})"
+
+    # -- statements -----------------------------------------------------------
+
+    def import_(self, package: str) -> None:
+        self._imports.append(f'import "{escape(package)}"')
+
+    def from_bucket(self, bucket: str, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> "Pipeline":
+        """``from |> range``; the range starts at the epoch and stops now unless given."""
+        bounds = {"start": Raw(self.param(start)) if start else Raw("0")}
+        if stop:
+            bounds["stop"] = Raw(self.param(stop))
+        return Pipeline(self, self.call("from", bucket=bucket)).then("range", **bounds)
+
+    def expression(self, fn: str, /, **kwargs) -> "Pipeline":
+        """A pipeline starting at a call other than ``from``, e.g. ``schema.tagValues``."""
+        return Pipeline(self, self.call(fn, **kwargs))
+
+    def assign(self, name: str, pipeline: "Pipeline") -> "Pipeline":
+        """``name = pipeline``; returns a pipeline reading from ``name`` that keeps its plan state.
+
+        Take a :meth:`Pipeline.branch` of it for every statement that reads ``name``.
+        """
+        self._statements.append(f"{identifier(name)} = {pipeline.render()}")
+        return pipeline.fork(name)
+
+    def union(self, *pipelines: "Pipeline") -> "Pipeline":
+        tables = ",\n  ".join(pipeline.render(inline=True) for pipeline in pipelines)
+        union = Pipeline(self, f"union(tables: [\n  {tables}\n])")
+        union.pinned = set.intersection(*(pipeline.pinned for pipeline in pipelines))
+        union.order = UNORDERED
+        return union
+
+    def add(self, pipeline: "Pipeline") -> None:
+        self._statements.append(pipeline)
+
+    def render(self) -> str:
+        body = [s if isinstance(s, str) else s.render() for s in self._statements]
+        return "\n".join([*self._imports, *([""] if self._imports else []), *body]) + "\n"
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+class Pipeline:
+    def __init__(self, query: FluxQuery, source: str) -> None:
+        self.query = query
+        self.source = source
+        self.stages: List[tuple[str, dict]] = []
+        self.pinned: set = set()
+        self.order = ORDERED
+        self.ungrouped = False
+
+    def fork(self, source: str) -> "Pipeline":
+        forked = Pipeline(self.query, source)
+        forked.pinned = set(self.pinned)
+        forked.order = self.order
+        forked.ungrouped = self.ungrouped
+        return forked
+
+    def branch(self) -> "Pipeline":
+        """A fresh pipeline from the same source, e.g. one more read of an assigned variable."""
+        return self.fork(self.source)
+
+    @property
+    def single_series(self) -> bool:
+        return all(tag in self.pinned for tag in SERIES_TAGS)
+
+    def then(self, fn: str, /, **kwargs) -> "Pipeline":
+        self.stages.append((fn, kwargs))
+        return self
+
+    def where(self, **predicates) -> "Pipeline":
+        """Equality filter; a list/tuple/set value means any of them, ``None`` is skipped.
+
+        Merged into the previous stage when that is a filter too.
+        """
+        predicates = {identifier(key): value for key, value in predicates.items() if value is not None}
+        if not predicates:
+            return self
+        for key, value in predicates.items():
+            if not isinstance(value, (list, tuple, set, frozenset)) or len(value) == 1:
+                self.pinned.add(key)
+        if self.stages and self.stages[-1][0] == "filter":
+            self.stages[-1][1].update(predicates)
+        else:
+            self.stages.append(("filter", predicates))
+        return self
+
+    def keep(self, *columns: str) -> "Pipeline":
+        if set(columns) <= VALUE_COLUMNS:
+            # No group-key column survives: every table is concatenated into one.
+            self.order = MERGED if self.order == ORDERED else self.order
+            self.ungrouped = True
+        return self.then("keep", columns=list(columns))
+
+    def group(self, *columns: str) -> "Pipeline":
+        if not columns and self.ungrouped:
+            return self
+        self.order = MERGED if self.order == ORDERED else self.order
+        self.ungrouped = not columns
+        return self.then("group", columns=list(columns)) if columns else self.then("group")
+
+    def pivot(self, column_key: str, row_key: str = "_time", value_column: str = "_value") -> "Pipeline":
+        self.order = UNORDERED
+        return self.then("pivot", rowKey=[row_key], columnKey=[column_key], valueColumn=value_column)
+
+    def aggregate_window(self, every: timedelta, fn: str, **kwargs) -> "Pipeline":
+        # Windows come out in time order per table, like the rows they replace.
+        return self.then("aggregateWindow", every=every, fn=Raw(identifier(fn)), createEmpty=False, **kwargs)
+
+    def sort_by_time(self) -> "Pipeline":
+        """``sort`` on ``_time``, unless the stream is one table already in time order."""
+        if self.order == ORDERED or (self.order == MERGED and self.single_series):
+            return self
+        self.order = ORDERED
+        return self.then("sort", columns=["_time"])
+
+    def tail(self, n: int) -> "Pipeline":
+        """The last ``n`` points in time order (instead of sort desc |> limit |> sort)."""
+        return self.sort_by_time().then("tail", n=n)
+
+    def yield_(self, name: str) -> "Pipeline":
+        return self.then("yield", name=name)
+
+    # -- rendering ------------------------------------------------------------
+
+    def _filter(self, predicates: dict) -> str:
+        keys = [key for key in FILTER_ORDER if key in predicates]
+        keys += [key for key in predicates if key not in FILTER_ORDER]
+        terms = []
+        for key in keys:
+            value = predicates[key]
+            if isinstance(value, (list, tuple, set, frozenset)):
+                values = sorted(value, key=str) if isinstance(value, (set, frozenset)) else value
+                alternatives = [f"r.{key} == {self.query.param(str(item))}" for item in values]
+                terms.append(alternatives[0] if len(alternatives) == 1 else f"({' or '.join(alternatives)})")
+            else:
+                terms.append(f"r.{key} == {self.query.param(str(value))}")
+        return f"filter(fn: (r) => {' and '.join(terms)})"
+
+    def render(self, inline: bool = False) -> str:
+        stages = [self._filter(args) if fn == "filter" else self.query.call(fn, **args) for fn, args in self.stages]
+        separator = " |> " if inline else "\n  |> "
+        return separator.join([self.source, *stages])
+
+
+def series_tags(session_id, quantity, sensor_id=None, motor_group_id=None) -> Dict[str, object]:
+    """``where`` keyword arguments selecting one quantity of a session (every sensor unless ``sensor_id``).
+
+    ``motor_group_id`` is only safe to pin for a session that never changed groups.
+    """
+    return {"quantity": quantity, "session_id": session_id, "sensor_id": sensor_id or None, "motor_group_id": motor_group_id}
+
@@ -1,29 +1,122 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable, List, Optional
+import asyncio
+import math
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
 
 from django.conf import settings
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+
+from .flux import FluxQuery, delete_predicate, series_tags
+from .slow_queries import atimed, logged_query, timed
+
+# influxdb_client (and its urllib3/reactivex/dateutil tree) is imported on
+# first use, so CRUD pages and management commands don't pay for it at boot.
+if TYPE_CHECKING:
+    from influxdb_client import InfluxDBClient
+
+
+# Rollup tier name -> aggregation window. Each tier lives in its own bucket
+# (INFLUX_SETTINGS["rollup_buckets"]) with min/max/mean fields per window.
+ROLLUP_TIERS: Dict[str, timedelta] = {
+    "1s": timedelta(seconds=1),
+    "1m": timedelta(minutes=1),
+}
+ROLLUP_FIELDS = ("mean", "min", "max")
+# Percentiles reported by query_distribution.
+DISTRIBUTION_PERCENTILES = (1, 50, 95, 99)
+
+# Async clients are bound to the event loop that created their aiohttp session,
+# so one pooled client is kept per loop and per connection target.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+# Columns of a Flux record that are not tags.
+_RECORD_COLUMNS = frozenset({"result", "table", "_start", "_stop", "_time", "_value", "_field", "_measurement"})
+
+
+class _Borrowed:
+    """``with`` support for the repository's shared client, which must stay open."""
+
+    def __init__(self, client) -> None:
+        self.client = client
+
+    def __enter__(self):
+        return self.client
+
+    def __exit__(self, *exc):
+        return False
 
 
 class InfluxRepository:
-    def __init__(self, url: str, token: str, org: str, bucket: str, measurement: str = "readings") -> None:
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        org: str,
+        bucket: str,
+        measurement: str = "readings",
+        rollup_buckets: Optional[Dict[str, str]] = None,
+        async_pool_size: int = 200,
+        query_params: bool = False,
+        pool_size: int = 20,
+    ) -> None:
         self.url = url
         self.token = token
         self.org = org
         self.bucket = bucket
         self.measurement = measurement
+        self.rollup_buckets = {tier: name for tier, name in (rollup_buckets or {}).items() if tier in ROLLUP_TIERS and name}
+        self.async_pool_size = async_pool_size
+        # Send data values as Flux query parameters (InfluxDB Cloud only), see telemetry/flux.py.
+        self.query_params = query_params
+        self.pool_size = pool_size
+        self._sync_client: Optional["InfluxDBClient"] = None
+        self._sync_client_lock = threading.Lock()
+
+    def _client(self) -> _Borrowed:
+        """The repository's one pooled ``InfluxDBClient`` (thread-safe), for ``with self._client() as client``."""
+        if self._sync_client is None:
+            from influxdb_client import InfluxDBClient
+
+            with self._sync_client_lock:
+                if self._sync_client is None:
+                    self._sync_client = InfluxDBClient(
+                        url=self.url, token=self.token, org=self.org, connection_pool_maxsize=self.pool_size
+                    )
+        return _Borrowed(self._sync_client)
 
-    def _client(self) -> InfluxDBClient:
-        return InfluxDBClient(url=self.url, token=self.token, org=self.org)
+    def close(self) -> None:
+        with self._sync_client_lock:
+            client, self._sync_client = self._sync_client, None
+        if client is not None:
+            client.close()
+
+    def _async_client(self):
+        """Pooled ``InfluxDBClientAsync`` for the running event loop (needs ``influxdb-client[async]``)."""
+        from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+
+        clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+        key = (self.url, self.token, self.org)
+        client = clients.get(key)
+        if client is None:
+            client = InfluxDBClientAsync(
+                url=self.url,
+                token=self.token,
+                org=self.org,
+                connection_pool_maxsize=self.async_pool_size,
+            )
+            clients[key] = client
+        return client
 
     def write_points(self, session, points: Iterable[dict]) -> None:
         """Write list of points to InfluxDB.
 
         Each point should have keys: ts (datetime or ISO string), value (float), sensor_id, quantity.
         """
+        from influxdb_client import Point
+        from influxdb_client.client.write_api import SYNCHRONOUS
+
         influx_points = []
         for p in points:
             ts = p.get("ts")
@@ -52,49 +145,511 @@ class InfluxRepository:
             write_api = client.write_api(write_options=SYNCHRONOUS)
             write_api.write(bucket=self.bucket, org=self.org, record=influx_points)
 
-    def query_series(self, session_id: int, quantity: str, from_dt: Optional[datetime] = None, to_dt: Optional[datetime] = None) -> List[dict]:
-        start_expr = f'time(v: "{from_dt.isoformat()}")' if from_dt else "0"
-        stop_expr = f'time(v: "{to_dt.isoformat()}")' if to_dt else "now()"
-        flux = f"""
-from(bucket: \"{self.bucket}\")
-  |> range(start: {start_expr}, stop: {stop_expr})
-  |> filter(fn: (r) => r._measurement == \"{self.measurement}\")
-  |> filter(fn: (r) => r.quantity == \"{quantity}\" and r.session_id == \"{session_id}\")
-  |> keep(columns: [\"_time\", \"_value\"])
-  |> sort(columns: [\"_time\"])
-"""
+    def _flux(self) -> FluxQuery:
+        return FluxQuery(use_params=self.query_params)
+
+    def select_tier(
+        self,
+        resolution: Optional[timedelta] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+    ) -> Optional[str]:
+        """Pick the coarsest rolled-up tier whose window still meets ``resolution``.
+
+        ``None`` means the raw bucket. Without a resolution the raw bucket is
+        used unless its points have already expired, then the finest tier is.
+        """
+        usable = sorted(
+            (tier for tier in set(tiers) if tier in self.rollup_buckets),
+            key=ROLLUP_TIERS.__getitem__,
+            reverse=True,
+        )
+        if not usable:
+            return None
+        if resolution is not None:
+            for tier in usable:
+                if ROLLUP_TIERS[tier] <= resolution:
+                    return tier
+        return None if raw_available else usable[-1]
+
+    def _series_query(self, session_id, quantity, from_dt, to_dt, sensor_id, resolution, tier, motor_group_id=None):
+        """Points of one quantity from raw or ``tier``; the pipeline is left open for the final stage."""
+        query = self._flux()
+        bucket = self.bucket if tier is None else self.rollup_buckets[tier]
+        source = query.from_bucket(bucket, from_dt, to_dt).where(
+            _measurement=self.measurement, **series_tags(session_id, quantity, sensor_id, motor_group_id)
+        )
+        if tier is None:
+            if resolution is not None:
+                source.aggregate_window(resolution, "mean")
+            return query, source.keep("_time", "_value")
+
+        if resolution is not None and resolution > ROLLUP_TIERS[tier]:
+            data = query.assign("data", source)
+            source = query.union(
+                *(data.branch().where(_field=fn).aggregate_window(resolution, fn) for fn in ROLLUP_FIELDS)
+            )
+        return query, source.pivot("_field").keep("_time", "mean", "min", "max")
+
+    @staticmethod
+    def _query(query_api, query: FluxQuery):
+        """Run ``query``, logging it when slow (telemetry/slow_queries.py)."""
+        flux = query.render()
+        with timed(flux) as stats:
+            return stats.tables(query_api.query(flux, params=query.params or None))
+
+    def _run_series_query(self, query: FluxQuery, tier: Optional[str]) -> List[dict]:
         with self._client() as client:
-            tables = client.query_api().query(flux)
+            tables = self._query(client.query_api(), query)
+        return self._series_rows(tables, tier)
+
+    async def _arun_series_query(self, query: FluxQuery, tier: Optional[str]) -> List[dict]:
+        flux = query.render()
+        async with atimed(flux) as stats:
+            tables = stats.tables(await self._async_client().query_api().query(flux, params=query.params or None))
+        return self._series_rows(tables, tier)
+
+    @staticmethod
+    def _series_rows(tables, tier: Optional[str]) -> List[dict]:
         data = []
         for table in tables:
             for record in table.records:
-                data.append({"ts": record.get_time().isoformat(), "value": record.get_value()})
+                if tier is None:
+                    data.append({"ts": record.get_time().isoformat(), "value": record.get_value()})
+                else:
+                    data.append(
+                        {
+                            "ts": record.get_time().isoformat(),
+                            "value": record.values.get("mean"),
+                            "min": record.values.get("min"),
+                            "max": record.values.get("max"),
+                        }
+                    )
         return data
 
-    def query_last_points(self, session_id: int, quantity: str, limit: int = 200) -> List[dict]:
-        flux = f"""
-from(bucket: \"{self.bucket}\")
-  |> range(start: 0)
-  |> filter(fn: (r) => r._measurement == \"{self.measurement}\")
-  |> filter(fn: (r) => r.quantity == \"{quantity}\" and r.session_id == \"{session_id}\")
-  |> sort(columns: [\"_time\"], desc: true)
-  |> limit(n: {limit})
-  |> sort(columns: [\"_time\"])
-"""
+    @logged_query
+    def query_series(
+        self,
+        session_id: int,
+        quantity: str,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        sensor_id: Optional[int] = None,
+        resolution: Optional[timedelta] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+        motor_group_id: Optional[int] = None,
+    ) -> List[dict]:
+        """Return points of one quantity, optionally downsampled to ``resolution``.
+
+        Rolled-up tiers listed in ``tiers`` are used when they are coarse enough;
+        their points additionally carry the window ``min``/``max``. Pass
+        ``motor_group_id`` for a session that never changed groups: with a
+        ``sensor_id`` too, the result is one series and needs no ``sort``.
+        """
+        query, tier = self._range_query(
+            session_id, quantity, from_dt, to_dt, sensor_id, resolution, tiers, raw_available, motor_group_id
+        )
+        return self._run_series_query(query, tier)
+
+    @logged_query
+    async def aquery_series(
+        self,
+        session_id: int,
+        quantity: str,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        sensor_id: Optional[int] = None,
+        resolution: Optional[timedelta] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+        motor_group_id: Optional[int] = None,
+    ) -> List[dict]:
+        """Async counterpart of :meth:`query_series` for ASGI views."""
+        query, tier = self._range_query(
+            session_id, quantity, from_dt, to_dt, sensor_id, resolution, tiers, raw_available, motor_group_id
+        )
+        return await self._arun_series_query(query, tier)
+
+    def _range_query(self, session_id, quantity, from_dt, to_dt, sensor_id, resolution, tiers, raw_available, motor_group_id):
+        tier = self.select_tier(resolution, tiers, raw_available)
+        query, pipeline = self._series_query(session_id, quantity, from_dt, to_dt, sensor_id, resolution, tier, motor_group_id)
+        query.add(pipeline.sort_by_time())
+        return query, tier
+
+    def _last_points_query(self, session_id, quantity, limit, sensor_id, tiers, raw_available, motor_group_id):
+        tier = self.select_tier(None, tiers, raw_available)
+        query, pipeline = self._series_query(session_id, quantity, None, None, sensor_id, None, tier, motor_group_id)
+        query.add(pipeline.tail(limit))
+        return query, tier
+
+    @logged_query
+    def query_last_points(
+        self,
+        session_id: int,
+        quantity: str,
+        limit: int = 200,
+        sensor_id: Optional[int] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+        motor_group_id: Optional[int] = None,
+    ) -> List[dict]:
+        query, tier = self._last_points_query(session_id, quantity, limit, sensor_id, tiers, raw_available, motor_group_id)
+        return self._run_series_query(query, tier)
+
+    @logged_query
+    async def aquery_last_points(
+        self,
+        session_id: int,
+        quantity: str,
+        limit: int = 200,
+        sensor_id: Optional[int] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+        motor_group_id: Optional[int] = None,
+    ) -> List[dict]:
+        query, tier = self._last_points_query(session_id, quantity, limit, sensor_id, tiers, raw_available, motor_group_id)
+        return await self._arun_series_query(query, tier)
+
+    @logged_query
+    def query_raw_columns(
+        self, session_id: int, quantity: str, sensor_id: Optional[int] = None
+    ) -> tuple[List[datetime], List[float]]:
+        """Every raw point of one quantity as time and value columns, streamed (for the series cache).
+
+        Several sensors come back one after another, not interleaved; ``SeriesCache.store`` sorts them.
+        """
+        query = self._flux()
+        query.add(
+            query.from_bucket(self.bucket)
+            .where(_measurement=self.measurement, **series_tags(session_id, quantity, sensor_id))
+            .keep("_time", "_value")
+        )
+        flux = query.render()
+        times: List[datetime] = []
+        values: List[float] = []
+        with self._client() as client, timed(flux) as stats:
+            for record in client.query_api().query_stream(flux, params=query.params or None):
+                stats.add(record)
+                times.append(record.get_time())
+                values.append(record.get_value())
+        return times, values
+
+    # -- aligned series ------------------------------------------------------
+
+    @logged_query
+    def query_aligned(
+        self,
+        session_id: int,
+        quantities: List[str],
+        resolution: timedelta,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+    ) -> tuple[List[datetime], Dict[str, List[Optional[float]]]]:
+        """Several quantities averaged onto one ``resolution`` grid and pivoted into columns.
+
+        Sensors writing the same quantity are averaged together. Grid cells
+        where a quantity has no point are ``None``.
+        """
+        tier = self.select_tier(resolution, tiers, raw_available)
+        bucket = self.bucket if tier is None else self.rollup_buckets[tier]
+        field = "value" if tier is None else "mean"
+        query = self._flux()
+        query.add(
+            query.from_bucket(bucket, from_dt, to_dt)
+            .where(_measurement=self.measurement, _field=field, session_id=session_id, quantity=list(quantities))
+            .group("quantity")
+            .aggregate_window(resolution, "mean")
+            .group()
+            .pivot("quantity")
+            .sort_by_time()
+        )
         with self._client() as client:
-            tables = client.query_api().query(flux)
-        data = []
+            tables = self._query(client.query_api(), query)
+        times: List[datetime] = []
+        columns: Dict[str, List[Optional[float]]] = {quantity: [] for quantity in quantities}
         for table in tables:
             for record in table.records:
-                data.append({"ts": record.get_time().isoformat(), "value": record.get_value()})
-        return data
+                times.append(record.get_time())
+                for quantity in quantities:
+                    columns[quantity].append(record.values.get(quantity))
+        return times, columns
 
+    # -- motor group summaries -----------------------------------------------
 
-def get_influx_repo() -> InfluxRepository:
-    cfg = getattr(settings, "INFLUX_SETTINGS", {})
+    @logged_query
+    def query_group_summary(
+        self, motor_group_id: int, quantities: List[str], expired_session_ids: Iterable[int] = ()
+    ) -> Dict[str, dict]:
+        """Per-session first/last timestamp and maximum of each of ``quantities``, in one query.
+
+        Grouped by the ``session_id``/``quantity`` tags that ``write_points``
+        writes next to ``motor_group_id``. Sessions whose raw points expired
+        are read from the coarsest rollup tier's ``max`` field instead.
+        """
+        query = self._flux()
+        raw = query.from_bucket(self.bucket).where(
+            _measurement=self.measurement, _field="value", motor_group_id=motor_group_id
+        )
+        expired = [str(session_id) for session_id in expired_session_ids]
+        tier = max(self.rollup_buckets, key=ROLLUP_TIERS.__getitem__, default=None)
+        if expired and tier is not None:
+            rolled = query.from_bucket(self.rollup_buckets[tier]).where(
+                _measurement=self.measurement, _field="max", motor_group_id=motor_group_id, session_id=expired
+            )
+            raw = query.union(raw, rolled)
+        data = query.assign("data", raw)
+        query.add(
+            data.branch()
+            .where(quantity=list(quantities))
+            .group("session_id", "quantity")
+            .then("max")
+            .keep("session_id", "quantity", "_value")
+            .yield_("max")
+        )
+        bounds = query.assign("bounds", data.branch().keep("session_id", "_time").group("session_id"))
+        query.add(bounds.branch().then("min", column="_time").yield_("first"))
+        query.add(bounds.branch().then("max", column="_time").yield_("last"))
+        with self._client() as client:
+            tables = self._query(client.query_api(), query)
+        summary: Dict[str, dict] = {}
+        for table in tables:
+            for record in table.records:
+                row = summary.setdefault(record.values["session_id"], {})
+                if record.values.get("result") == "max":
+                    row[record.values["quantity"]] = record.get_value()
+                else:
+                    row[record.values["result"]] = record.get_time()
+        return summary
+
+    # -- distributions -------------------------------------------------------
+
+    @logged_query
+    def query_distribution(
+        self,
+        session_id: int,
+        quantity: str,
+        bins: int = 20,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        sensor_id: Optional[int] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+    ) -> dict:
+        """Histogram with ``bins`` equal-width bins and p1/p50/p95/p99 of one quantity.
+
+        Both are computed by InfluxDB (``quantile`` with t-digest estimation and
+        ``histogram``), so only a few dozen numbers cross the wire. Once raw
+        points have expired the finest rollup's window means are used instead.
+        """
+        tier = self.select_tier(None, tiers, raw_available)
+        bucket = self.bucket if tier is None else self.rollup_buckets[tier]
+        field = "value" if tier is None else "mean"
+
+        def distribution_query():
+            query = self._flux()
+            data = query.assign(
+                "data",
+                query.from_bucket(bucket, from_dt, to_dt)
+                .where(_measurement=self.measurement, _field=field, **series_tags(session_id, quantity, sensor_id))
+                .group(),
+            )
+            return query, data
+
+        stats, data = distribution_query()
+        stats.add(data.branch().then("count").yield_("count"))
+        stats.add(data.branch().then("min").yield_("min"))
+        stats.add(data.branch().then("max").yield_("max"))
+        for p in DISTRIBUTION_PERCENTILES:
+            stats.add(data.branch().then("quantile", q=p / 100, method="estimate_tdigest").yield_(f"p{p}"))
+
+        with self._client() as client:
+            query_api = client.query_api()
+            results = {
+                record.values.get("result"): record.get_value()
+                for table in self._query(query_api, stats)
+                for record in table.records
+            }
+            result = {
+                "source": tier or "raw",
+                "count": int(results.get("count") or 0),
+                "min": results.get("min"),
+                "max": results.get("max"),
+                "percentiles": {f"p{p}": results.get(f"p{p}") for p in DISTRIBUTION_PERCENTILES},
+                "bins": [],
+            }
+            if not result["count"]:
+                return result
+
+            edges = self._bin_edges(result["min"], result["max"], bins)
+            histogram, data = distribution_query()
+            histogram.add(data.branch().then("histogram", bins=[float(edge) for edge in edges] + [math.inf]))
+            cumulative = sorted(
+                (record.values.get("le"), record.get_value())
+                for table in self._query(query_api, histogram)
+                for record in table.records
+            )
+        counts = self._histogram_counts([count for _, count in cumulative])
+        result["bins"] = [
+            {"from": lo, "to": hi, "count": count} for lo, hi, count in zip(edges, edges[1:], counts)
+        ]
+        return result
+
+    @staticmethod
+    def _bin_edges(low: float, high: float, bins: int) -> List[float]:
+        if high <= low:
+            return [low, low]
+        width = (high - low) / bins
+        return [low + width * i for i in range(bins)] + [high]
+
+    @staticmethod
+    def _histogram_counts(cumulative: List[float]) -> List[int]:
+        """Per-bin counts from Flux's cumulative ``histogram`` output.
+
+        ``cumulative`` holds counts for every edge in ascending order plus a
+        trailing +Inf bucket; points on the lowest edge go to the first bin and
+        anything past the last edge (float rounding) to the last one.
+        """
+        counts = [int(cumulative[i + 1] - cumulative[i]) for i in range(len(cumulative) - 2)]
+        counts[0] += int(cumulative[0])
+        counts[-1] += int(cumulative[-1] - cumulative[-2])
+        return counts
+
+    # -- rollups -------------------------------------------------------------
+
+    def ensure_rollup_buckets(self) -> None:
+        with self._client() as client:
+            buckets_api = client.buckets_api()
+            for name in self.rollup_buckets.values():
+                if buckets_api.find_bucket_by_name(name) is None:
+                    buckets_api.create_bucket(bucket_name=name, org=self.org, description="Telemetry rollups")
+
+    @logged_query
+    def rollup_session(self, session_id: int, tier: str) -> None:
+        """Write min/max/mean per ``tier`` window of a session's raw points into the tier bucket.
+
+        Re-running is idempotent: windows are keyed by their start time and
+        overwrite the previous values.
+        """
+        target = self.rollup_buckets[tier]
+        query = self._flux()
+        data = query.assign(
+            "data",
+            query.from_bucket(self.bucket).where(_measurement=self.measurement, _field="value", session_id=session_id),
+        )
+        for fn in ROLLUP_FIELDS:
+            query.add(
+                data.branch()
+                .aggregate_window(ROLLUP_TIERS[tier], fn, timeSrc="_start")
+                .then("set", key="_field", value=fn)
+                .then("to", bucket=target, org=self.org)
+                .yield_(fn)
+            )
+        with self._client() as client:
+            self._query(client.query_api(), query)
+
+    # -- deletion ------------------------------------------------------------
+
+    def all_buckets(self) -> List[str]:
+        return [self.bucket, *self.rollup_buckets.values()]
+
+    @logged_query
+    def tag_values(self, tag: str, bucket: Optional[str] = None) -> List[str]:
+        query = self._flux()
+        query.import_("influxdata/influxdb/schema")
+        query.add(query.expression("schema.tagValues", bucket=bucket or self.bucket, tag=tag, start=0))
+        with self._client() as client:
+            tables = self._query(client.query_api(), query)
+        return [record.get_value() for table in tables for record in table.records]
+
+    @logged_query
+    def data_bounds(self, tag: str, value, bucket: Optional[str] = None) -> Optional[tuple[datetime, datetime]]:
+        """Earliest and latest timestamp of points tagged ``tag == value`` in ``bucket``."""
+        query = self._flux()
+        data = query.assign(
+            "data",
+            query.from_bucket(bucket or self.bucket).where(_measurement=self.measurement, **{tag: value}).keep("_time").group(),
+        )
+        query.add(data.branch().then("min", column="_time").yield_("first"))
+        query.add(data.branch().then("max", column="_time").yield_("last"))
+        with self._client() as client:
+            tables = self._query(client.query_api(), query)
+        times = [record.get_time() for table in tables for record in table.records]
+        if not times:
+            return None
+        return min(times), max(times)
+
+    def delete_range(self, tag: str, value, start: datetime, stop: datetime, bucket: Optional[str] = None) -> None:
+        with self._client() as client:
+            client.delete_api().delete(
+                start=start,
+                stop=stop,
+                predicate=delete_predicate(self.measurement, **{tag: value}),
+                bucket=bucket or self.bucket,
+                org=self.org,
+            )
+
+    def expire_raw(self, session_id: int) -> None:
+        """Delete a session's raw points once its rollups are in place."""
+        self.delete_range(
+            "session_id", session_id, datetime(1970, 1, 1, tzinfo=timezone.utc), datetime.now(timezone.utc)
+        )
+
+
+    # -- moving sessions between shards -------------------------------------
+
+    def export_points(self, session_id: int, bucket: Optional[str] = None) -> Iterator[dict]:
+        """Every point of a session in ``bucket`` as ``{"time", "field", "value", "tags"}``, streamed."""
+        query = self._flux()
+        query.add(query.from_bucket(bucket or self.bucket).where(_measurement=self.measurement, session_id=session_id))
+        flux = query.render()
+        with self._client() as client, timed(flux) as stats:
+            for record in client.query_api().query_stream(flux, params=query.params or None):
+                stats.add(record)
+                yield {
+                    "time": record.get_time(),
+                    "field": record.get_field(),
+                    "value": record.get_value(),
+                    "tags": {key: value for key, value in record.values.items() if key not in _RECORD_COLUMNS},
+                }
+
+    def write_records(self, bucket: str, records: Iterable[dict]) -> None:
+        """Write points in the :meth:`export_points` format to ``bucket`` unchanged."""
+        from influxdb_client import Point
+        from influxdb_client.client.write_api import SYNCHRONOUS
+
+        influx_points = []
+        for record in records:
+            point = Point(self.measurement).field(record["field"], record["value"]).time(record["time"])
+            for key, value in record["tags"].items():
+                point.tag(key, value)
+            influx_points.append(point)
+        if not influx_points:
+            return
+        with self._client() as client:
+            client.write_api(write_options=SYNCHRONOUS).write(bucket=bucket, org=self.org, record=influx_points)
+
+
+def build_influx_repo(cfg: dict) -> InfluxRepository:
+    """A repository for one shard's settings (INFLUX_SETTINGS and the INFLUX_SHARDS entries)."""
     return InfluxRepository(
         url=cfg.get("url", "http://localhost:8086"),
         token=cfg.get("token", ""),
         org=cfg.get("org", ""),
         bucket=cfg.get("bucket", ""),
+        rollup_buckets=cfg.get("rollup_buckets"),
+        async_pool_size=cfg.get("async_pool_size", 200),
+        query_params=cfg.get("query_params", False),
+        pool_size=cfg.get("pool_size", 20),
     )
+
+
+def get_influx_repo(session=None, shard: Optional[str] = None) -> InfluxRepository:
+    """Repository of the shard holding ``session``'s points, or of ``shard``; the default shard without either."""
+    from .shards import DEFAULT_SHARD, session_shard, shard_repo
+
+    if session is not None:
+        shard = session_shard(session)
+    return shard_repo(shard or DEFAULT_SHARD)
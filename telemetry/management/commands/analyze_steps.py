@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Max, Q
+
+from telemetry.influx_repo import get_influx_repo
+from telemetry.models import CsvImport, Session
+from telemetry.services import analyze_session_steps
+
+
+class Command(BaseCommand):
+    help = "Найти ступени дросселя в сессиях и сохранить установившиеся mean/std величин по ступеням"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", type=int, help="Обработать только указанную сессию (принудительно)")
+        parser.add_argument("--resolution", type=float, default=1.0, help="Шаг сетки, с")
+        parser.add_argument("--tolerance", type=float, default=1.0, help="Допустимое колебание дросселя внутри ступени")
+        parser.add_argument("--min-duration", type=float, default=3.0, help="Минимальная длительность ступени, с")
+        parser.add_argument("--settle", type=float, default=1.0, help="Сколько секунд переходного процесса отбросить")
+
+    def handle(self, *args, **options):
+        if options["session"]:
+            sessions = Session.objects.filter(pk=options["session"])
+        else:
+            # Sessions imported since their last analysis, with no import still running.
+            sessions = (
+                Session.objects.annotate(
+                    last_import_at=Max("csv_imports__finished_at", filter=Q(csv_imports__status=CsvImport.STATUS_SUCCESS))
+                )
+                .filter(last_import_at__isnull=False)
+                .filter(Q(steps_analyzed_at__isnull=True) | Q(steps_analyzed_at__lt=F("last_import_at")))
+                .exclude(csv_imports__status=CsvImport.STATUS_PENDING)
+            )
+
+        params = {
+            "resolution": timedelta(seconds=options["resolution"]),
+            "tolerance": options["tolerance"],
+            "min_duration": options["min_duration"],
+            "settle": options["settle"],
+        }
+        for session in sessions:
+            steps = analyze_session_steps(session, get_influx_repo(session), **params)
+            self.stdout.write(f"Сессия {session.id}: ступеней {len(steps)}")
+        self.stdout.write(self.style.SUCCESS("Анализ ступеней завершён"))
@@ -0,0 +1,60 @@
+import io
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from telemetry.models import MotorGroup, Session
+from telemetry.services import QUANTITY_FIELDS, import_csv_to_session
+from telemetry.standin import StandInInfluxRepository
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Измерить пропускную способность импорта CSV при разном числе потоков записи в InfluxDB"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Строк в синтетическом CSV")
+        parser.add_argument("--writers", type=int, nargs="+", default=[0, 1, 2, 4, 8], help="Числа потоков записи")
+        parser.add_argument("--latency-ms", type=float, default=20.0, help="Задержка одной записи в заглушке, мс")
+        parser.add_argument("--point-us", type=float, default=2.0, help="Стоимость одной точки в заглушке, мкс")
+
+    def handle(self, *args, **options):
+        body = self._csv(options["rows"])
+        self.stdout.write(f"{'потоков':>8} {'время, с':>10} {'строк/с':>10} {'точек/с':>10}")
+        for writers in options["writers"]:
+            repo = StandInInfluxRepository(options["latency_ms"] / 1000, options["point_us"] / 1e6)
+            elapsed = self._run(body, repo, writers)
+            self.stdout.write(
+                f"{writers:>8} {elapsed:>10.2f} {options['rows'] / elapsed:>10.0f} {repo.points_written / elapsed:>10.0f}"
+            )
+
+    @staticmethod
+    def _csv(rows: int) -> str:
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        lines = ["ts," + ",".join(QUANTITY_FIELDS)]
+        for i in range(rows):
+            ts = (start + timedelta(milliseconds=100 * i)).isoformat()
+            lines.append(f"{ts},{i % 100},{20 + i % 7},{40 + i % 5},{1000 + i % 900},{60 + i % 11},{i % 50 / 10}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _run(body: str, repo, writers: int) -> float:
+        # Everything the import writes to PostgreSQL is rolled back afterwards.
+        try:
+            with transaction.atomic(), override_settings(CSV_IMPORT_WRITERS=writers):
+                session = Session.objects.create(motor_group=MotorGroup.objects.create(name="bench"), name="bench")
+                started = time.perf_counter()
+                csv_import = import_csv_to_session(session, io.StringIO(body), repo=repo)
+                elapsed = time.perf_counter() - started
+                if csv_import.status != csv_import.STATUS_SUCCESS:
+                    raise RuntimeError(csv_import.error_message)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return elapsed
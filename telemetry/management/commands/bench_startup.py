@@ -0,0 +1,83 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter for every sample, so nothing is cached between runs.
+PROBE = r"""
+import json, os, sys, time
+params = json.loads(os.environ["TELEMETRY_BENCH"])
+started = time.perf_counter()
+import django
+django.setup()
+result = {"setup": time.perf_counter() - started}
+mark = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+result["urls"] = time.perf_counter() - mark
+result["loaded"] = [m for m in ("influxdb_client", "numpy") if m in sys.modules]
+if params["warmup"]:
+    from telemetry.warmup import warmup
+    mark = time.perf_counter()
+    warmup()
+    result["warmup"] = time.perf_counter() - mark
+from django.test import Client
+client = Client(HTTP_HOST=params["host"])
+if params["user"]:
+    from django.contrib.auth import get_user_model
+    client.force_login(get_user_model().objects.get(username=params["user"]))
+for url in params["urls"]:
+    mark = time.perf_counter()
+    status = client.get(url).status_code
+    result[f"first {url} [{status}]"] = time.perf_counter() - mark
+print(json.dumps(result))
+"""
+
+
+class Command(BaseCommand):
+    help = "Измерить время запуска процесса (django.setup, URLconf) и задержку первого запроса"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Сколько раз запускать новый процесс")
+        parser.add_argument(
+            "--url",
+            action="append",
+            dest="urls",
+            help="URL первого запроса (можно несколько), по умолчанию /api/quantities/",
+        )
+        parser.add_argument("--user", help="Имя пользователя для входа перед запросами")
+        parser.add_argument("--warmup", action="store_true", help="Вызвать telemetry.warmup перед первым запросом")
+
+    def handle(self, *args, **options):
+        params = {
+            "urls": options["urls"] or ["/api/quantities/"],
+            "user": options["user"],
+            "warmup": options["warmup"],
+            "host": next((h for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost").lstrip("."),
+        }
+        env = {
+            **os.environ,
+            "TELEMETRY_BENCH": json.dumps(params),
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "stendinfsys.settings"),
+        }
+        samples: dict[str, list[float]] = {}
+        loaded: list[str] = []
+        for _ in range(options["runs"]):
+            proc = subprocess.run(
+                [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, cwd=settings.BASE_DIR
+            )
+            if proc.returncode != 0:
+                raise CommandError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "probe failed")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            loaded = result.pop("loaded")
+            for key, seconds in result.items():
+                samples.setdefault(key, []).append(seconds * 1000)
+
+        self.stdout.write(f"{'этап':<48} {'мин, мс':>10} {'медиана, мс':>12}")
+        for key, values in samples.items():
+            self.stdout.write(f"{key:<48} {min(values):>10.1f} {statistics.median(values):>12.1f}")
+        self.stdout.write(f"Загружено при старте: {', '.join(loaded) or 'ни influxdb_client, ни numpy'}")
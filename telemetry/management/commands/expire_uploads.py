@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from telemetry.resumable import expire_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Пометить неудачными возобновляемые загрузки CSV, по которым давно не было блоков"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=24, help="Сколько часов ждать следующий блок")
+
+    def handle(self, *args, **options):
+        expired = expire_stale_uploads(timezone.now() - timedelta(hours=options["hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Закрыто загрузок: {expired}"))
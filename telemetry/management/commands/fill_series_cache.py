@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from telemetry.caching import annotate_data_version
+from telemetry.models import Session
+from telemetry.series_cache import fill_session, get_series_cache
+
+
+class Command(BaseCommand):
+    help = "Заполнить локальный кэш сырых рядов (mmap) для завершённых сессий после импорта"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", type=int, help="Обработать только указанную сессию")
+
+    def handle(self, *args, **options):
+        cache = get_series_cache()
+        if not cache.enabled:
+            self.stdout.write("Кэш рядов отключён (SERIES_CACHE_MAX_BYTES=0)")
+            return
+        sessions = annotate_data_version(
+            Session.objects.filter(ended_at__isnull=False, raw_expired_at__isnull=True)
+        ).filter(last_import_id__isnull=False)
+        if options["session"]:
+            sessions = sessions.filter(pk=options["session"])
+
+        for session in sessions:
+            points = fill_session(session, cache)
+            if points is not None:
+                self.stdout.write(f"Сессия {session.id}: в кэше {points} точек")
+        self.stdout.write(self.style.SUCCESS(f"Кэш рядов: {cache.usage()} байт из {cache.max_bytes}"))
@@ -2,7 +2,7 @@ from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 
-from telemetry.models import Session
+from telemetry.models import ImportProfile, Session
 from telemetry.services import import_csv_to_session
 
 
@@ -10,8 +10,9 @@ class Command(BaseCommand):
     help = "Импорт CSV показаний в указанную сессию"
 
     def add_arguments(self, parser):
-        parser.add_argument("csv_path", type=str, help="Путь до CSV файла")
+        parser.add_argument("csv_path", type=str, help="Путь до CSV файла (.csv, .csv.gz, .csv.zst)")
         parser.add_argument("--session", type=int, required=True, help="ID сессии")
+        parser.add_argument("--profile", type=str, help="Название профиля импорта (сопоставление колонок с каналами)")
 
     def handle(self, *args, **options):
         session_id = options["session"]
@@ -22,13 +23,21 @@ class Command(BaseCommand):
             session = Session.objects.get(pk=session_id)
         except Session.DoesNotExist as exc:
             raise CommandError(f"Сессия {session_id} не найдена") from exc
+        profile = None
+        if options["profile"]:
+            try:
+                profile = ImportProfile.objects.get(name=options["profile"])
+            except ImportProfile.DoesNotExist as exc:
+                raise CommandError(f"Профиль импорта {options['profile']} не найден") from exc
 
-        with csv_path.open("r", encoding="utf-8") as f:
-            csv_import = import_csv_to_session(session, f, file_name=csv_path.name)
+        # Binary mode: .csv.gz / .csv.zst are decompressed on the fly by the importer.
+        with csv_path.open("rb") as f:
+            csv_import = import_csv_to_session(session, f, file_name=csv_path.name, profile=profile)
 
         if csv_import.status == csv_import.STATUS_SUCCESS:
             self.stdout.write(self.style.SUCCESS(
-                f"Импорт завершен: {csv_import.rows_processed} строк, ошибок {csv_import.rows_failed}"
+                f"Импорт завершен: {csv_import.rows_processed} строк, ошибок {csv_import.rows_failed}, "
+                f"дубликатов {csv_import.rows_duplicate}, не по порядку {csv_import.rows_reordered}"
             ))
         else:
             self.stdout.write(self.style.ERROR(
@@ -0,0 +1,263 @@
+import http.cookiejar
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.test.utils import override_settings
+
+from telemetry.services import QUANTITY_FIELDS
+
+ACTIONS = ("list", "detail", "series", "upload")
+DEFAULT_MIX = "list=3,detail=3,series=10,upload=1"
+
+
+def parse_mix(value: str) -> dict:
+    """``list=3,series=10`` -> weights per action; unknown actions and negative weights are errors."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise ValueError(f"неизвестное действие: {name}")
+        mix[name] = float(weight or 1)
+        if mix[name] < 0:
+            raise ValueError(f"отрицательный вес: {name}")
+    if not any(mix.values()):
+        raise ValueError("все веса нулевые")
+    return mix
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * q / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, status: int) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if status == 429:
+                self.throttled[endpoint] += 1
+            if not 200 <= status < 400:
+                self.errors[endpoint] += 1
+
+
+class VirtualUser:
+    """One engineer: own cookie jar and login, picks actions by weight until the deadline."""
+
+    def __init__(self, command, base_url: str, stats: Stats, rng: random.Random) -> None:
+        self.command = command
+        self.base_url = base_url
+        self.stats = stats
+        self.rng = rng
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self.upload_session = None
+
+    def request(self, endpoint: str, path: str, data: bytes = None, headers: dict = None, method: str = None):
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {}, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.command.timeout) as resp:
+                body, status = resp.read(), resp.status
+        except urllib.error.HTTPError as exc:
+            body, status = exc.read(), exc.code
+        except (urllib.error.URLError, OSError):
+            body, status = b"", 0
+        if endpoint:
+            self.stats.record(endpoint, time.perf_counter() - started, status)
+        return status, body
+
+    def _csrf(self) -> str:
+        return next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+
+    def api(self, method: str, path: str, payload: dict) -> dict:
+        status, body = self.request(
+            None,
+            path,
+            json.dumps(payload).encode(),
+            {"Content-Type": "application/json", "X-CSRFToken": self._csrf(), "Referer": self.base_url},
+            method,
+        )
+        if status >= 400:
+            raise CommandError(f"{method} {path}: {status} {body[:200]!r}")
+        return json.loads(body) if body else {}
+
+    def login(self, username: str, password: str) -> None:
+        self.request(None, "/accounts/login/")
+        form = urllib.parse.urlencode(
+            {"username": username, "password": password, "csrfmiddlewaretoken": self._csrf()}
+        ).encode()
+        status, _ = self.request(None, "/accounts/login/", form, {"Referer": self.base_url + "/accounts/login/"})
+        if not any(c.name == "sessionid" for c in self.cookies):
+            raise CommandError(f"Не удалось войти как {username} (код {status})")
+
+    def run(self, deadline: float, actions: list, weights: list) -> None:
+        while time.monotonic() < deadline:
+            getattr(self, f"do_{self.rng.choices(actions, weights)[0]}")()
+
+    def do_list(self) -> None:
+        self.request("GET /sessions/", "/sessions/")
+
+    def do_detail(self) -> None:
+        self.request("GET /sessions/<id>/", f"/sessions/{self.rng.choice(self.command.session_ids)}/")
+
+    def do_series(self) -> None:
+        # The detail page loads every quantity's chart at once.
+        session_id = self.rng.choice(self.command.session_ids)
+        for quantity in self.command.quantities:
+            self.request(f"GET series {quantity}", f"/api/sessions/{session_id}/series/?quantity={quantity}")
+
+    def do_upload(self) -> None:
+        if self.upload_session is None:
+            self.upload_session = self.command.create_upload_session(self)
+        self.request(
+            "POST import-csv",
+            f"/api/sessions/{self.upload_session}/import-csv/?file_name=loadtest.csv",
+            self.command.csv_body(self.rng),
+            {"Content-Type": "text/csv", "X-CSRFToken": self._csrf(), "Referer": self.base_url},
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест по HTTP: виртуальные пользователи входят в систему и открывают список сессий, "
+        "страницу сессии, ряды всех величин и загружают CSV; выводит пропускную способность, "
+        "перцентили задержки и долю ошибок по каждому эндпоинту"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Адрес запущенного сервера; без него поднимается локальный с заглушкой InfluxDB")
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--concurrency", type=int, default=10, help="Число одновременных пользователей")
+        parser.add_argument("--duration", type=float, default=30.0, help="Длительность, с")
+        parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Веса действий (по умолчанию {DEFAULT_MIX})")
+        parser.add_argument("--sessions", type=int, default=20, help="Из скольких последних сессий выбирать")
+        parser.add_argument("--upload-rows", type=int, default=2000, help="Строк в одном загружаемом CSV")
+        parser.add_argument("--timeout", type=float, default=60.0, help="Таймаут одного запроса, с")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as exc:
+            raise CommandError(f"--mix: {exc}")
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency должно быть не меньше 1")
+        self.timeout = options["timeout"]
+        self.upload_rows = options["upload_rows"]
+        self._upload_sessions = []
+        self._upload_lock = threading.Lock()
+        self._group_id = None
+
+        server = None
+        base_url = (options["url"] or "").rstrip("/")
+        # The series cache stays off: stand-in points must not end up in SERIES_CACHE_DIR.
+        standin = override_settings(
+            INFLUX_SETTINGS={**settings.INFLUX_SETTINGS, "standin": True}, SERIES_CACHE_MAX_BYTES=0
+        )
+        if not base_url:
+            standin.enable()
+            server = ThreadedWSGIServer(("127.0.0.1", 0), _QuietHandler)
+            server.set_app(get_internal_wsgi_application())
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f"http://127.0.0.1:{server.server_port}"
+            self.stdout.write(f"Локальный сервер {base_url}, InfluxDB — заглушка в памяти")
+
+        rng = random.Random(options["seed"])
+        stats = Stats()
+        users = [VirtualUser(self, base_url, stats, random.Random(rng.random())) for _ in range(options["concurrency"])]
+        try:
+            for user in users:
+                user.login(options["username"], options["password"])
+            self._discover(users[0], options["sessions"], mix)
+            actions = [name for name in ACTIONS if mix.get(name)]
+            weights = [mix[name] for name in actions]
+            started = time.monotonic()
+            deadline = started + options["duration"]
+            threads = [threading.Thread(target=user.run, args=(deadline, actions, weights)) for user in users]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self._report(stats, time.monotonic() - started)
+        finally:
+            self._cleanup(users[0])
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                standin.disable()
+
+    def _discover(self, user: VirtualUser, limit: int, mix: dict) -> None:
+        _, body = user.request(None, f"/api/sessions/?page_size={limit}")
+        self.session_ids = [row["id"] for row in json.loads(body or b"{}").get("results", [])]
+        _, body = user.request(None, "/api/quantities/?page_size=100")
+        data = json.loads(body or b"[]")
+        self.quantities = [row["key"] for row in (data["results"] if isinstance(data, dict) else data)]
+        if not self.session_ids and (mix.get("detail") or mix.get("series")):
+            raise CommandError("Нет сессий для страниц и рядов: создайте сессию или уберите detail/series из --mix")
+
+    def create_upload_session(self, user: VirtualUser) -> int:
+        """A throwaway session per uploading user, so uploads never land in real sessions."""
+        with self._upload_lock:
+            if self._group_id is None:
+                self._group_id = user.api("POST", "/api/motor-groups/", {"name": f"loadtest {datetime.now():%H:%M:%S}"})["id"]
+            session_id = user.api(
+                "POST", "/api/sessions/", {"motor_group": self._group_id, "name": f"loadtest {len(self._upload_sessions) + 1}"}
+            )["id"]
+            self._upload_sessions.append(session_id)
+            return session_id
+
+    def csv_body(self, rng: random.Random) -> bytes:
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(hours=rng.randrange(10_000))
+        lines = ["ts," + ",".join(QUANTITY_FIELDS)]
+        for i in range(self.upload_rows):
+            ts = (start + timedelta(milliseconds=100 * i)).isoformat()
+            lines.append(f"{ts},{i % 100},{20 + i % 7},{40 + i % 5},{1000 + i % 900},{60 + i % 11},{i % 50 / 10}")
+        return ("\n".join(lines) + "\n").encode()
+
+    def _cleanup(self, user: VirtualUser) -> None:
+        # Deleting the group removes its sessions and queues their InfluxDB cleanup.
+        if self._group_id is not None:
+            user.api("DELETE", f"/api/motor-groups/{self._group_id}/", {})
+
+    def _report(self, stats: Stats, elapsed: float) -> None:
+        header = f"{'эндпоинт':<28} {'запросов':>9} {'в с':>8} {'ошибок':>7} {'429':>5} {'p50, мс':>8} {'p95, мс':>8} {'p99, мс':>8} {'max, мс':>8}"
+        self.stdout.write(header)
+        total = errors = 0
+        for endpoint in sorted(stats.latencies):
+            latencies = sorted(stats.latencies[endpoint])
+            count = len(latencies)
+            total += count
+            errors += stats.errors[endpoint]
+            ms = [percentile(latencies, q) * 1000 for q in (50, 95, 99, 100)]
+            self.stdout.write(
+                f"{endpoint:<28} {count:>9} {count / elapsed:>8.1f} {stats.errors[endpoint] / count:>7.1%} "
+                f"{stats.throttled[endpoint]:>5} {ms[0]:>8.0f} {ms[1]:>8.0f} {ms[2]:>8.0f} {ms[3]:>8.0f}"
+            )
+        if total:
+            self.stdout.write(f"Итого: {total} запросов за {elapsed:.1f} с, {total / elapsed:.1f} в с, ошибок {errors / total:.1%}")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from telemetry.models import Session
+from telemetry.shards import MOVE_BATCH, move_session, session_shard, shard_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Перенести точки сессий в другой шард InfluxDB: скопировать сырые данные и агрегаты, "
+        "переключить сессию и поставить старую копию в очередь на удаление (process_influx_deletions)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", required=True, help="Имя целевого шарда (default или ключ INFLUX_SHARDS)")
+        parser.add_argument("--session", type=int, action="append", default=[], help="ID сессии; можно несколько раз")
+        parser.add_argument("--motor-group", help="Перенести все сессии группы моторов с этим именем")
+        parser.add_argument("--batch-size", type=int, default=MOVE_BATCH, help="Точек в одной записи в целевой шард")
+        parser.add_argument("--dry-run", action="store_true", help="Только показать, какие сессии будут перенесены")
+
+    def handle(self, *args, **options):
+        target = options["to"]
+        if target not in shard_settings():
+            raise CommandError(f"Неизвестный шард: {target}. Доступны: {', '.join(shard_settings())}")
+        if not options["session"] and not options["motor_group"]:
+            raise CommandError("Укажите --session или --motor-group")
+
+        sessions = Session.objects.select_related("motor_group").order_by("id")
+        if options["session"]:
+            sessions = sessions.filter(pk__in=options["session"])
+        if options["motor_group"]:
+            sessions = sessions.filter(motor_group__name=options["motor_group"])
+
+        moved = failed = 0
+        for session in sessions:
+            source = session_shard(session)
+            if source == target:
+                continue
+            if options["dry_run"]:
+                self.stdout.write(f"Сессия {session.id}: {source} -> {target}")
+                continue
+            try:
+                points = move_session(session, target, options["batch_size"])
+            except Exception as exc:  # noqa: BLE001 - one failed session must not stop the rest
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Сессия {session.id}: {exc}"))
+                continue
+            moved += 1
+            self.stdout.write(f"Сессия {session.id}: {source} -> {target}, точек {points}")
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Перенесено сессий: {moved}, с ошибкой: {failed}"))
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from telemetry.deletion import claim_next_job, run_deletion_job
+from telemetry.models import InfluxDeletionJob
+
+
+class Command(BaseCommand):
+    help = "Удалить из InfluxDB данные удалённых сессий и групп (очередь InfluxDeletionJob)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-hours", type=float, default=24, help="Ширина временного окна одного delete-запроса")
+        parser.add_argument("--loop", action="store_true", help="Работать постоянно, опрашивая очередь")
+        parser.add_argument("--interval", type=float, default=10, help="Пауза между опросами очереди в режиме --loop, с")
+        parser.add_argument("--retry-failed", action="store_true", help="Вернуть в очередь задания с ошибкой")
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            retried = InfluxDeletionJob.objects.filter(status=InfluxDeletionJob.STATUS_FAILED).update(
+                status=InfluxDeletionJob.STATUS_PENDING, error_message=""
+            )
+            self.stdout.write(f"Возвращено в очередь: {retried}")
+
+        batch = timedelta(hours=options["batch_hours"])
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+            self.stdout.write(f"{job}: выполняется")
+            run_deletion_job(job, batch=batch)
+            if job.status == InfluxDeletionJob.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f"{job}: удалено пакетов {job.batches_done}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{job}: {job.error_message}"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from telemetry.deletion import enqueue_orphan, find_orphans
+
+
+class Command(BaseCommand):
+    help = "Найти в InfluxDB серии без сессии/группы в PostgreSQL и поставить их в очередь на удаление"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Только показать найденные серии")
+
+    def handle(self, *args, **options):
+        orphans = find_orphans()
+        for tag, value in orphans:
+            if options["dry_run"]:
+                self.stdout.write(f"{tag}={value}")
+            else:
+                enqueue_orphan(tag, value)
+        verb = "Найдено" if options["dry_run"] else "Поставлено в очередь"
+        self.stdout.write(self.style.SUCCESS(f"{verb}: {len(orphans)}. Удаление выполняет process_influx_deletions"))
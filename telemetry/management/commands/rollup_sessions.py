@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from telemetry.influx_repo import get_influx_repo
+from telemetry.shards import all_shard_repos
+from telemetry.models import CsvImport, Session
+from telemetry.services import expire_session_raw_data, rollup_session_data
+
+
+class Command(BaseCommand):
+    help = "Построить агрегаты 1s/1m (min/max/mean) для завершённых сессий и удалить устаревшие сырые данные"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", type=int, help="Обработать только указанную сессию")
+        parser.add_argument(
+            "--min-age-minutes",
+            type=int,
+            default=60,
+            help="Сессия должна быть завершена не менее указанного времени назад",
+        )
+        parser.add_argument(
+            "--expire-raw",
+            action="store_true",
+            help="Удалить сырые точки сессий старше INFLUX_SETTINGS['raw_retention_days'], у которых есть агрегаты",
+        )
+        parser.add_argument("--ensure-buckets", action="store_true", help="Создать бакеты агрегатов, если их нет")
+
+    def handle(self, *args, **options):
+        if options["ensure_buckets"]:
+            for repo in all_shard_repos():
+                repo.ensure_rollup_buckets()
+
+        now = timezone.now()
+        sessions = Session.objects.filter(
+            ended_at__isnull=False,
+            ended_at__lte=now - timedelta(minutes=options["min_age_minutes"]),
+            csv_imports__status=CsvImport.STATUS_SUCCESS,
+        ).exclude(csv_imports__status=CsvImport.STATUS_PENDING)
+        if options["session"]:
+            sessions = sessions.filter(pk=options["session"])
+
+        rolled = 0
+        for session in sessions.distinct():
+            tiers = rollup_session_data(session, get_influx_repo(session))
+            if tiers:
+                rolled += 1
+                self.stdout.write(f"Сессия {session.id}: агрегаты {', '.join(tiers)}")
+        self.stdout.write(self.style.SUCCESS(f"Агрегаты обновлены для {rolled} сессий"))
+
+        retention_days = settings.INFLUX_SETTINGS.get("raw_retention_days", 0)
+        if not options["expire_raw"] or retention_days <= 0:
+            return
+        expired = 0
+        for session in sessions.filter(
+            raw_expired_at__isnull=True,
+            ended_at__lte=now - timedelta(days=retention_days),
+        ).distinct():
+            if expire_session_raw_data(session, get_influx_repo(session)):
+                expired += 1
+        self.stdout.write(self.style.SUCCESS(f"Сырые данные удалены для {expired} сессий"))
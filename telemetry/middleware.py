@@ -0,0 +1,110 @@
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:  # optional: brotli is preferred when installed and accepted by the client
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+from .caching import ETAG_ENCODING_SUFFIXES
+from .slow_queries import current_view
+
+# Only data formats are compressed: HTML pages carry CSRF tokens, and
+# compressing secrets next to reflected input invites BREACH-style attacks.
+COMPRESSIBLE_TYPES = ("application/json", "text/csv", "application/yaml")
+
+
+def _accepted_encodings(header: str) -> dict:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress large API responses with brotli or gzip.
+
+    Responses smaller than ``RESPONSE_COMPRESSION_MIN_SIZE`` bytes are sent
+    as is. Strong ETags get an encoding suffix so each representation keeps
+    its own validator. The suffix is stripped from ``If-None-Match`` before
+    the request reaches ConditionalGetMiddleware and the views, which compare
+    against the uncompressed ETag, and put back on the 304. Built on
+    MiddlewareMixin so it stays async-capable and does not force async views
+    back onto a worker thread.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, "RESPONSE_COMPRESSION_MIN_SIZE", 1024)
+
+    def process_request(self, request):
+        header = request.META.get("HTTP_IF_NONE_MATCH")
+        if not header:
+            return
+        tags = []
+        for tag in header.split(","):
+            tag = tag.strip()
+            for suffix in ETAG_ENCODING_SUFFIXES:
+                if tag.endswith(f'{suffix}"'):
+                    tag = f'{tag[: -len(suffix) - 1]}"'
+                    request.etag_encoding_suffix = suffix
+                    break
+            tags.append(tag)
+        request.META["HTTP_IF_NONE_MATCH"] = ", ".join(tags)
+
+    def process_response(self, request, response):
+        suffix = getattr(request, "etag_encoding_suffix", None)
+        if response.status_code == 304 and suffix:
+            etag = response.get("ETag")
+            if etag and etag.startswith('"') and not etag.rstrip('"').endswith(ETAG_ENCODING_SUFFIXES):
+                response["ETag"] = f'{etag[:-1]}{suffix}"'
+            return response
+        if response.streaming or response.status_code != 200 or response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < self.min_size:
+            return response
+
+        accepted = _accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli is not None and accepted.get("br", 0) > 0:
+            encoding, body = "br", brotli.compress(response.content, quality=5)
+        elif accepted.get("gzip", 0) > 0:
+            encoding, body = "gzip", gzip.compress(response.content, compresslevel=6, mtime=0)
+        else:
+            return response
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"') and not etag.rstrip('"').endswith(ETAG_ENCODING_SUFFIXES):
+            response["ETag"] = f'{etag[:-1]}-{encoding}"'
+        return response
+
+
+class SlowQueryViewMiddleware(MiddlewareMixin):
+    """Name the view being served in the slow Flux query log (telemetry/slow_queries.py)."""
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name if request.resolver_match else "")
+
+    def process_response(self, request, response):
+        current_view.set("")
+        return response
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('timestamp_column', models.CharField(default='ts', max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='csvimport',
+            name='profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='csv_imports', to='telemetry.importprofile'),
+        ),
+        migrations.CreateModel(
+            name='ImportProfileColumn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column', models.CharField(max_length=100)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='columns', to='telemetry.importprofile')),
+                ('quantity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_columns', to='telemetry.measuredquantity')),
+                ('sensor', models.ForeignKey(blank=True, help_text='Пусто — первый датчик с каналом этой величины', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='profile_columns', to='telemetry.sensor')),
+            ],
+            options={
+                'ordering': ['profile', 'column'],
+                'unique_together': {('profile', 'column')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0002_import_profiles'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='csvimport',
+            index=models.Index(fields=['session', '-created_at'], name='csvimport_session_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['motor_group', '-started_at'], name='session_group_started_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='raw_expired_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='SessionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tier', models.CharField(choices=[('1s', '1 second'), ('1m', '1 minute')], max_length=8)),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('is_stale', models.BooleanField(default=False)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='telemetry.session')),
+            ],
+            options={
+                'ordering': ['session', 'tier'],
+                'unique_together': {('session', 'tier')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0004_session_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InfluxDeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.BigIntegerField(blank=True, null=True)),
+                ('motor_group_id', models.BigIntegerField(blank=True, null=True)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('reason', models.CharField(choices=[('session', 'Session deleted'), ('motor_group', 'Motor group deleted'), ('orphan', 'Orphaned series')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('batches_total', models.PositiveIntegerField(default=0)),
+                ('batches_done', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='deletionjob_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0005_influx_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetectorRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('limit', 'Limits'), ('rate', 'Rate of change'), ('zscore', 'Rolling z-score')], max_length=20)),
+                ('min_value', models.FloatField(blank=True, help_text='limit: нижняя граница', null=True)),
+                ('max_value', models.FloatField(blank=True, help_text='limit: верхняя граница', null=True)),
+                ('max_rate', models.FloatField(blank=True, help_text='rate: макс. |изменение| в секунду', null=True)),
+                ('window', models.PositiveIntegerField(default=60, help_text='zscore: число предыдущих точек')),
+                ('threshold', models.FloatField(default=4.0, help_text='zscore: порог |z|')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('quantity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detector_rules', to='telemetry.measuredquantity')),
+            ],
+            options={
+                'ordering': ['quantity', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AnomalyEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('limit', 'Limits'), ('rate', 'Rate of change'), ('zscore', 'Rolling z-score')], max_length=20)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('point_count', models.PositiveIntegerField(default=1)),
+                ('peak_value', models.FloatField()),
+                ('peak_score', models.FloatField(help_text='limit: выход за границу, rate: скорость, zscore: |z|')),
+                ('csv_import', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='anomaly_events', to='telemetry.csvimport')),
+                ('motor_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomaly_events', to='telemetry.motorgroup')),
+                ('quantity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomaly_events', to='telemetry.measuredquantity')),
+                ('sensor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='anomaly_events', to='telemetry.sensor')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomaly_events', to='telemetry.session')),
+                ('rule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='telemetry.detectorrule')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['session', '-started_at'], name='anomaly_session_idx'), models.Index(fields=['motor_group', '-started_at'], name='anomaly_group_idx')],
+            },
+        ),
+    ]
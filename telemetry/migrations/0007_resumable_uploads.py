@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0006_anomaly_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvimport',
+            name='bytes_received',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='csvimport',
+            name='bytes_total',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='csvimport',
+            name='last_chunk_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='csvimport',
+            name='upload_state',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0007_resumable_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='steps_analyzed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ThrottleStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('throttle', models.FloatField()),
+                ('point_count', models.PositiveIntegerField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='throttle_steps', to='telemetry.session')),
+            ],
+            options={
+                'ordering': ['session', 'index'],
+                'unique_together': {('session', 'index')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StepMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.FloatField()),
+                ('std', models.FloatField()),
+                ('count', models.PositiveIntegerField()),
+                ('quantity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='step_metrics', to='telemetry.measuredquantity')),
+                ('step', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='telemetry.throttlestep')),
+            ],
+            options={
+                'unique_together': {('step', 'quantity')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0008_throttle_steps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='preview',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
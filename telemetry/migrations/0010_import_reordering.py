@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0009_session_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvimport',
+            name='rows_duplicate',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='csvimport',
+            name='rows_reordered',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importprofile',
+            name='duplicate_policy',
+            field=models.CharField(blank=True, choices=[('first', 'Первая строка'), ('last', 'Последняя строка'), ('average', 'Среднее')], help_text='Строки с одинаковым временем; пусто — CSV_DUPLICATE_POLICY', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='importprofile',
+            name='reorder_window',
+            field=models.PositiveIntegerField(blank=True, help_text='Окно сортировки в строках; пусто — CSV_REORDER_WINDOW', null=True),
+        ),
+    ]
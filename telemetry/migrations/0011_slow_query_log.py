@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0010_import_reordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(blank=True, help_text='Метод InfluxRepository', max_length=64)),
+                ('view', models.CharField(blank=True, help_text='URL-имя вызвавшего представления', max_length=200)),
+                ('flux', models.TextField()),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('shape', models.CharField(db_index=True, max_length=16)),
+                ('shape_text', models.TextField()),
+                ('duration_ms', models.FloatField()),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('bytes', models.PositiveBigIntegerField(default=0, help_text='Примерный размер ответа')),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:43
+
+from django.db import migrations, models
+
+
+def pin_existing_sessions(apps, schema_editor):
+    # Everything written so far went to the single INFLUX_SETTINGS instance.
+    Session = apps.get_model("telemetry", "Session")
+    Session.objects.update(influx_shard="default")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0011_slow_query_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='influxdeletionjob',
+            name='shard',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='influx_shard',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.RunPython(pin_existing_sessions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='influxdeletionjob',
+            name='reason',
+            field=models.CharField(choices=[('session', 'Session deleted'), ('motor_group', 'Motor group deleted'), ('orphan', 'Orphaned series'), ('moved', 'Session moved to another shard')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:12
+
+from django.db import migrations, models
+
+
+def flag_existing_sessions(apps, schema_editor):
+    # Earlier group changes were not recorded; any session with data may have points under another group.
+    Session = apps.get_model("telemetry", "Session")
+    Session.objects.filter(csv_imports__isnull=False).update(motor_group_changed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0012_influx_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='motor_group_changed',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(flag_existing_sessions, migrations.RunPython.noop),
+    ]
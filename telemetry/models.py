@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 
@@ -34,14 +35,50 @@ class Session(models.Model):
     ended_at = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    raw_expired_at = models.DateTimeField(null=True, blank=True, editable=False)
+    steps_analyzed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Min/max sparkline buckets per quantity, merged in by every successful import (telemetry/previews.py).
+    preview = models.JSONField(null=True, blank=True, editable=False)
+    # InfluxDB shard holding the session's points (telemetry/shards.py); set by the first import,
+    # changed only by `manage.py move_session_shard`. Empty: not written yet, routed by INFLUX_SHARD_MAP.
+    influx_shard = models.CharField(max_length=50, blank=True, editable=False)
+    # Set once the session moves to another motor group after points were written: the old points
+    # keep their motor_group_id tag, so queries cannot pin the current one (telemetry/flux.py).
+    motor_group_changed = models.BooleanField(default=False, editable=False)
 
     class Meta:
         ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["motor_group", "-started_at"], name="session_group_started_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.motor_group.name} / {self.name}"
 
 
+class SessionRollup(models.Model):
+    """A downsampled copy of a session's series in one of the rollup buckets."""
+
+    TIER_1S = "1s"
+    TIER_1M = "1m"
+    TIER_CHOICES = [
+        (TIER_1S, "1 second"),
+        (TIER_1M, "1 minute"),
+    ]
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="rollups")
+    tier = models.CharField(max_length=8, choices=TIER_CHOICES)
+    created_at = models.DateTimeField(auto_now=True)
+    is_stale = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["session", "tier"]
+        unique_together = [("session", "tier")]
+
+    def __str__(self) -> str:
+        return f"Rollup {self.tier} for session {self.session_id}"
+
+
 class MeasuredQuantity(models.Model):
     key = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=100)
@@ -82,6 +119,51 @@ class SensorChannel(models.Model):
         return f"{self.sensor.name}: {self.quantity.name}{label}"
 
 
+class ImportProfile(models.Model):
+    """Maps columns of a stand's CSV export onto specific sensor channels."""
+
+    name = models.CharField(max_length=100, unique=True)
+    timestamp_column = models.CharField(max_length=100, default="ts")
+    description = models.TextField(blank=True)
+    reorder_window = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Окно сортировки в строках; пусто — CSV_REORDER_WINDOW"
+    )
+    duplicate_policy = models.CharField(
+        max_length=10,
+        blank=True,
+        choices=[("first", "Первая строка"), ("last", "Последняя строка"), ("average", "Среднее")],
+        help_text="Строки с одинаковым временем; пусто — CSV_DUPLICATE_POLICY",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ImportProfileColumn(models.Model):
+    profile = models.ForeignKey(ImportProfile, on_delete=models.CASCADE, related_name="columns")
+    column = models.CharField(max_length=100)
+    quantity = models.ForeignKey(MeasuredQuantity, on_delete=models.CASCADE, related_name="profile_columns")
+    sensor = models.ForeignKey(
+        Sensor,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="profile_columns",
+        help_text="Пусто — первый датчик с каналом этой величины",
+    )
+
+    class Meta:
+        ordering = ["profile", "column"]
+        unique_together = [("profile", "column")]
+
+    def __str__(self) -> str:
+        return f"{self.profile.name}: {self.column}"
+
+
 class CsvImport(models.Model):
     STATUS_PENDING = "pending"
     STATUS_SUCCESS = "success"
@@ -98,11 +180,222 @@ class CsvImport(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     rows_processed = models.PositiveIntegerField(default=0)
     rows_failed = models.PositiveIntegerField(default=0)
+    # Rows merged into an earlier row with the same timestamp / rows that arrived out of time order.
+    rows_duplicate = models.PositiveIntegerField(default=0)
+    rows_reordered = models.PositiveIntegerField(default=0)
     error_message = models.TextField(blank=True)
     file_name = models.CharField(max_length=255, blank=True)
+    profile = models.ForeignKey(
+        ImportProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name="csv_imports"
+    )
+    # Resumable uploads: bytes accepted so far, declared size, and the importer
+    # state carried between chunks (None once the upload is finalized).
+    bytes_received = models.BigIntegerField(default=0)
+    bytes_total = models.BigIntegerField(null=True, blank=True)
+    upload_state = models.JSONField(null=True, blank=True, editable=False)
+    last_chunk_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["session", "-created_at"], name="csvimport_session_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Import {self.id} for session {self.session_id}"
+
+    @property
+    def is_open_upload(self) -> bool:
+        return self.status == self.STATUS_PENDING and self.upload_state is not None
+
+
+class InfluxDeletionJob(models.Model):
+    """Background removal of a deleted session's or motor group's points from InfluxDB."""
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    REASON_SESSION = "session"
+    REASON_MOTOR_GROUP = "motor_group"
+    REASON_ORPHAN = "orphan"
+    REASON_MOVED = "moved"
+    REASON_CHOICES = [
+        (REASON_SESSION, "Session deleted"),
+        (REASON_MOTOR_GROUP, "Motor group deleted"),
+        (REASON_ORPHAN, "Orphaned series"),
+        (REASON_MOVED, "Session moved to another shard"),
+    ]
+
+    # Plain ids: the rows they pointed to are already gone.
+    session_id = models.BigIntegerField(null=True, blank=True)
+    motor_group_id = models.BigIntegerField(null=True, blank=True)
+    label = models.CharField(max_length=255, blank=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    # Shard to delete from; empty means every shard.
+    shard = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    batches_total = models.PositiveIntegerField(default=0)
+    batches_done = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"], name="deletionjob_status_idx")]
+
+    def __str__(self) -> str:
+        target = f"session {self.session_id}" if self.session_id else f"motor group {self.motor_group_id}"
+        return f"Influx deletion of {target}"
+
+    @property
+    def tag(self) -> tuple[str, int]:
+        if self.session_id:
+            return "session_id", self.session_id
+        return "motor_group_id", self.motor_group_id
+
+    @property
+    def progress(self) -> float:
+        if self.status == self.STATUS_DONE:
+            return 1.0
+        return self.batches_done / self.batches_total if self.batches_total else 0.0
+
+
+class DetectorRule(models.Model):
+    """Anomaly rule evaluated on a quantity's values while a CSV is imported."""
+
+    KIND_LIMIT = "limit"
+    KIND_RATE = "rate"
+    KIND_ZSCORE = "zscore"
+    KIND_CHOICES = [
+        (KIND_LIMIT, "Limits"),
+        (KIND_RATE, "Rate of change"),
+        (KIND_ZSCORE, "Rolling z-score"),
+    ]
+
+    quantity = models.ForeignKey(MeasuredQuantity, on_delete=models.CASCADE, related_name="detector_rules")
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    min_value = models.FloatField(null=True, blank=True, help_text="limit: нижняя граница")
+    max_value = models.FloatField(null=True, blank=True, help_text="limit: верхняя граница")
+    max_rate = models.FloatField(null=True, blank=True, help_text="rate: макс. |изменение| в секунду")
+    window = models.PositiveIntegerField(default=60, help_text="zscore: число предыдущих точек")
+    threshold = models.FloatField(default=4.0, help_text="zscore: порог |z|")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["quantity", "name"]
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.quantity.key}, {self.kind})"
+
+    def clean(self):
+        if self.kind == self.KIND_LIMIT:
+            if self.min_value is None and self.max_value is None:
+                raise ValidationError("Укажите хотя бы одну границу")
+            if self.min_value is not None and self.max_value is not None and self.min_value > self.max_value:
+                raise ValidationError({"max_value": "Верхняя граница меньше нижней"})
+        elif self.kind == self.KIND_RATE:
+            if not self.max_rate or self.max_rate <= 0:
+                raise ValidationError({"max_rate": "Укажите положительную скорость изменения"})
+        elif self.kind == self.KIND_ZSCORE:
+            if self.window < 2:
+                raise ValidationError({"window": "Окно должно содержать хотя бы 2 точки"})
+            if self.threshold <= 0:
+                raise ValidationError({"threshold": "Порог должен быть положительным"})
+
+
+class AnomalyEvent(models.Model):
+    """A run of consecutive points that violated one detector rule."""
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="anomaly_events")
+    # Denormalised so motor-group queries hit a single index without a join.
+    motor_group = models.ForeignKey(MotorGroup, on_delete=models.CASCADE, related_name="anomaly_events")
+    csv_import = models.ForeignKey(
+        CsvImport, on_delete=models.SET_NULL, null=True, blank=True, related_name="anomaly_events"
+    )
+    rule = models.ForeignKey(DetectorRule, on_delete=models.SET_NULL, null=True, blank=True, related_name="events")
+    kind = models.CharField(max_length=20, choices=DetectorRule.KIND_CHOICES)
+    quantity = models.ForeignKey(MeasuredQuantity, on_delete=models.CASCADE, related_name="anomaly_events")
+    sensor = models.ForeignKey(Sensor, on_delete=models.SET_NULL, null=True, blank=True, related_name="anomaly_events")
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    point_count = models.PositiveIntegerField(default=1)
+    peak_value = models.FloatField()
+    peak_score = models.FloatField(help_text="limit: выход за границу, rate: скорость, zscore: |z|")
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["session", "-started_at"], name="anomaly_session_idx"),
+            models.Index(fields=["motor_group", "-started_at"], name="anomaly_group_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} on {self.quantity_id} at {self.started_at}"
+
+
+class ThrottleStep(models.Model):
+    """A steady throttle plateau of a session, with transients trimmed off."""
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="throttle_steps")
+    index = models.PositiveIntegerField()
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    throttle = models.FloatField()
+    point_count = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["session", "index"]
+        unique_together = ("session", "index")
+
+    def __str__(self) -> str:
+        return f"Step {self.index} of session {self.session_id} ({self.throttle:g})"
+
+
+class StepMetric(models.Model):
+    """Steady-state mean/std of one quantity over a throttle step."""
+
+    step = models.ForeignKey(ThrottleStep, on_delete=models.CASCADE, related_name="metrics")
+    quantity = models.ForeignKey(MeasuredQuantity, on_delete=models.CASCADE, related_name="step_metrics")
+    mean = models.FloatField()
+    std = models.FloatField()
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("step", "quantity")
+
+
+class SlowQuery(models.Model):
+    """A Flux query that took at least ``INFLUX_SLOW_QUERY_MS`` (see telemetry/slow_queries.py).
+
+    Only the newest ``INFLUX_SLOW_QUERY_LOG_SIZE`` rows are kept.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=64, blank=True, help_text="Метод InfluxRepository")
+    view = models.CharField(max_length=200, blank=True, help_text="URL-имя вызвавшего представления")
+    flux = models.TextField()
+    params = models.JSONField(default=dict, blank=True)
+    # Flux with literals replaced by "?"; equal shapes differ only in session, interval, etc.
+    shape = models.CharField(max_length=16, db_index=True)
+    shape_text = models.TextField()
+    duration_ms = models.FloatField()
+    rows = models.PositiveIntegerField(default=0)
+    bytes = models.PositiveBigIntegerField(default=0, help_text="Примерный размер ответа")
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self) -> str:
+        return f"{self.method or 'flux'} {self.duration_ms:.0f} ms"
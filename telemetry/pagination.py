@@ -0,0 +1,27 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TelemetryCursorPagination(CursorPagination):
+    """Keyset pagination: each page is one indexed range scan, no COUNT(*)."""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-id",)
+
+
+class NamedCursorPagination(TelemetryCursorPagination):
+    ordering = ("name", "id")
+
+
+class SessionCursorPagination(TelemetryCursorPagination):
+    ordering = ("-started_at", "-id")
+
+
+class SensorChannelCursorPagination(TelemetryCursorPagination):
+    # (sensor, quantity) is unique already; "id" keeps the order total should that constraint go.
+    ordering = ("sensor_id", "quantity_id", "id")
+
+
+class AnomalyEventCursorPagination(TelemetryCursorPagination):
+    ordering = ("-started_at", "-id")
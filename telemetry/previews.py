@@ -0,0 +1,158 @@
+"""Fixed-size min/max previews of a session's series, for sparklines in lists.
+
+The importer feeds every parsed value into a :class:`PreviewBuilder`, which
+keeps ``PREVIEW_POINTS`` time buckets per quantity. When a value falls past
+the last bucket, adjacent buckets are merged pairwise and the bucket width
+doubles, so memory stays fixed however long the file is. On a successful
+import the result is merged into ``Session.preview``, and the session list
+draws its sparklines from that column alone, without touching InfluxDB.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+
+PREVIEW_POINTS = 96  # must be even: buckets are merged in pairs
+MIN_BUCKET_SECONDS = 0.001
+
+Bucket = Optional[List[float]]  # [min, max], or None where a quantity has no point
+
+
+def _merge(a: Bucket, b: Bucket) -> Bucket:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return [min(a[0], b[0]), max(a[1], b[1])]
+
+
+class PreviewBuilder:
+    def __init__(
+        self,
+        points: int = PREVIEW_POINTS,
+        start: Optional[float] = None,
+        width: float = MIN_BUCKET_SECONDS,
+        quantities: Optional[Dict[str, List[Bucket]]] = None,
+    ) -> None:
+        self.points = points
+        self.start = start
+        self.width = width
+        self.quantities: Dict[str, List[Bucket]] = quantities or {}
+
+    def _coarsen(self) -> None:
+        for key, buckets in self.quantities.items():
+            merged = [_merge(buckets[i], buckets[i + 1]) for i in range(0, self.points, 2)]
+            self.quantities[key] = merged + [None] * (self.points - len(merged))
+        self.width *= 2
+
+    def add(self, t: float, key: str, low: float, high: Optional[float] = None) -> None:
+        """Account ``low..high`` (a single value when ``high`` is omitted) at epoch second ``t``."""
+        if self.start is None:
+            self.start = t
+        # Rows before the first one land in the first bucket; logs are near-in-order.
+        index = max(int((t - self.start) / self.width), 0)
+        while index >= self.points:
+            self._coarsen()
+            index = max(int((t - self.start) / self.width), 0)
+        buckets = self.quantities.setdefault(key, [None] * self.points)
+        buckets[index] = _merge(buckets[index], [low, low if high is None else high])
+
+    def feed(self, timestamps, columns, keys: List[str]) -> None:
+        """Add one parsed chunk: ``columns[j][i]`` is the value of quantity ``keys[j]`` at ``timestamps[i]``."""
+        if not timestamps:
+            return
+        seconds = [ts.timestamp() for ts in timestamps]
+        if self.start is None:
+            self.start = seconds[0]
+        # Coarsen once for the whole chunk, then fill buckets without per-value calls.
+        while int((max(seconds) - self.start) / self.width) >= self.points:
+            self._coarsen()
+        indexes = [max(int((t - self.start) / self.width), 0) for t in seconds]
+        for key, column in zip(keys, columns):
+            buckets = self.quantities.setdefault(key, [None] * self.points)
+            for index, value in zip(indexes, column):
+                if value is None:
+                    continue
+                bucket = buckets[index]
+                if bucket is None:
+                    buckets[index] = [value, value]
+                elif value < bucket[0]:
+                    bucket[0] = value
+                elif value > bucket[1]:
+                    bucket[1] = value
+
+    def envelopes(self) -> Iterable[tuple[float, str, float, float]]:
+        for key, buckets in self.quantities.items():
+            for i, bucket in enumerate(buckets):
+                if bucket is not None:
+                    yield self.start + i * self.width, key, bucket[0], bucket[1]
+
+    def state(self) -> dict:
+        return {"start": self.start, "width": self.width, "quantities": self.quantities}
+
+    @classmethod
+    def restore(cls, state: Optional[dict], points: int = PREVIEW_POINTS) -> "PreviewBuilder":
+        if not state or state.get("start") is None:
+            return cls(points)
+        quantities = {key: list(buckets) for key, buckets in state["quantities"].items()}
+        return cls(points, state["start"], state["width"], quantities)
+
+    @classmethod
+    def combine(cls, *builders: "PreviewBuilder", points: int = PREVIEW_POINTS) -> "PreviewBuilder":
+        """One preview over the union of the builders' time spans."""
+        envelopes = sorted(envelope for builder in builders if builder.start is not None for envelope in builder.envelopes())
+        combined = cls(points)
+        for t, key, low, high in envelopes:
+            combined.add(t, key, low, high)
+        return combined
+
+    def compact(self) -> dict:
+        """State rounded to 4 significant digits, as stored on the session."""
+        quantities = {
+            key: [None if b is None else [float(f"{b[0]:.4g}"), float(f"{b[1]:.4g}")] for b in buckets]
+            for key, buckets in self.quantities.items()
+        }
+        return {"start": self.start, "width": self.width, "quantities": quantities}
+
+    def save(self, session) -> None:
+        """Merge into ``session.preview`` (locked, so concurrent imports don't lose each other's part)."""
+        from .models import Session
+
+        if self.start is None:
+            return
+        with transaction.atomic():
+            current = Session.objects.select_for_update().values_list("preview", flat=True).get(pk=session.pk)
+            merged = PreviewBuilder.combine(PreviewBuilder.restore(current, self.points), self, points=self.points)
+            preview = merged.compact()
+            Session.objects.filter(pk=session.pk).update(preview=preview)
+        session.preview = preview
+
+
+def preview_span(preview: Optional[dict]) -> Optional[tuple[float, float]]:
+    """Epoch seconds from the first to the end of the last filled bucket of any quantity."""
+    if not preview or preview.get("start") is None:
+        return None
+    filled = [i for buckets in preview["quantities"].values() for i, b in enumerate(buckets) if b is not None]
+    if not filled:
+        return None
+    return preview["start"], preview["start"] + (max(filled) + 1) * preview["width"]
+
+
+def sparkline_polygon(buckets: List[Bucket], width: int = 120, height: int = 24) -> str:
+    """SVG ``points`` of the min/max band: maxima left to right, then minima back."""
+    filled = [(i, b) for i, b in enumerate(buckets) if b is not None]
+    if not filled:
+        return ""
+    low = min(b[0] for _, b in filled)
+    high = max(b[1] for _, b in filled)
+    scale = (height - 2) / (high - low) if high > low else 0.0
+    step = width / max(len(buckets) - 1, 1)
+
+    def y(value: float) -> str:
+        return f"{height - 1 - (value - low) * scale if scale else height / 2:.1f}"
+
+    upper = [f"{i * step:.1f},{y(b[1])}" for i, b in filled]
+    lower = [f"{i * step:.1f},{y(b[0])}" for i, b in reversed(filled)]
+    return " ".join(upper + lower)
@@ -0,0 +1,39 @@
+"""Annotated querysets shared by the HTML lists and the API viewsets.
+
+Each listing is served by one SQL statement (plus a single prefetch where
+related rows are rendered), independent of the number of rows on the page.
+"""
+
+from django.db.models import Count, Max, OuterRef, Prefetch, Subquery
+
+from .models import CsvImport, MotorGroup, Sensor, SensorChannel, Session
+
+
+def session_list_queryset(motor_group_id: int | None = None):
+    last_import = CsvImport.objects.filter(session=OuterRef("pk")).order_by("-created_at")
+    qs = Session.objects.select_related("motor_group").annotate(
+        import_count=Count("csv_imports"),
+        last_import_status=Subquery(last_import.values("status")[:1]),
+        last_import_at=Subquery(last_import.values("created_at")[:1]),
+    )
+    if motor_group_id is not None:
+        qs = qs.filter(motor_group_id=motor_group_id)
+    return qs
+
+
+def motor_group_list_queryset():
+    return MotorGroup.objects.annotate(
+        session_count=Count("sessions"),
+        last_session_at=Max("sessions__started_at"),
+    )
+
+
+def sensor_list_queryset(with_channels: bool = False):
+    qs = Sensor.objects.select_related("stand").annotate(channel_count=Count("channels"))
+    if with_channels:
+        qs = qs.prefetch_related(Prefetch("channels", queryset=SensorChannel.objects.select_related("quantity")))
+    return qs
+
+
+def sensor_channel_list_queryset():
+    return SensorChannel.objects.select_related("sensor", "quantity")
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+
+from .models import MeasuredQuantity, Stand
+
+
+VERSION_CACHE_KEY = "telemetry:registry:version"
+DEFAULT_STAND_NAME = "Default Stand"
+
+
+@dataclass(frozen=True)
+class QuantityInfo:
+    id: int
+    key: str
+    name: str
+    unit: str
+
+
+@dataclass(frozen=True)
+class ChannelInfo:
+    id: int
+    sensor_id: int
+    sensor_name: str
+    stand_id: int
+    quantity_id: int
+    quantity_key: str
+    label: str
+
+
+@dataclass
+class _Snapshot:
+    version: int
+    quantities: Dict[str, QuantityInfo] = field(default_factory=dict)
+    channels: Dict[str, List[ChannelInfo]] = field(default_factory=dict)
+    default_stand_id: Optional[int] = None
+
+
+class MetadataRegistry:
+    """Process-local copy of quantities, sensors and their channels.
+
+    The whole catalog is loaded with one LEFT JOIN query and kept until the
+    shared version counter (bumped by model signals) changes, so every worker
+    notices edits made by any other worker.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    # -- version counter -------------------------------------------------
+
+    @staticmethod
+    def current_version() -> int:
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(VERSION_CACHE_KEY, 1, timeout=None)
+            version = cache.get(VERSION_CACHE_KEY, 1)
+        return version
+
+    @staticmethod
+    async def acurrent_version() -> int:
+        version = await cache.aget(VERSION_CACHE_KEY)
+        if version is None:
+            await cache.aadd(VERSION_CACHE_KEY, 1, timeout=None)
+            version = await cache.aget(VERSION_CACHE_KEY, 1)
+        return version
+
+    @staticmethod
+    def bump_version() -> None:
+        try:
+            cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            cache.add(VERSION_CACHE_KEY, 2, timeout=None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+        self.bump_version()
+
+    # -- loading -----------------------------------------------------------
+
+    @staticmethod
+    def _catalog_rows():
+        return MeasuredQuantity.objects.order_by("key", "sensor_channels__sensor_id").values(
+            "id",
+            "key",
+            "name",
+            "unit",
+            "sensor_channels__id",
+            "sensor_channels__label",
+            "sensor_channels__sensor_id",
+            "sensor_channels__sensor__name",
+            "sensor_channels__sensor__stand_id",
+        )
+
+    @staticmethod
+    def _build(version: int, rows) -> _Snapshot:
+        snapshot = _Snapshot(version=version)
+        for row in rows:
+            key = row["key"]
+            if key not in snapshot.quantities:
+                snapshot.quantities[key] = QuantityInfo(row["id"], key, row["name"], row["unit"])
+                snapshot.channels[key] = []
+            if row["sensor_channels__id"] is not None:
+                snapshot.channels[key].append(
+                    ChannelInfo(
+                        id=row["sensor_channels__id"],
+                        sensor_id=row["sensor_channels__sensor_id"],
+                        sensor_name=row["sensor_channels__sensor__name"],
+                        stand_id=row["sensor_channels__sensor__stand_id"],
+                        quantity_id=row["id"],
+                        quantity_key=key,
+                        label=row["sensor_channels__label"],
+                    )
+                )
+        return snapshot
+
+    def _get(self) -> _Snapshot:
+        version = self.current_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._build(version, list(self._catalog_rows()))
+                self._snapshot = snapshot
+        return snapshot
+
+    async def _aget(self) -> _Snapshot:
+        version = await self.acurrent_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            # Concurrent reloads in the same process are harmless: they build
+            # identical snapshots and the last one wins.
+            snapshot = self._build(version, [row async for row in self._catalog_rows()])
+            self._snapshot = snapshot
+        return snapshot
+
+    # -- lookups -----------------------------------------------------------
+
+    def quantity(self, key: str) -> Optional[QuantityInfo]:
+        return self._get().quantities.get(key)
+
+    async def aquantity(self, key: str) -> Optional[QuantityInfo]:
+        return (await self._aget()).quantities.get(key)
+
+    def quantities(self) -> List[QuantityInfo]:
+        return sorted(self._get().quantities.values(), key=lambda q: q.name)
+
+    def channels_for(self, quantity_key: str) -> List[ChannelInfo]:
+        return list(self._get().channels.get(quantity_key, ()))
+
+    def default_stand_id(self) -> int:
+        snapshot = self._get()
+        if snapshot.default_stand_id is None:
+            stand, _ = Stand.objects.get_or_create(
+                name=DEFAULT_STAND_NAME,
+                defaults={"location": "", "description": "Основной стенд"},
+            )
+            snapshot.default_stand_id = stand.id
+        return snapshot.default_stand_id
+
+
+registry = MetadataRegistry()
+
+
+def get_registry() -> MetadataRegistry:
+    return registry
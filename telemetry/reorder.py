@@ -0,0 +1,142 @@
+"""Bounded reordering and de-duplication of parsed CSV rows.
+
+Logs stitched together from several Raspberry Pi buffers are nearly in
+time order, with overlaps where the buffers meet. Rows pass through a heap
+of at most ``window`` rows before they are written, so a row that arrives
+up to ``window`` rows late still lands in its place, and rows with equal
+timestamps are merged column by column according to the duplicate policy.
+Memory is O(window) whatever the file size. A row later than the window is
+written unsorted (InfluxDB indexes by time anyway) and only counted.
+
+The rows of the last ``window`` written timestamps are kept too. A duplicate
+arriving after its twin was written is merged into that group and the
+merged row is written again, overwriting the earlier point, so ``first``
+and ``average`` still hold. A duplicate older than that is written as is
+and InfluxDB keeps the later value, as with ``last``.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+POLICY_FIRST = "first"
+POLICY_LAST = "last"
+POLICY_AVERAGE = "average"
+DUPLICATE_POLICIES = (POLICY_FIRST, POLICY_LAST, POLICY_AVERAGE)
+
+Values = List[Optional[float]]
+
+
+def merge_duplicates(rows: List[Values], policy: str) -> Values:
+    """Combine rows sharing one timestamp; blank cells never override values."""
+    merged: Values = []
+    for cells in zip(*rows):
+        present = [value for value in cells if value is not None]
+        if not present:
+            merged.append(None)
+        elif policy == POLICY_FIRST:
+            merged.append(present[0])
+        elif policy == POLICY_LAST:
+            merged.append(present[-1])
+        else:
+            merged.append(sum(present) / len(present))
+    return merged
+
+
+class ReorderBuffer:
+    def __init__(self, window: int, policy: str = POLICY_LAST) -> None:
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"Неизвестная политика дубликатов: {policy}")
+        self.window = max(window, 0)
+        self.policy = policy
+        self._heap: list[tuple[datetime, int, Values]] = []
+        self._seq = 0
+        self._pending: Optional[tuple[datetime, List[Values]]] = None
+        self._written: "OrderedDict[datetime, List[Values]]" = OrderedDict()
+        self._max_seen: Optional[datetime] = None
+        self.duplicates = 0
+        self.reordered = 0
+
+    def push(self, timestamps: List[datetime], columns: List[Values]) -> tuple[List[datetime], List[Values]]:
+        """Add a parsed chunk; returns the rows that left the buffer, as ``(timestamps, columns)``."""
+        out_ts: List[datetime] = []
+        out_rows: List[Values] = []
+        for i, ts in enumerate(timestamps):
+            if self._max_seen is not None and ts < self._max_seen:
+                self.reordered += 1
+            else:
+                self._max_seen = ts
+            heapq.heappush(self._heap, (ts, self._seq, [column[i] for column in columns]))
+            self._seq += 1
+            if len(self._heap) > self.window:
+                self._release(*heapq.heappop(self._heap), out_ts, out_rows)
+        return out_ts, self._columns(out_rows, len(columns))
+
+    def drain(self, width: int) -> tuple[List[datetime], List[Values]]:
+        """Release everything still buffered (end of the file)."""
+        out_ts: List[datetime] = []
+        out_rows: List[Values] = []
+        while self._heap:
+            self._release(*heapq.heappop(self._heap), out_ts, out_rows)
+        self._flush(out_ts, out_rows)
+        return out_ts, self._columns(out_rows, width)
+
+    def _release(self, ts: datetime, seq: int, values: Values, out_ts, out_rows) -> None:
+        # Equal timestamps leave the heap in arrival order, one after another.
+        if self._pending is not None and self._pending[0] == ts:
+            self._pending[1].append(values)
+            self.duplicates += 1
+            return
+        if ts in self._written:
+            # Its twin is already in InfluxDB: rewrite the point with the merged row.
+            rows = self._written[ts]
+            rows.append(values)
+            self.duplicates += 1
+            out_ts.append(ts)
+            out_rows.append(merge_duplicates(rows, self.policy))
+            return
+        self._flush(out_ts, out_rows)
+        self._pending = (ts, [values])
+
+    def _flush(self, out_ts, out_rows) -> None:
+        if self._pending is None:
+            return
+        ts, rows = self._pending
+        out_ts.append(ts)
+        out_rows.append(rows[0] if len(rows) == 1 else merge_duplicates(rows, self.policy))
+        self._pending = None
+        if self.window:
+            self._written[ts] = rows
+            if len(self._written) > self.window:
+                self._written.popitem(last=False)
+
+    @staticmethod
+    def _columns(rows: List[Values], width: int) -> List[Values]:
+        return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(width)]
+
+    def state(self) -> dict:
+        return {
+            "heap": [[ts.isoformat(), seq, values] for ts, seq, values in self._heap],
+            "seq": self._seq,
+            "pending": [self._pending[0].isoformat(), self._pending[1]] if self._pending else None,
+            "written": [[ts.isoformat(), rows] for ts, rows in self._written.items()],
+            "max_seen": self._max_seen.isoformat() if self._max_seen else None,
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+        }
+
+    def restore(self, state: Optional[dict]) -> None:
+        if not state:
+            return
+        self._heap = [(datetime.fromisoformat(ts), seq, values) for ts, seq, values in state["heap"]]
+        heapq.heapify(self._heap)
+        self._seq = state["seq"]
+        pending = state["pending"]
+        self._pending = (datetime.fromisoformat(pending[0]), pending[1]) if pending else None
+        self._written = OrderedDict((datetime.fromisoformat(ts), rows) for ts, rows in state.get("written", []))
+        self._max_seen = datetime.fromisoformat(state["max_seen"]) if state["max_seen"] else None
+        self.duplicates = state["duplicates"]
+        self.reordered = state["reordered"]
@@ -0,0 +1,181 @@
+"""Resumable chunked CSV uploads.
+
+An upload is a pending CsvImport. Each PUT carries the next byte range of
+the (uncompressed) CSV; complete lines are imported right away, so parsing
+and Influx writes overlap with the transfer, and only the trailing partial
+line plus the importer's carry-over state are kept in ``upload_state``. A
+client that lost its connection asks for ``bytes_received`` and continues
+from there. Fields with quoted line breaks are not supported: chunks are
+cut at newlines.
+"""
+
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import re
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CsvImport, ImportProfile, Session, SessionRollup
+from .services import CsvImporter
+
+# A partial line longer than this is treated as a malformed file.
+MAX_LINE_BYTES = 1024 * 1024
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class UploadError(Exception):
+    """Protocol error; the upload itself stays open and the request may be retried."""
+
+    def __init__(self, detail: str, status: int = 409, csv_import: CsvImport | None = None) -> None:
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+        self.csv_import = csv_import
+
+
+def parse_content_range(header: str | None) -> tuple[int | None, int | None]:
+    """``Content-Range: bytes a-b/total`` -> ``(a, total)``; ``(None, None)`` without a header."""
+    if not header:
+        return None, None
+    match = CONTENT_RANGE_RE.match(header.strip())
+    if not match or int(match.group(2)) < int(match.group(1)):
+        raise UploadError("invalid Content-Range", status=400)
+    total = match.group(3)
+    return int(match.group(1)), None if total == "*" else int(total)
+
+
+def create_upload(
+    session: Session, file_name: str, profile: ImportProfile | None = None, size: int | None = None
+) -> CsvImport:
+    csv_import = CsvImport.objects.create(
+        session=session,
+        status=CsvImport.STATUS_PENDING,
+        file_name=file_name,
+        profile=profile,
+        bytes_total=size,
+        upload_state={},
+        last_chunk_at=timezone.now(),
+    )
+    SessionRollup.objects.filter(session=session).update(is_stale=True)
+    return csv_import
+
+
+def _lock(pk: int) -> CsvImport:
+    csv_import = CsvImport.objects.select_for_update().select_related("session", "profile").get(pk=pk)
+    if not csv_import.is_open_upload:
+        raise UploadError("upload is not open", csv_import=csv_import)
+    return csv_import
+
+
+def _import_lines(csv_import: CsvImport, state: dict, text: str) -> CsvImporter | None:
+    """Import complete lines; ``None`` while the header line has not arrived yet."""
+    rows = csv.reader(io.StringIO(text))
+    if state.get("headers") is None:
+        header_row = next(rows, None)
+        if not header_row:
+            return None
+        importer = CsvImporter(csv_import)
+        importer.start(header_row)
+    else:
+        importer = CsvImporter.restore(csv_import, state)
+    try:
+        importer.feed(rows)
+        # Acknowledge the chunk only once its points are in InfluxDB.
+        importer.flush()
+    finally:
+        importer.close()
+    return importer
+
+
+def _fail(csv_import: CsvImport, message: str) -> CsvImport:
+    csv_import.status = CsvImport.STATUS_FAILED
+    csv_import.error_message = message
+    csv_import.upload_state = None
+    csv_import.finished_at = timezone.now()
+    csv_import.save()
+    return csv_import
+
+
+def append_chunk(pk: int, data: bytes, start: int | None = None, total: int | None = None) -> CsvImport:
+    """Accept bytes ``start..start+len(data)`` of the upload and import its complete lines.
+
+    Ranges overlapping what was already received are trimmed, so resending
+    the last chunk after a timeout is harmless; a range starting past
+    ``bytes_received`` is rejected with the offset to resume from. An
+    InfluxDB write error propagates and rolls the chunk back, so it is resent.
+    """
+    with transaction.atomic():
+        csv_import = _lock(pk)
+        received = csv_import.bytes_received
+        start = received if start is None else start
+        if start > received:
+            raise UploadError(f"expected range starting at {received}", csv_import=csv_import)
+        if total is not None:
+            if csv_import.bytes_total not in (None, total):
+                raise UploadError("total size does not match the upload", status=400, csv_import=csv_import)
+            csv_import.bytes_total = total
+        data = data[received - start :]
+        if csv_import.bytes_total is not None and received + len(data) > csv_import.bytes_total:
+            raise UploadError("range exceeds the declared size", status=400, csv_import=csv_import)
+        if not data:
+            return csv_import
+
+        state = dict(csv_import.upload_state)
+        buffer = base64.b64decode(state.pop("tail", "")) + data
+        cut = buffer.rfind(b"\n") + 1
+        tail = buffer[cut:]
+        try:
+            if len(tail) > MAX_LINE_BYTES:
+                raise ValueError(f"Строка длиннее {MAX_LINE_BYTES} байт")
+            importer = _import_lines(csv_import, state, buffer[:cut].decode("utf-8"))
+        except ValueError as exc:
+            return _fail(csv_import, str(exc))
+        state = importer.state() if importer is not None else {}
+        state["tail"] = base64.b64encode(tail).decode("ascii")
+        csv_import.upload_state = state
+        csv_import.bytes_received = received + len(data)
+        csv_import.last_chunk_at = timezone.now()
+        csv_import.save()
+    return csv_import
+
+
+def finalize_upload(pk: int) -> CsvImport:
+    """Import the last unterminated line, close open anomaly events and mark the import done."""
+    with transaction.atomic():
+        csv_import = _lock(pk)
+        if csv_import.bytes_total is not None and csv_import.bytes_received != csv_import.bytes_total:
+            raise UploadError(
+                f"upload incomplete: {csv_import.bytes_received} of {csv_import.bytes_total} bytes",
+                csv_import=csv_import,
+            )
+        state = dict(csv_import.upload_state)
+        tail = base64.b64decode(state.pop("tail", ""))
+        try:
+            importer = _import_lines(csv_import, state, tail.decode("utf-8"))
+            if importer is None:
+                raise ValueError("Пустой CSV")
+            importer.finish()
+        except ValueError as exc:
+            return _fail(csv_import, str(exc))
+        csv_import.status = CsvImport.STATUS_SUCCESS
+        csv_import.upload_state = None
+        csv_import.finished_at = timezone.now()
+        csv_import.save()
+    return csv_import
+
+
+def expire_stale_uploads(older_than) -> int:
+    """Fail uploads that received no chunk since ``older_than``; returns how many."""
+    stale = CsvImport.objects.filter(
+        status=CsvImport.STATUS_PENDING, upload_state__isnull=False, last_chunk_at__lt=older_than
+    )
+    return stale.update(
+        status=CsvImport.STATUS_FAILED,
+        error_message="Загрузка не завершена",
+        upload_state=None,
+        finished_at=timezone.now(),
+    )
@@ -1,16 +1,35 @@
 from rest_framework import serializers
 
-from .models import MeasuredQuantity, MotorGroup, Sensor, SensorChannel, Session
+from .models import (
+    AnomalyEvent,
+    CsvImport,
+    DetectorRule,
+    ImportProfile,
+    ImportProfileColumn,
+    InfluxDeletionJob,
+    MeasuredQuantity,
+    MotorGroup,
+    Sensor,
+    SensorChannel,
+    Session,
+    ThrottleStep,
+)
 
 
 class MotorGroupSerializer(serializers.ModelSerializer):
+    session_count = serializers.IntegerField(read_only=True)
+    last_session_at = serializers.DateTimeField(read_only=True)
+
     class Meta:
         model = MotorGroup
-        fields = ["id", "name", "description", "created_at"]
+        fields = ["id", "name", "description", "created_at", "session_count", "last_session_at"]
 
 
 class SessionSerializer(serializers.ModelSerializer):
     motor_group_name = serializers.CharField(source="motor_group.name", read_only=True)
+    import_count = serializers.IntegerField(read_only=True)
+    last_import_status = serializers.CharField(read_only=True)
+    last_import_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Session
@@ -23,15 +42,20 @@ class SessionSerializer(serializers.ModelSerializer):
             "ended_at",
             "notes",
             "created_at",
+            "import_count",
+            "last_import_status",
+            "last_import_at",
+            "preview",
         ]
 
 
 class SensorSerializer(serializers.ModelSerializer):
     stand_name = serializers.CharField(source="stand.name", read_only=True)
+    channel_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Sensor
-        fields = ["id", "stand", "stand_name", "name", "description", "created_at"]
+        fields = ["id", "stand", "stand_name", "name", "description", "created_at", "channel_count"]
 
 
 class SensorChannelSerializer(serializers.ModelSerializer):
@@ -48,3 +72,117 @@ class MeasuredQuantitySerializer(serializers.ModelSerializer):
     class Meta:
         model = MeasuredQuantity
         fields = ["id", "key", "name", "unit"]
+
+
+class ImportProfileColumnSerializer(serializers.ModelSerializer):
+    quantity_key = serializers.CharField(source="quantity.key", read_only=True)
+
+    class Meta:
+        model = ImportProfileColumn
+        fields = ["id", "column", "quantity", "quantity_key", "sensor"]
+
+
+class ImportProfileSerializer(serializers.ModelSerializer):
+    columns = ImportProfileColumnSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ImportProfile
+        fields = ["id", "name", "timestamp_column", "description", "reorder_window", "duplicate_policy", "columns"]
+
+
+class InfluxDeletionJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = InfluxDeletionJob
+        fields = [
+            "id",
+            "session_id",
+            "motor_group_id",
+            "label",
+            "reason",
+            "status",
+            "batches_total",
+            "batches_done",
+            "progress",
+            "error_message",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+class DetectorRuleSerializer(serializers.ModelSerializer):
+    quantity_key = serializers.CharField(source="quantity.key", read_only=True)
+
+    class Meta:
+        model = DetectorRule
+        fields = [
+            "id",
+            "quantity",
+            "quantity_key",
+            "name",
+            "kind",
+            "min_value",
+            "max_value",
+            "max_rate",
+            "window",
+            "threshold",
+            "is_active",
+        ]
+
+
+class AnomalyEventSerializer(serializers.ModelSerializer):
+    quantity_key = serializers.CharField(source="quantity.key", read_only=True)
+
+    class Meta:
+        model = AnomalyEvent
+        fields = [
+            "id",
+            "session",
+            "motor_group",
+            "csv_import",
+            "rule",
+            "kind",
+            "quantity",
+            "quantity_key",
+            "sensor",
+            "started_at",
+            "ended_at",
+            "point_count",
+            "peak_value",
+            "peak_score",
+        ]
+
+
+class CsvUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CsvImport
+        fields = [
+            "id",
+            "session",
+            "file_name",
+            "status",
+            "bytes_received",
+            "bytes_total",
+            "rows_processed",
+            "rows_failed",
+            "rows_duplicate",
+            "rows_reordered",
+            "error_message",
+            "created_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+class ThrottleStepSerializer(serializers.ModelSerializer):
+    metrics = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ThrottleStep
+        fields = ["index", "started_at", "ended_at", "throttle", "point_count", "metrics"]
+
+    def get_metrics(self, step):
+        return {m.quantity.key: {"mean": m.mean, "std": m.std, "count": m.count} for m in step.metrics.all()}
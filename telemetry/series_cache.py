@@ -0,0 +1,242 @@
+"""On-disk columnar cache of raw series for closed sessions.
+
+Once a session has ended and none of its imports is still running, its raw
+points never change. Each quantity is then stored as two ``.npy`` files —
+int64 timestamps (ns since the epoch, sorted) and float64 values — and reads
+memory-map those files and slice them with a binary search instead of asking
+InfluxDB. Requests never fill the cache themselves, a miss is answered by
+InfluxDB for just the requested window: a background thread fills a session
+once an import into an ended session succeeds or the session is ended
+(signals.py), and ``manage.py fill_series_cache`` fills the rest.
+
+File names carry the session's data version, so a re-import is never served
+stale data even if an invalidation signal was missed; reopening or
+re-importing a session also drops its directory outright. Entries are
+evicted least recently used first once the directory outgrows
+``SERIES_CACHE_MAX_BYTES``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .caching import annotate_data_version, data_version
+from .influx_repo import get_influx_repo
+from .models import Session
+from .registry import get_registry
+
+# numpy is imported on first use, like everywhere else outside the analysis modules.
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_ns(value: datetime) -> int:
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10**9 + delta.microseconds * 1000
+
+
+def _from_ns(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(value) // 1000)
+
+
+class CachedSeries:
+    """Memory-mapped points of one session/quantity/sensor, sorted by time."""
+
+    def __init__(self, timestamps: "np.ndarray", values: "np.ndarray") -> None:
+        self.timestamps = timestamps
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def window(self, from_dt: Optional[datetime] = None, to_dt: Optional[datetime] = None) -> slice:
+        """Index range of ``from_dt <= ts < to_dt``, like Flux ``range``."""
+        import numpy as np
+
+        start = int(np.searchsorted(self.timestamps, _to_ns(from_dt), "left")) if from_dt else 0
+        stop = int(np.searchsorted(self.timestamps, _to_ns(to_dt), "left")) if to_dt else len(self)
+        return slice(start, max(start, stop))
+
+    def points(self, selection: slice) -> List[dict]:
+        """Series API rows for ``selection``; the arrays themselves are sliced without copying."""
+        timestamps = self.timestamps[selection].tolist()
+        values = self.values[selection].tolist()
+        return [{"ts": _from_ns(ts).isoformat(), "value": value} for ts, value in zip(timestamps, values)]
+
+    def range(self, from_dt: Optional[datetime] = None, to_dt: Optional[datetime] = None) -> List[dict]:
+        return self.points(self.window(from_dt, to_dt))
+
+    def tail(self, limit: int) -> List[dict]:
+        return self.points(slice(max(len(self) - limit, 0), len(self)))
+
+
+class SeriesCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def eligible(session, version: Optional[str]) -> bool:
+        """Only ended sessions with no import in flight and raw points still in Influx are cached."""
+        return version is not None and session.ended_at is not None and session.raw_expired_at is None
+
+    def _paths(self, session_id: int, quantity: str, sensor_id: Optional[int], version: str) -> tuple[Path, Path]:
+        digest = hashlib.sha1(f"{quantity}:{sensor_id or ''}:{version}".encode()).hexdigest()[:20]
+        directory = self.root / str(session_id)
+        return directory / f"{digest}.ts.npy", directory / f"{digest}.val.npy"
+
+    def load(self, session_id: int, quantity: str, sensor_id: Optional[int], version: str) -> Optional[CachedSeries]:
+        import numpy as np
+
+        ts_path, val_path = self._paths(session_id, quantity, sensor_id, version)
+        try:
+            timestamps = np.load(ts_path, mmap_mode="r")
+            values = np.load(val_path, mmap_mode="r")
+            os.utime(ts_path)  # mtime is the LRU clock
+        except (FileNotFoundError, ValueError):
+            return None
+        if len(timestamps) != len(values):
+            return None
+        return CachedSeries(timestamps, values)
+
+    def store(self, session_id, quantity, sensor_id, version, times: List[datetime], values: List[float]) -> CachedSeries:
+        import numpy as np
+
+        timestamps = np.fromiter((_to_ns(t) for t in times), dtype=np.int64, count=len(times))
+        column = np.asarray(values, dtype=np.float64)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, column = timestamps[order], column[order]
+
+        ts_path, val_path = self._paths(session_id, quantity, sensor_id, version)
+        ts_path.parent.mkdir(parents=True, exist_ok=True)
+        # Values first, timestamps last: a reader that finds the .ts file always finds both.
+        for path, array in ((val_path, column), (ts_path, timestamps)):
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp:
+                np.save(tmp, array)
+            os.replace(tmp_name, path)
+        self.evict()
+        return self.load(session_id, quantity, sensor_id, version) or CachedSeries(timestamps, column)
+
+    def get_or_fill(self, session, version: str, quantity: str, sensor_id: Optional[int], repo) -> CachedSeries:
+        cached = self.load(session.id, quantity, sensor_id, version)
+        if cached is None:
+            times, values = repo.query_raw_columns(session.id, quantity, sensor_id)
+            cached = self.store(session.id, quantity, sensor_id, version, times, values)
+        return cached
+
+    def invalidate(self, session_id: int) -> None:
+        shutil.rmtree(self.root / str(session_id), ignore_errors=True)
+
+    def usage(self) -> int:
+        return sum(path.stat().st_size for path in self.root.glob("*/*.npy"))
+
+    def evict(self) -> None:
+        """Drop least recently read entries until the cache fits into ``max_bytes``."""
+        with self._lock:
+            entries = []
+            total = 0
+            for ts_path in self.root.glob("*/*.ts.npy"):
+                val_path = ts_path.with_name(ts_path.name.replace(".ts.npy", ".val.npy"))
+                try:
+                    size = ts_path.stat().st_size + (val_path.stat().st_size if val_path.exists() else 0)
+                    entries.append((ts_path.stat().st_mtime, size, ts_path, val_path))
+                except FileNotFoundError:
+                    continue
+                total += size
+            entries.sort(key=lambda entry: entry[0])
+            for _, size, ts_path, val_path in entries:
+                if total <= self.max_bytes:
+                    break
+                ts_path.unlink(missing_ok=True)
+                val_path.unlink(missing_ok=True)
+                total -= size
+
+
+def get_series_cache() -> SeriesCache:
+    return SeriesCache(settings.SERIES_CACHE_DIR, settings.SERIES_CACHE_MAX_BYTES)
+
+
+def cached_series(session, version: Optional[str], query, limit: int) -> Optional[List[dict]]:
+    """Serve a raw series request from the cache, or ``None`` when it must go to Influx.
+
+    Downsampled requests (``resolution``) are left to Influx and its rollup tiers.
+    """
+    cache = get_series_cache()
+    if query.resolution is not None or not cache.enabled or not cache.eligible(session, version):
+        return None
+    try:
+        series = cache.load(session.id, query.quantity_key, query.sensor_id, version)
+    except OSError:
+        logger.warning("series cache unavailable for session %s", session.id, exc_info=True)
+        return None
+    if series is None:
+        return None
+    if query.from_dt or query.to_dt:
+        return series.range(query.from_dt, query.to_dt)
+    return series.tail(limit)
+
+
+def fill_session(session: Session, cache: Optional[SeriesCache] = None) -> Optional[int]:
+    """Store every quantity of an annotated session; returns the points cached, ``None`` if not eligible."""
+    cache = cache or get_series_cache()
+    version = data_version(session)
+    if not cache.enabled or not cache.eligible(session, version):
+        return None
+    repo = get_influx_repo(session)
+    return sum(len(cache.get_or_fill(session, version, q.key, None, repo)) for q in get_registry().quantities())
+
+
+_FILLING: set = set()
+_FILLING_LOCK = threading.Lock()
+
+
+def schedule_fill(session_id: int) -> None:
+    """Fill the session's cache in a background thread once the current transaction commits."""
+    if get_series_cache().enabled:
+        transaction.on_commit(lambda: _start_fill(session_id))
+
+
+def _start_fill(session_id: int) -> None:
+    with _FILLING_LOCK:
+        if session_id in _FILLING:
+            return  # one fill per session at a time
+        _FILLING.add(session_id)
+    threading.Thread(target=_fill_in_background, args=(session_id,), name=f"series-cache-{session_id}", daemon=True).start()
+
+
+def _fill_in_background(session_id: int) -> None:
+    try:
+        session = annotate_data_version(Session.objects.filter(pk=session_id)).first()
+        if session is not None:
+            fill_session(session)
+    except Exception:  # noqa: BLE001
+        logger.warning("series cache fill failed for session %s", session_id, exc_info=True)
+    finally:
+        with _FILLING_LOCK:
+            _FILLING.discard(session_id)
+        connection.close()
+
+
+def invalidate_session(session_id: int) -> None:
+    get_series_cache().invalidate(session_id)
@@ -1,16 +1,40 @@
 from __future__ import annotations
 
 import csv
-import io
+from dataclasses import dataclass
+from datetime import timedelta
+from itertools import islice
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
-from .influx_repo import get_influx_repo
-from .models import CsvImport, MeasuredQuantity, Sensor, SensorChannel, Session, Stand
+from .caching import RESULT_CACHE_TIMEOUT, motor_group_data_version, result_cache_key
+from .influx_repo import ROLLUP_TIERS, InfluxRepository, get_influx_repo
+from .models import (
+    CsvImport,
+    ImportProfile,
+    MotorGroup,
+    Sensor,
+    SensorChannel,
+    Session,
+    SessionRollup,
+    StepMetric,
+    ThrottleStep,
+)
+from .previews import PreviewBuilder
+from .registry import QuantityInfo, get_registry
+from .reorder import ReorderBuffer
+from .shards import assign_shard, group_shards, profile_stand
+from .writers import WriterPool
+from .uploads import CORRUPT_INPUT_ERRORS, detect_compression, open_csv_text
 
 
-REQUIRED_COLUMNS = ["ts", "throttle", "temperature", "humidity", "rpm", "noise", "thrust"]
+TIMESTAMP_COLUMN = "ts"
+# Columns recognised without an import profile: CSV header -> MeasuredQuantity.key.
+# Any other header that equals a quantity key is imported as well.
 QUANTITY_FIELDS = {
     "throttle": "throttle",
     "temperature": "temperature",
@@ -19,33 +43,95 @@ QUANTITY_FIELDS = {
     "noise": "noise",
     "thrust": "thrust",
 }
+AUTO_SENSOR_NAME = "Auto Sensor"
+# Rows parsed, written to InfluxDB and run through the detectors at a time.
+IMPORT_CHUNK_ROWS = 5000
+# Points per write_api.write call; the writer threads each take one batch at a time.
+INFLUX_WRITE_BATCH = 5000
 
 
-def ensure_default_stand() -> Stand:
-    stand, _ = Stand.objects.get_or_create(
-        name="Default Stand",
-        defaults={"location": "", "description": "Основной стенд"},
-    )
-    return stand
+@dataclass(frozen=True)
+class ColumnTarget:
+    """A CSV column bound to the sensor channel its values are written under."""
 
+    index: int
+    column: str
+    quantity_key: str
+    sensor_id: int
 
-def resolve_sensor_for_quantity(quantity: MeasuredQuantity, sensor_cache: dict) -> Sensor:
-    if quantity.key in sensor_cache:
-        return sensor_cache[quantity.key]
-    channel = (
-        SensorChannel.objects.select_related("sensor")
-        .filter(quantity=quantity)
-        .order_by("sensor_id")
-        .first()
-    )
-    if channel:
-        sensor_cache[quantity.key] = channel.sensor
-        return channel.sensor
-    stand = ensure_default_stand()
-    sensor, _ = Sensor.objects.get_or_create(stand=stand, name="Auto Sensor")
-    SensorChannel.objects.get_or_create(sensor=sensor, quantity=quantity)
-    sensor_cache[quantity.key] = sensor
-    return sensor
+
+def _column_specs(headers: list[str], profile: ImportProfile | None) -> list[tuple[str, QuantityInfo, int | None]]:
+    registry = get_registry()
+    if profile is None:
+        specs = []
+        for header in headers:
+            quantity = registry.quantity(QUANTITY_FIELDS.get(header, header))
+            if quantity is not None:
+                specs.append((header, quantity, None))
+        if not specs:
+            raise ValueError("В CSV нет колонок с известными величинами")
+        return specs
+
+    specs = []
+    for column, quantity_key, sensor_id in profile.columns.values_list("column", "quantity__key", "sensor_id"):
+        quantity = registry.quantity(quantity_key)
+        if quantity is None:
+            raise ValueError(f"Неизвестная величина: {quantity_key}")
+        specs.append((column.strip().lower(), quantity, sensor_id))
+    if not specs:
+        raise ValueError(f"В профиле импорта «{profile.name}» нет колонок")
+    missing = {name for name, _, _ in specs if name not in headers}
+    if missing:
+        raise ValueError(f"Отсутствуют колонки: {', '.join(sorted(missing))}")
+    return specs
+
+
+def build_column_plan(headers: list[str], profile: ImportProfile | None = None) -> list[ColumnTarget]:
+    """Bind CSV columns to sensor channels before any row is read.
+
+    Channels missing for an explicit sensor, and quantities without any
+    channel at all, are created in bulk inside a single transaction, so the
+    row loop never has to touch the ORM.
+    """
+    specs = _column_specs(headers, profile)
+    registry = get_registry()
+    with transaction.atomic():
+        sensor_ids: dict[str, int] = {}
+        to_create: set[tuple[int, int]] = set()
+        unassigned: list[tuple[str, QuantityInfo]] = []
+        for name, quantity, sensor_id in specs:
+            channels = registry.channels_for(quantity.key)
+            if sensor_id is None:
+                if channels:
+                    sensor_ids[name] = channels[0].sensor_id
+                else:
+                    unassigned.append((name, quantity))
+                continue
+            sensor_ids[name] = sensor_id
+            if not any(c.sensor_id == sensor_id for c in channels):
+                to_create.add((sensor_id, quantity.id))
+
+        if unassigned:
+            auto_sensor, _ = Sensor.objects.get_or_create(
+                stand_id=registry.default_stand_id(), name=AUTO_SENSOR_NAME
+            )
+            for name, quantity in unassigned:
+                sensor_ids[name] = auto_sensor.id
+                to_create.add((auto_sensor.id, quantity.id))
+
+        if to_create:
+            SensorChannel.objects.bulk_create(
+                [SensorChannel(sensor_id=sensor_id, quantity_id=quantity_id) for sensor_id, quantity_id in sorted(to_create)],
+                ignore_conflicts=True,
+            )
+            # bulk_create bypasses post_save, so the registry is reset by hand.
+            registry.invalidate()
+            transaction.on_commit(registry.bump_version)
+
+    return [
+        ColumnTarget(index=headers.index(name), column=name, quantity_key=quantity.key, sensor_id=sensor_ids[name])
+        for name, quantity, _ in specs
+    ]
 
 
 def parse_timestamp(raw: str):
@@ -58,77 +144,185 @@ def parse_timestamp(raw: str):
     return dt
 
 
-def import_csv_to_session(session: Session, file_obj, file_name: str | None = None, *, rethrow: bool = False) -> CsvImport:
-    csv_import = CsvImport.objects.create(
-        session=session,
-        status=CsvImport.STATUS_PENDING,
-        file_name=file_name or getattr(file_obj, "name", ""),
-    )
-    sensor_cache = {}
-    processed = 0
+def _parse_chunk(rows, ts_index: int, plan: list[ColumnTarget]):
+    """Parse CSV rows into timestamps and per-column values (None for blank cells).
+
+    Returns ``(timestamps, columns, failed)``; ``columns`` is aligned with ``plan``.
+    """
+    timestamps = []
+    columns: list[list[float | None]] = [[] for _ in plan]
     failed = 0
-    points: list[dict] = []
+    for row in rows:
+        ts = parse_timestamp(row[ts_index]) if ts_index < len(row) else None
+        if not ts:
+            failed += 1
+            continue
+        values = []
+        try:
+            for target in plan:
+                raw_val = row[target.index].strip() if target.index < len(row) else ""
+                values.append(float(raw_val) if raw_val != "" else None)
+        except ValueError:
+            failed += 1
+            continue
+        if all(value is None for value in values):
+            failed += 1
+            continue
+        timestamps.append(ts)
+        for column, value in zip(columns, values):
+            column.append(value)
+    return timestamps, columns, failed
 
-    try:
-        content = file_obj.read()
-        if isinstance(content, bytes):
-            content = content.decode("utf-8")
-        if hasattr(file_obj, "seek"):
-            file_obj.seek(0)
-        reader = csv.DictReader(io.StringIO(content))
-        if not reader.fieldnames:
-            raise ValueError("Пустой CSV")
-        normalized_headers = [h.strip().lower() for h in reader.fieldnames]
-        missing = {col for col in REQUIRED_COLUMNS if col not in normalized_headers}
-        if missing:
-            raise ValueError(f"Отсутствуют колонки: {', '.join(sorted(missing))}")
-
-        quantity_map = {key: MeasuredQuantity.objects.get(key=val) for key, val in QUANTITY_FIELDS.items()}
-        repo = get_influx_repo()
-
-        for row in reader:
-            normalized = {k.strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
-            ts = parse_timestamp(normalized.get("ts", ""))
-            if not ts:
-                failed += 1
-                continue
-            row_points = []
-            row_failed = False
-            for column, quantity_key in QUANTITY_FIELDS.items():
-                raw_val = normalized.get(column)
-                if raw_val in (None, ""):
-                    continue
-                try:
-                    value = float(raw_val)
-                except (TypeError, ValueError):
-                    row_failed = True
-                    break
-                sensor = resolve_sensor_for_quantity(quantity_map[quantity_key], sensor_cache)
-                row_points.append(
-                    {
-                        "ts": ts,
-                        "value": value,
-                        "sensor_id": sensor.id,
-                        "quantity": quantity_key,
-                    }
+
+def _chunk_points(timestamps, columns, plan: list[ColumnTarget]) -> list[dict]:
+    points = []
+    for i, ts in enumerate(timestamps):
+        for target, column in zip(plan, columns):
+            value = column[i]
+            if value is not None:
+                points.append(
+                    {"ts": ts, "value": value, "sensor_id": target.sensor_id, "quantity": target.quantity_key}
                 )
-            if row_failed:
-                failed += 1
+    return points
+
+
+class CsvImporter:
+    """Import state of one CsvImport: column plan, row counters, reorder buffer, detectors and preview.
+
+    ``import_csv_to_session`` drives it over a single stream; resumable
+    uploads drive it chunk by chunk across requests, keeping ``state()`` on
+    the CsvImport in between and rebuilding the importer with ``restore()``.
+    """
+
+    def __init__(self, csv_import: CsvImport, repo: InfluxRepository | None = None) -> None:
+        self.csv_import = csv_import
+        if repo is None:
+            session = csv_import.session
+            assign_shard(session, profile_stand(csv_import.profile))
+            repo = get_influx_repo(session)
+        self.repo = repo
+        self.headers: list[str] | None = None
+
+    def start(self, header_row: list[str]) -> None:
+        profile = self.csv_import.profile
+        headers = [h.strip().lower() for h in header_row]
+        ts_column = profile.timestamp_column.strip().lower() if profile else TIMESTAMP_COLUMN
+        if ts_column not in headers:
+            raise ValueError(f"Отсутствуют колонки: {ts_column}")
+        self.headers = headers
+        self.ts_index = headers.index(ts_column)
+        self.plan = build_column_plan(headers, profile)
+        from .detectors import AnomalyDetector  # numpy is loaded on the first import, not at boot
+
+        self.detector = AnomalyDetector.for_import(self.csv_import.session, self.csv_import, self.plan)
+        self.preview = PreviewBuilder()
+        self.preview_keys = [target.quantity_key for target in self.plan]
+        window = profile.reorder_window if profile and profile.reorder_window is not None else settings.CSV_REORDER_WINDOW
+        policy = (profile.duplicate_policy if profile else "") or settings.CSV_DUPLICATE_POLICY
+        self.reorder = ReorderBuffer(window, policy)
+        self.writer = WriterPool(
+            self.repo, self.csv_import.session, settings.CSV_IMPORT_WRITERS, settings.CSV_IMPORT_WRITE_QUEUE
+        )
+
+    def feed(self, rows) -> None:
+        """Parse, reorder, write and run detectors over ``rows`` in chunks of IMPORT_CHUNK_ROWS."""
+        csv_import = self.csv_import
+        rows = (row for row in rows if row)
+        while chunk := list(islice(rows, IMPORT_CHUNK_ROWS)):
+            timestamps, columns, chunk_failed = _parse_chunk(chunk, self.ts_index, self.plan)
+            csv_import.rows_failed += chunk_failed
+            if not timestamps:
                 continue
-            if row_points:
-                points.extend(row_points)
-                processed += 1
-            else:
-                failed += 1
+            csv_import.rows_processed += len(timestamps)
+            self._write(*self.reorder.push(timestamps, columns))
+
+    def _write(self, timestamps, columns) -> None:
+        csv_import = self.csv_import
+        csv_import.rows_duplicate = self.reorder.duplicates
+        csv_import.rows_reordered = self.reorder.reordered
+        if not timestamps:
+            return
+        points = _chunk_points(timestamps, columns, self.plan)
+        for offset in range(0, len(points), INFLUX_WRITE_BATCH):
+            self.writer.submit(points[offset : offset + INFLUX_WRITE_BATCH])
+        self.detector.feed(timestamps, columns)
+        self.preview.feed(timestamps, columns, self.preview_keys)
 
-        if points:
-            repo.write_points(session, points)
+    def flush(self) -> None:
+        """Wait until every queued batch is in InfluxDB; raises the first write error."""
+        self.writer.join()
 
-        if processed == 0:
+    def close(self) -> None:
+        """Stop the writer threads after a failure, dropping batches not yet written."""
+        self.writer.join(abort=True)
+
+    def finish(self) -> None:
+        self._write(*self.reorder.drain(len(self.plan)))
+        self.flush()
+        self.detector.finish()
+        if self.csv_import.rows_processed == 0:
             raise ValueError("Нет валидных строк для импорта")
+        self.preview.save(self.csv_import.session)
+
+    def state(self) -> dict:
+        return {
+            "headers": self.headers,
+            "detectors": self.detector.state(),
+            "preview": self.preview.state(),
+            "reorder": self.reorder.state(),
+        }
+
+    @classmethod
+    def restore(cls, csv_import: CsvImport, state: dict, repo: InfluxRepository | None = None) -> "CsvImporter":
+        importer = cls(csv_import, repo)
+        importer.start(state["headers"])
+        importer.detector.restore(state["detectors"])
+        importer.preview = PreviewBuilder.restore(state.get("preview"))
+        importer.reorder.restore(state.get("reorder"))
+        return importer
+
+
+def import_csv_to_session(
+    session: Session,
+    file_obj,
+    file_name: str | None = None,
+    *,
+    profile: ImportProfile | None = None,
+    content_encoding: str | None = None,
+    rethrow: bool = False,
+    repo: InfluxRepository | None = None,
+) -> CsvImport:
+    """Stream a CSV file (optionally gzip/zstd compressed) into InfluxDB.
+
+    Compression comes from ``content_encoding``, the file name suffix or the
+    file's magic bytes; rows are decompressed, parsed and written chunk by
+    chunk.
+    """
+    file_name = file_name or getattr(file_obj, "name", "")
+    csv_import = CsvImport.objects.create(
+        session=session,
+        status=CsvImport.STATUS_PENDING,
+        file_name=file_name,
+        profile=profile,
+    )
+    # New raw points make existing rollups incomplete until the next rollup run.
+    SessionRollup.objects.filter(session=session).update(is_stale=True)
 
+    try:
+        compression = detect_compression(file_obj, file_name, content_encoding)
+        reader = csv.reader(open_csv_text(file_obj, compression))
+        header_row = next(reader, None)
+        if not header_row:
+            raise ValueError("Пустой CSV")
+        importer = CsvImporter(csv_import, repo)
+        importer.start(header_row)
+        try:
+            importer.feed(reader)
+            importer.finish()
+        finally:
+            importer.close()
         csv_import.status = CsvImport.STATUS_SUCCESS
-    except ValueError as exc:
+    except (ValueError, *CORRUPT_INPUT_ERRORS) as exc:
         csv_import.status = CsvImport.STATUS_FAILED
         csv_import.error_message = str(exc)
     except Exception as exc:  # noqa: BLE001
@@ -137,8 +331,172 @@ def import_csv_to_session(session: Session, file_obj, file_name: str | None = No
         if rethrow:
             raise
     finally:
-        csv_import.rows_processed = processed
-        csv_import.rows_failed = failed
         csv_import.finished_at = timezone.now()
         csv_import.save()
     return csv_import
+
+
+def available_rollup_tiers(session: Session) -> list[str]:
+    """Rollup tiers the series API may read for ``session``.
+
+    Stale tiers are skipped while raw points still exist; once raw data has
+    expired they are the only copy left and are used regardless.
+    """
+    qs = SessionRollup.objects.filter(session_id=session.id)
+    if session.raw_expired_at is None:
+        qs = qs.filter(is_stale=False)
+    return list(qs.values_list("tier", flat=True))
+
+
+async def aavailable_rollup_tiers(session: Session) -> list[str]:
+    qs = SessionRollup.objects.filter(session_id=session.id)
+    if session.raw_expired_at is None:
+        qs = qs.filter(is_stale=False)
+    return [tier async for tier in qs.values_list("tier", flat=True)]
+
+
+def rollup_session_data(session: Session, repo: InfluxRepository | None = None) -> list[str]:
+    """(Re)build every missing or stale rollup tier of ``session``; returns the tiers written."""
+    repo = repo or get_influx_repo(session)
+    current = {r.tier: r for r in SessionRollup.objects.filter(session=session)}
+    written = []
+    for tier in ROLLUP_TIERS:
+        if tier not in repo.rollup_buckets:
+            continue
+        rollup = current.get(tier)
+        if rollup is not None and not rollup.is_stale:
+            continue
+        repo.rollup_session(session.id, tier)
+        SessionRollup.objects.update_or_create(session=session, tier=tier, defaults={"is_stale": False})
+        written.append(tier)
+    return written
+
+
+def expire_session_raw_data(session: Session, repo: InfluxRepository | None = None) -> bool:
+    """Drop raw points of ``session`` if every configured tier holds a fresh rollup."""
+    repo = repo or get_influx_repo(session)
+    fresh = set(
+        SessionRollup.objects.filter(session=session, is_stale=False).values_list("tier", flat=True)
+    )
+    if not repo.rollup_buckets or not set(repo.rollup_buckets) <= fresh:
+        return False
+    repo.expire_raw(session.id)
+    session.raw_expired_at = timezone.now()
+    session.save(update_fields=["raw_expired_at"])
+    return True
+
+
+THROTTLE_QUANTITY = "throttle"
+
+
+def analyze_session_steps(
+    session: Session,
+    repo: InfluxRepository | None = None,
+    resolution: timedelta = timedelta(seconds=1),
+    tolerance: float = 1.0,
+    min_duration: float = 3.0,
+    settle: float = 1.0,
+) -> list[ThrottleStep]:
+    """Detect throttle plateaus of ``session`` and store per-step steady-state metrics.
+
+    All quantities are read once on a common ``resolution`` grid; previous
+    steps of the session are replaced.
+    """
+    from .analysis import interpolate_gaps, segment_stats, segment_throttle_steps
+
+    repo = repo or get_influx_repo(session)
+    registry = get_registry()
+    quantities = {q.key: q for q in registry.quantities()}
+    if THROTTLE_QUANTITY not in quantities:
+        raise ValueError(f"Не найдена величина {THROTTLE_QUANTITY}")
+    times, columns = repo.query_aligned(
+        session.id,
+        list(quantities),
+        resolution,
+        tiers=available_rollup_tiers(session),
+        raw_available=session.raw_expired_at is None,
+    )
+    segments = segment_throttle_steps(
+        interpolate_gaps(columns[THROTTLE_QUANTITY], times),
+        resolution.total_seconds(),
+        tolerance=tolerance,
+        min_duration=min_duration,
+        settle=settle,
+    )
+    stats = {key: segment_stats(values, segments) for key, values in columns.items()}
+
+    with transaction.atomic():
+        ThrottleStep.objects.filter(session=session).delete()
+        steps = ThrottleStep.objects.bulk_create(
+            [
+                ThrottleStep(
+                    session=session,
+                    index=index,
+                    started_at=times[segment.start],
+                    ended_at=times[segment.stop - 1],
+                    throttle=segment.throttle,
+                    point_count=segment.stop - segment.start,
+                )
+                for index, segment in enumerate(segments, start=1)
+            ]
+        )
+        StepMetric.objects.bulk_create(
+            [
+                StepMetric(step=step, quantity_id=quantities[key].id, mean=mean, std=std, count=count)
+                for key, per_step in stats.items()
+                for step, (mean, std, count) in zip(steps, per_step)
+                if count
+            ]
+        )
+        session.steps_analyzed_at = timezone.now()
+        session.save(update_fields=["steps_analyzed_at"])
+    return steps
+
+
+# Dashboard column -> quantity whose per-session maximum it shows.
+DASHBOARD_METRICS = {"peak_thrust": "thrust", "max_temperature": "temperature", "max_rpm": "rpm"}
+
+
+def motor_group_dashboard(group: MotorGroup, repo: InfluxRepository | None = None) -> list[dict]:
+    """Peak values and run duration of every session of ``group``.
+
+    The Influx part comes from one grouped query and is cached until the next
+    import into any session of the group; names and dates are read fresh.
+    """
+    sessions = list(
+        Session.objects.filter(motor_group=group).only(
+            "id", "name", "started_at", "ended_at", "raw_expired_at", "influx_shard"
+        )
+    )
+    version = motor_group_data_version(group.id)
+    key = result_cache_key("group-dashboard", f"{group.id}:{version}") if version is not None else None
+    summary = cache.get(key) if key else None
+    if summary is None:
+        # Sessions of a group may sit in several shards; each one reports its own.
+        summary = {}
+        repos = [repo] if repo else [get_influx_repo(shard=name) for name in group_shards(group.name, sessions)]
+        for shard_repo in repos:
+            summary.update(
+                shard_repo.query_group_summary(
+                    group.id,
+                    list(DASHBOARD_METRICS.values()),
+                    expired_session_ids=[s.id for s in sessions if s.raw_expired_at is not None],
+                )
+            )
+        if key:
+            cache.set(key, summary, RESULT_CACHE_TIMEOUT)
+
+    rows = []
+    for session in sessions:
+        data = summary.get(str(session.id), {})
+        first, last = data.get("first"), data.get("last")
+        row = {
+            "session": session.id,
+            "name": session.name,
+            "started_at": session.started_at,
+            "ended_at": session.ended_at,
+            "duration_s": (last - first).total_seconds() if first and last else None,
+        }
+        row.update({column: data.get(quantity) for column, quantity in DASHBOARD_METRICS.items()})
+        rows.append(row)
+    return rows
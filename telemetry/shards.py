@@ -0,0 +1,196 @@
+"""Routing of sessions to InfluxDB shards.
+
+A shard is one InfluxDB instance/bucket set. ``default`` is INFLUX_SETTINGS;
+INFLUX_SHARDS adds named shards, each overriding any INFLUX_SETTINGS key
+(``url``, ``token``, ``bucket``, ``rollup_buckets``, ``standin`` ...).
+Every shard gets one repository with its own pooled client.
+
+A session's points live in exactly one shard, stored in
+``Session.influx_shard``. The first import picks it from INFLUX_SHARD_MAP:
+the stand of the import profile's sensors first, then the motor group name,
+else ``default``. Reads of a session not written yet follow the motor group
+entry. ``manage.py move_session_shard`` copies a session to another shard,
+switches it over and queues the old copy for deletion.
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from .influx_repo import InfluxRepository, build_influx_repo
+from .models import CsvImport, ImportProfile, InfluxDeletionJob, Session, Stand
+
+DEFAULT_SHARD = "default"
+MOVE_BATCH = 5000
+
+_REPOS: Dict[tuple, InfluxRepository] = {}
+_REPOS_LOCK = threading.Lock()
+
+
+def shard_settings() -> Dict[str, dict]:
+    """Settings of every shard by name, ``default`` first."""
+    base = getattr(settings, "INFLUX_SETTINGS", {})
+    shards = {DEFAULT_SHARD: base}
+    for name, overrides in getattr(settings, "INFLUX_SHARDS", {}).items():
+        shards[name] = {**base, **overrides}
+    return shards
+
+
+def shard_repo(name: str) -> InfluxRepository:
+    cfg = shard_settings().get(name)
+    if cfg is None:
+        raise ValueError(f"Неизвестный шард InfluxDB: {name}")
+    # Keyed by the settings too, so override_settings and reconfiguration get fresh repositories.
+    key = (name, repr(sorted(cfg.items())))
+    with _REPOS_LOCK:
+        repo = _REPOS.get(key)
+        if repo is None:
+            repo = _REPOS[key] = _build(name, cfg)
+    return repo
+
+
+@atexit.register
+def _close_clients() -> None:
+    # Close pooled connections before interpreter teardown, when the client can no longer do it itself.
+    with _REPOS_LOCK:
+        repos = list(_REPOS.values())
+        _REPOS.clear()
+    for repo in repos:
+        repo.close()
+
+
+def _build(name: str, cfg: dict) -> InfluxRepository:
+    if not cfg.get("standin"):
+        return build_influx_repo(cfg)
+    from .standin import StandInInfluxRepository, shared_standin
+
+    # The default stand-in is the process-wide one loadtest writes to; other shards get their own.
+    return shared_standin() if name == DEFAULT_SHARD else StandInInfluxRepository()
+
+
+def all_shard_repos() -> List[InfluxRepository]:
+    return [shard_repo(name) for name in shard_settings()]
+
+
+def mapped_shard(motor_group_name: str, stand_name: Optional[str] = None) -> str:
+    shard_map = getattr(settings, "INFLUX_SHARD_MAP", {})
+    if stand_name and stand_name in shard_map.get("stands", {}):
+        return shard_map["stands"][stand_name]
+    return shard_map.get("motor_groups", {}).get(motor_group_name, DEFAULT_SHARD)
+
+
+def session_shard(session: Session) -> str:
+    if session.influx_shard:
+        return session.influx_shard
+    return mapped_shard(session.motor_group.name)
+
+
+def group_shards(group_name: str, sessions: Iterable[Session]) -> List[str]:
+    """Shards holding the sessions of one motor group; the group's mapped shard for none."""
+    mapped = mapped_shard(group_name)
+    return sorted({session.influx_shard or mapped for session in sessions} or {mapped})
+
+
+def profile_stand(profile: Optional[ImportProfile]) -> Optional[Stand]:
+    """The stand all of a profile's mapped sensors belong to, if there is exactly one."""
+    if profile is None:
+        return None
+    stands = Stand.objects.filter(sensors__profile_columns__profile=profile).distinct()[:2]
+    return stands[0] if len(stands) == 1 else None
+
+
+def assign_shard(session: Session, stand: Optional[Stand] = None) -> str:
+    """Pin the shard of a session on its first write; later calls return the pinned one."""
+    if session.influx_shard:
+        return session.influx_shard
+    shard = mapped_shard(session.motor_group.name, stand.name if stand else None)
+    # Only the first import pins, even when two start at once.
+    Session.objects.filter(pk=session.pk, influx_shard="").update(influx_shard=shard)
+    session.influx_shard = Session.objects.values_list("influx_shard", flat=True).get(pk=session.pk)
+    return session.influx_shard
+
+
+def _bucket_pairs(source: InfluxRepository, target: InfluxRepository, session: Session) -> List[tuple[str, str]]:
+    pairs = [(source.bucket, target.bucket)]
+    for tier in session.rollups.values_list("tier", flat=True):
+        if tier not in source.rollup_buckets:
+            continue
+        if tier not in target.rollup_buckets:
+            raise ValueError(f"У целевого шарда нет бакета агрегатов {tier}")
+        pairs.append((source.rollup_buckets[tier], target.rollup_buckets[tier]))
+    return pairs
+
+
+def _import_running(session: Session) -> bool:
+    return CsvImport.objects.filter(session=session, status=CsvImport.STATUS_PENDING).exists()
+
+
+def _last_import_id(session: Session) -> Optional[int]:
+    return CsvImport.objects.filter(session=session).aggregate(last=Max("id"))["last"]
+
+
+def _old_copy_pending(session: Session, shard: str) -> bool:
+    """A move queued the deletion of the session's copy in ``shard`` and it has not run yet."""
+    return InfluxDeletionJob.objects.filter(
+        session_id=session.id,
+        shard=shard,
+        status__in=(InfluxDeletionJob.STATUS_PENDING, InfluxDeletionJob.STATUS_RUNNING),
+    ).exists()
+
+
+def move_session(session: Session, target: str, batch_size: int = MOVE_BATCH) -> int:
+    """Copy a session's points (raw and rollups) to ``target``, switch the session to it and
+    queue the old copy for deletion. Returns the number of points copied.
+
+    Reads keep going to the old shard until the copy is complete. A move is
+    refused while an import into the session is running or has run during
+    the copy, and while the deletion of an earlier copy in ``target`` is
+    still queued (it would delete the new copy).
+    """
+    source = session_shard(session)
+    if target == source:
+        return 0
+    target_repo = shard_repo(target)
+    source_repo = shard_repo(source)
+    if _import_running(session):
+        raise ValueError("В сессию идёт импорт, перенос невозможен")
+    if _old_copy_pending(session, target):
+        raise ValueError(f"Старая копия сессии в шарде {target} ещё не удалена, сначала выполните process_influx_deletions")
+    last_import = _last_import_id(session)
+
+    copied = 0
+    for source_bucket, target_bucket in _bucket_pairs(source_repo, target_repo, session):
+        batch = []
+        for record in source_repo.export_points(session.id, source_bucket):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                target_repo.write_records(target_bucket, batch)
+                copied += len(batch)
+                batch = []
+        target_repo.write_records(target_bucket, batch)
+        copied += len(batch)
+
+    with transaction.atomic():
+        locked = Session.objects.select_for_update().get(pk=session.pk)
+        # An import that started, even one that already finished, wrote to the old shard after its export.
+        # Those points would be lost; the copy is simply rewritten next time.
+        if _import_running(locked) or _last_import_id(locked) != last_import:
+            raise ValueError("Во время переноса шёл импорт, сессия осталась в прежнем шарде")
+        if _old_copy_pending(locked, target):
+            raise ValueError(f"Старая копия сессии в шарде {target} ещё не удалена, сначала выполните process_influx_deletions")
+        Session.objects.filter(pk=session.pk).update(influx_shard=target)
+        InfluxDeletionJob.objects.create(
+            session_id=session.id,
+            motor_group_id=session.motor_group_id,
+            label=f"{session} ({source})",
+            reason=InfluxDeletionJob.REASON_MOVED,
+            shard=source,
+        )
+    session.influx_shard = target
+    return copied
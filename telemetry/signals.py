@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import CsvImport, MeasuredQuantity, Sensor, SensorChannel, Session, Stand
+from .registry import registry
+from .series_cache import invalidate_session, schedule_fill
+
+
+@receiver(post_save, sender=MeasuredQuantity)
+@receiver(post_delete, sender=MeasuredQuantity)
+@receiver(post_save, sender=Sensor)
+@receiver(post_delete, sender=Sensor)
+@receiver(post_save, sender=SensorChannel)
+@receiver(post_delete, sender=SensorChannel)
+@receiver(post_save, sender=Stand)
+@receiver(post_delete, sender=Stand)
+def invalidate_registry(sender, **kwargs):
+    registry.invalidate()
+    # Bump again once the change is visible to other connections, so a worker
+    # that reloaded in between does not keep the pre-commit catalog.
+    transaction.on_commit(registry.bump_version)
+
+
+@receiver(pre_save, sender=Session)
+def note_session_changes(sender, instance, **kwargs):
+    previous = Session.objects.filter(pk=instance.pk).values("ended_at", "motor_group_id").first() if instance.pk else None
+    instance._ending = instance.ended_at is not None and (previous is None or previous["ended_at"] is None)
+    if previous and previous["motor_group_id"] != instance.motor_group_id and instance.influx_shard:
+        instance.motor_group_changed = True
+
+
+@receiver(post_save, sender=Session)
+def invalidate_reopened_session_series(sender, instance, **kwargs):
+    # Only ended sessions are cached, so a save without ``ended_at`` means it was reopened.
+    if instance.ended_at is None:
+        invalidate_session(instance.pk)
+    elif getattr(instance, "_ending", False):
+        schedule_fill(instance.pk)
+
+
+@receiver(post_delete, sender=Session)
+def invalidate_deleted_session_series(sender, instance, **kwargs):
+    invalidate_session(instance.pk)
+
+
+@receiver(post_save, sender=CsvImport)
+def invalidate_reimported_session_series(sender, instance, created, **kwargs):
+    if created:
+        invalidate_session(instance.session_id)
+    elif instance.status == CsvImport.STATUS_SUCCESS and instance.session.ended_at is not None:
+        schedule_fill(instance.session_id)
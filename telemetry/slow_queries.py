@@ -0,0 +1,193 @@
+"""Log of Flux queries slower than ``INFLUX_SLOW_QUERY_MS``.
+
+Every query :class:`~telemetry.influx_repo.InfluxRepository` sends is timed.
+One that takes at least the threshold, or fails after it, is saved as a
+:class:`~telemetry.models.SlowQuery` row. The row holds the Flux text, the
+arguments of the repository method, the duration, rows returned, the
+approximate response size, and the view that asked for it. The table keeps
+the newest ``INFLUX_SLOW_QUERY_LOG_SIZE`` rows. Queries are grouped by
+*shape*: the Flux with literals replaced by ``?``, so the same query for
+different sessions and intervals falls into one group in the admin.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import logging
+import re
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+BYTES_SAMPLE = 200
+
+# Repository method and its arguments, set by @logged_query around the call.
+_method: ContextVar[Optional[tuple[str, dict]]] = ContextVar("influx_query_method", default=None)
+# URL name of the view being served, set by SlowQueryViewMiddleware.
+current_view: ContextVar[str] = ContextVar("influx_query_view", default="")
+
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?(?:ns|us|ms|mo|s|m|h|d|w|y)?(?![\w.])")
+_REPEATED = re.compile(r"(r\.\w+ == \?)(?: or \1)+")
+
+
+def query_shape(flux: str) -> tuple[str, str]:
+    """``(digest, text)`` of the Flux with literals replaced by ``?`` and whitespace normalized."""
+    text = _NUMBER.sub("?", _STRING.sub("?", flux))
+    # "r.quantity == ? or r.quantity == ? ..." has the same shape whatever the list length.
+    text = _REPEATED.sub(r"\1 or ...", text)
+    text = "\n".join(" ".join(line.split()) for line in text.strip().splitlines() if line.strip())
+    return hashlib.sha1(text.encode()).hexdigest()[:16], text
+
+
+def _jsonable(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_jsonable(item) for item in value]
+    return str(value)
+
+
+def logged_query(method):
+    """Make the repository method's name and arguments visible to the queries it runs."""
+    signature = inspect.signature(method)
+
+    def bind(args, kwargs) -> tuple[str, dict]:
+        bound = signature.bind(*args, **kwargs)
+        params = {name: _jsonable(value) for name, value in list(bound.arguments.items())[1:]}
+        return method.__name__, params
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            token = _method.set(bind(args, kwargs))
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                _method.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        token = _method.set(bind(args, kwargs))
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _method.reset(token)
+
+    return wrapper
+
+
+class QueryStats:
+    """Rows returned by one query and a sample of them for the size estimate."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self._sample = []
+
+    def tables(self, tables):
+        for table in tables:
+            self.rows += len(table.records)
+            self._sample.extend(table.records[: BYTES_SAMPLE - len(self._sample)])
+        return tables
+
+    def add(self, record) -> None:
+        self.rows += 1
+        if len(self._sample) < BYTES_SAMPLE:
+            self._sample.append(record)
+
+    @property
+    def bytes(self) -> int:
+        """Approximate size of the annotated CSV response, from the average sampled row."""
+        if not self._sample:
+            return 0
+        sampled = sum(len(",".join(map(str, record.values.values()))) + 1 for record in self._sample)
+        return round(sampled / len(self._sample) * self.rows)
+
+
+def _threshold_ms() -> float:
+    return getattr(settings, "INFLUX_SLOW_QUERY_MS", 0)
+
+
+def _entry(flux: str, stats: QueryStats, started: float, error: str) -> Optional[dict]:
+    duration_ms = (time.perf_counter() - started) * 1000
+    threshold = _threshold_ms()
+    if not threshold or duration_ms < threshold:
+        return None
+    method, params = _method.get() or ("", {})
+    shape, shape_text = query_shape(flux)
+    return {
+        "method": method,
+        "view": current_view.get(),
+        "flux": flux,
+        "params": params,
+        "shape": shape,
+        "shape_text": shape_text,
+        "duration_ms": round(duration_ms, 1),
+        "rows": stats.rows,
+        "bytes": stats.bytes,
+        "error": error,
+    }
+
+
+def save(entry: dict) -> None:
+    """Insert one row and drop the ones that fell out of the ring."""
+    from .models import SlowQuery
+
+    try:
+        # A savepoint, so a failed insert doesn't break the caller's transaction.
+        with transaction.atomic():
+            row = SlowQuery.objects.create(**entry)
+            size = getattr(settings, "INFLUX_SLOW_QUERY_LOG_SIZE", 1000)
+            SlowQuery.objects.filter(id__lte=row.id - size).delete()
+    except Exception:  # noqa: BLE001 - the log must never fail the query itself
+        logger.exception("Не удалось записать медленный запрос Flux")
+
+
+@contextmanager
+def timed(flux: str):
+    """Time the query run inside the block; the block reports rows through the yielded :class:`QueryStats`."""
+    stats = QueryStats()
+    started = time.perf_counter()
+    error = ""
+    try:
+        yield stats
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        entry = _entry(flux, stats, started, error)
+        if entry is not None:
+            save(entry)
+
+
+@asynccontextmanager
+async def atimed(flux: str):
+    stats = QueryStats()
+    started = time.perf_counter()
+    error = ""
+    try:
+        yield stats
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        entry = _entry(flux, stats, started, error)
+        if entry is not None:
+            await sync_to_async(save)(entry)
@@ -0,0 +1,225 @@
+"""Offline stand-in for InfluxDB, for benchmarks and load tests without a server.
+
+Writes cost a configurable round-trip latency plus a per-point cost, like a
+remote ``write_api.write`` would, so the import pipeline can be measured
+anywhere. Written points are kept in memory (up to ``max_points`` per
+series) and served back by the series queries at a similar cost; a series
+nothing was written to is answered with generated points, so a load test
+against existing sessions still moves realistic payloads.
+
+Set ``INFLUXDB_STANDIN=1`` to make :func:`~telemetry.influx_repo.get_influx_repo`
+return one shared stand-in for the whole process. A shard in INFLUX_SHARDS
+with ``"standin": true`` gets a stand-in of its own, so shard routing and
+``move_session_shard`` can be tried with several of them. The stand-in
+keeps raw points only; rollups are not emulated.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from asgiref.sync import sync_to_async
+
+from .influx_repo import InfluxRepository
+
+SYNTHETIC_STEP = timedelta(milliseconds=100)
+SYNTHETIC_MAX_POINTS = 5000
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+class StandInInfluxRepository(InfluxRepository):
+    def __init__(
+        self,
+        write_latency: float = 0.02,
+        point_cost: float = 2e-6,
+        query_latency: float = 0.01,
+        max_points: int = 1_000_000,
+    ) -> None:
+        super().__init__(url="standin://", token="", org="", bucket="standin")
+        self.write_latency = write_latency
+        self.point_cost = point_cost
+        self.query_latency = query_latency
+        self.max_points = max_points
+        self.points_written = 0
+        self.writes = 0
+        self.queries = 0
+        # (session_id, quantity) -> time-sorted timestamps and values
+        self._series: Dict[tuple[str, str], tuple[List[datetime], List[float]]] = {}
+        # (session_id, quantity) -> the remaining tags of its points
+        self._tags: Dict[tuple[str, str], Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def write_points(self, session, points: Iterable[dict]) -> None:
+        points = list(points)
+        # time.sleep releases the GIL, as waiting on a socket does.
+        time.sleep(self.write_latency + self.point_cost * len(points))
+        with self._lock:
+            self.points_written += len(points)
+            self.writes += 1
+            for p in points:
+                if p.get("value") is None:
+                    continue
+                tags = {"motor_group_id": str(session.motor_group_id), "sensor_id": str(p.get("sensor_id") or "")}
+                self._store((str(session.id), str(p.get("quantity"))), tags, _as_datetime(p["ts"]), float(p["value"]))
+
+    def _store(self, key: tuple[str, str], tags: Dict[str, str], ts: datetime, value: float) -> None:
+        times, values = self._series.setdefault(key, ([], []))
+        self._tags[key] = tags
+        if len(times) >= self.max_points:
+            return
+        index = bisect.bisect_right(times, ts)
+        times.insert(index, ts)
+        values.insert(index, value)
+
+    def _stored(self, session_id, quantity: str, from_dt=None, to_dt=None) -> Optional[tuple[List[datetime], List[float]]]:
+        with self._lock:
+            series = self._series.get((str(session_id), quantity))
+            if series is None:
+                return None
+            times, values = series
+            lo = bisect.bisect_left(times, from_dt) if from_dt else 0
+            hi = bisect.bisect_left(times, to_dt) if to_dt else len(times)
+            return times[lo:hi], values[lo:hi]
+
+    @staticmethod
+    def _synthetic(count: int, stop: datetime, step: timedelta) -> tuple[List[datetime], List[float]]:
+        times = [stop - step * (count - i) for i in range(count)]
+        return times, [50 + 40 * math.sin(i / 50) for i in range(count)]
+
+    def _wait_query(self, count: int) -> None:
+        time.sleep(self.query_latency + self.point_cost * count)
+        with self._lock:
+            self.queries += 1
+
+    def _answer(self, times: List[datetime], values: List[float]) -> List[dict]:
+        self._wait_query(len(times))
+        return [{"ts": ts.isoformat(), "value": value} for ts, value in zip(times, values)]
+
+    def query_series(
+        self,
+        session_id: int,
+        quantity: str,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        sensor_id: Optional[int] = None,
+        resolution: Optional[timedelta] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+        motor_group_id: Optional[int] = None,
+    ) -> List[dict]:
+        stored = self._stored(session_id, quantity, from_dt, to_dt)
+        if stored is None:
+            stop = to_dt or datetime.now(timezone.utc)
+            span = stop - from_dt if from_dt else SYNTHETIC_STEP * SYNTHETIC_MAX_POINTS
+            step = max(resolution or SYNTHETIC_STEP, span / SYNTHETIC_MAX_POINTS)
+            stored = self._synthetic(int(span / step), stop, step)
+        elif resolution and len(stored[0]) > 1:
+            # Keep every n-th point, as coarse as the requested resolution.
+            span = stored[0][-1] - stored[0][0]
+            every = max(int(len(stored[0]) * resolution / span), 1) if span else 1
+            stored = stored[0][::every], stored[1][::every]
+        return self._answer(*stored)
+
+    def query_last_points(
+        self,
+        session_id: int,
+        quantity: str,
+        limit: int = 200,
+        sensor_id: Optional[int] = None,
+        tiers: Iterable[str] = (),
+        raw_available: bool = True,
+        motor_group_id: Optional[int] = None,
+    ) -> List[dict]:
+        stored = self._stored(session_id, quantity)
+        if stored is None:
+            stored = self._synthetic(limit, datetime.now(timezone.utc), SYNTHETIC_STEP)
+        return self._answer(stored[0][-limit:], stored[1][-limit:])
+
+    # The simulated latency sleeps in a worker thread, never on the event loop.
+    async def aquery_series(self, *args, **kwargs) -> List[dict]:
+        return await sync_to_async(self.query_series, thread_sensitive=False)(*args, **kwargs)
+
+    async def aquery_last_points(self, *args, **kwargs) -> List[dict]:
+        return await sync_to_async(self.query_last_points, thread_sensitive=False)(*args, **kwargs)
+
+    def query_raw_columns(
+        self, session_id: int, quantity: str, sensor_id: Optional[int] = None
+    ) -> tuple[List[datetime], List[float]]:
+        stored = self._stored(session_id, quantity)
+        if stored is None:
+            stored = self._synthetic(SYNTHETIC_MAX_POINTS, datetime.now(timezone.utc), SYNTHETIC_STEP)
+        self._wait_query(len(stored[0]))
+        return stored
+
+    # -- deletion and moves between shards ------------------------------------
+
+    def _matching(self, tag: str, value) -> List[tuple[str, str]]:
+        """Series keys whose points carry ``tag == value`` (session_id or motor_group_id)."""
+        if tag == "session_id":
+            return [key for key in self._series if key[0] == str(value)]
+        return [key for key in self._series if self._tags[key].get(tag) == str(value)]
+
+    def export_points(self, session_id: int, bucket: Optional[str] = None) -> Iterator[dict]:
+        with self._lock:
+            series = [
+                (key, dict(self._tags[key]), list(zip(*self._series[key])))
+                for key in self._matching("session_id", session_id)
+            ]
+        for (sid, quantity), tags, points in series:
+            tags = {"session_id": sid, "quantity": quantity, **tags}
+            for ts, value in points:
+                yield {"time": ts, "field": "value", "value": value, "tags": tags}
+
+    def write_records(self, bucket: str, records: Iterable[dict]) -> None:
+        records = [record for record in records if record["field"] == "value"]
+        time.sleep(self.write_latency + self.point_cost * len(records))
+        with self._lock:
+            self.points_written += len(records)
+            self.writes += 1
+            for record in records:
+                tags = dict(record["tags"])
+                key = (tags.pop("session_id"), tags.pop("quantity"))
+                self._store(key, tags, _as_datetime(record["time"]), float(record["value"]))
+
+    def tag_values(self, tag: str, bucket: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if tag == "session_id":
+                return sorted({key[0] for key in self._series})
+            return sorted({tags[tag] for tags in self._tags.values() if tag in tags})
+
+    def data_bounds(self, tag: str, value, bucket: Optional[str] = None) -> Optional[tuple[datetime, datetime]]:
+        with self._lock:
+            times = [self._series[key][0] for key in self._matching(tag, value) if self._series[key][0]]
+        if not times:
+            return None
+        return min(t[0] for t in times), max(t[-1] for t in times)
+
+    def delete_range(self, tag: str, value, start: datetime, stop: datetime, bucket: Optional[str] = None) -> None:
+        with self._lock:
+            for key in self._matching(tag, value):
+                times, values = self._series[key]
+                lo, hi = bisect.bisect_left(times, start), bisect.bisect_right(times, stop)
+                del times[lo:hi], values[lo:hi]
+                if not times:
+                    del self._series[key], self._tags[key]
+
+
+_SHARED: Optional[StandInInfluxRepository] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_standin() -> StandInInfluxRepository:
+    """The process-wide stand-in, so points written by one request are read by the next."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = StandInInfluxRepository()
+        return _SHARED
@@ -1,15 +1,59 @@
+import asyncio
+import gzip
 import io
-from datetime import datetime, timedelta
-from unittest.mock import patch
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from rest_framework.test import APIClient
 
+from . import admission, shards, uploads
 from .forms import SessionForm
-from .models import CsvImport, MeasuredQuantity, MotorGroup, Session
-from .services import QUANTITY_FIELDS, import_csv_to_session
+from .models import (
+    AnomalyEvent,
+    CsvImport,
+    DetectorRule,
+    ImportProfile,
+    ImportProfileColumn,
+    InfluxDeletionJob,
+    MeasuredQuantity,
+    MotorGroup,
+    Sensor,
+    SensorChannel,
+    Session,
+    SessionRollup,
+    SlowQuery,
+    Stand,
+    StepMetric,
+    ThrottleStep,
+)
+from .caching import annotate_data_version, data_version
+from .deletion import find_orphans, run_deletion_job
+from .flux import delete_predicate
+from .influx_repo import InfluxRepository, get_influx_repo
+from .management.commands.loadtest import parse_mix
+from .previews import PREVIEW_POINTS, preview_span
+from .registry import registry
+from .reorder import ReorderBuffer
+from .series_cache import fill_session, get_series_cache
+from .slow_queries import query_shape
+from .analysis import segment_throttle_steps
+from .services import QUANTITY_FIELDS, analyze_session_steps, import_csv_to_session
+from .standin import SYNTHETIC_MAX_POINTS, StandInInfluxRepository
 
 
 class SessionFormTests(TestCase):
@@ -50,6 +94,234 @@ class ImportCsvServiceTests(TestCase):
         self.assertTrue(csv_import.error_message)
 
 
+class RecordingRepo:
+    def __init__(self):
+        self.points = []
+
+    def write_points(self, session, points):
+        self.points.extend(points)
+
+
+class ImportReorderTests(TestCase):
+    # Two overlapping buffers: 10:00:02 appears twice, 10:00:01 arrives late.
+    CSV = "ts,rpm,thrust\n10:00:00,1000,\n10:00:02,1020,5\n10:00:01,1010,4\n10:00:02,1040,\n10:00:03,1030,6\n"
+
+    def setUp(self):
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        for key in ("rpm", "thrust"):
+            MeasuredQuantity.objects.get_or_create(key=key, defaults={"name": key, "unit": "u"})
+
+    def _import(self, profile=None):
+        repo = RecordingRepo()
+        body = self.CSV.replace("10:00", "2025-01-01T10:00")
+        with patch("telemetry.services.get_influx_repo", return_value=repo):
+            csv_import = import_csv_to_session(self.session, io.StringIO(body), profile=profile)
+        rpm = [(p["ts"].second, p["value"]) for p in repo.points if p["quantity"] == "rpm"]
+        thrust = [(p["ts"].second, p["value"]) for p in repo.points if p["quantity"] == "thrust"]
+        return csv_import, rpm, thrust
+
+    def test_rows_are_sorted_and_last_duplicate_wins(self):
+        csv_import, rpm, thrust = self._import()
+        self.assertEqual(rpm, [(0, 1000.0), (1, 1010.0), (2, 1040.0), (3, 1030.0)])
+        self.assertEqual(thrust, [(1, 4.0), (2, 5.0), (3, 6.0)])  # a blank cell never overrides a value
+        self.assertEqual((csv_import.rows_processed, csv_import.rows_duplicate, csv_import.rows_reordered), (5, 1, 1))
+
+    def test_profile_policy_and_window(self):
+        profile = ImportProfile.objects.create(name="Stitched", reorder_window=0, duplicate_policy="average")
+        ImportProfileColumn.objects.create(profile=profile, column="rpm", quantity=MeasuredQuantity.objects.get(key="rpm"))
+        csv_import, rpm, _ = self._import(profile)
+        # Without a window the late row is written where it arrives and the
+        # non-adjacent duplicate cannot be merged.
+        self.assertEqual([ts for ts, _ in rpm], [0, 2, 1, 2, 3])
+        self.assertEqual(csv_import.rows_duplicate, 0)
+        self.assertEqual(csv_import.rows_reordered, 1)
+        profile.reorder_window = 10
+        profile.save()
+        _, rpm, _ = self._import(profile)
+        self.assertEqual(rpm[2], (2, 1030.0))
+
+    def test_duplicate_after_its_twin_was_written_rewrites_the_merged_row(self):
+        buffer = ReorderBuffer(1, "average")
+        start = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+        times = [start + timedelta(seconds=s) for s in (0, 1, 2, 0)]
+        out_ts, (values,) = buffer.push(times, [[10.0, 11.0, 12.0, 20.0]])
+        self.assertEqual([(ts.second, v) for ts, v in zip(out_ts, values)], [(0, 10.0), (0, 15.0)])
+        restored = ReorderBuffer(1, "average")
+        restored.restore(buffer.state())
+        out_ts, (values,) = restored.drain(1)
+        self.assertEqual([(ts.second, v) for ts, v in zip(out_ts, values)], [(1, 11.0), (2, 12.0)])
+        self.assertEqual(restored.duplicates, 1)
+
+
+class PipelinedWriteTests(TestCase):
+    def setUp(self):
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        MeasuredQuantity.objects.get_or_create(key="rpm", defaults={"name": "RPM", "unit": "u"})
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.csv = "ts,rpm\n" + "".join(f"{(start + timedelta(seconds=i)).isoformat()},{i}\n" for i in range(12000))
+
+    def _import(self, repo):
+        with patch("telemetry.services.get_influx_repo", return_value=repo):
+            return import_csv_to_session(self.session, io.StringIO(self.csv))
+
+    @override_settings(CSV_IMPORT_WRITERS=4, CSV_IMPORT_WRITE_QUEUE=1)
+    def test_batches_are_written_concurrently(self):
+        repo = RecordingRepo()
+        csv_import = self._import(repo)
+        self.assertEqual(csv_import.status, CsvImport.STATUS_SUCCESS)
+        self.assertEqual(sorted(p["value"] for p in repo.points), [float(i) for i in range(12000)])
+
+    @override_settings(CSV_IMPORT_WRITERS=2)
+    def test_write_error_fails_the_import(self):
+        def write_points(session, points):
+            raise ConnectionError("InfluxDB недоступна")
+
+        csv_import = self._import(type("Repo", (), {"write_points": staticmethod(write_points)})())
+        self.assertEqual(csv_import.status, CsvImport.STATUS_FAILED)
+        self.assertEqual(csv_import.error_message, "InfluxDB недоступна")
+        self.assertFalse(any(t.name.startswith("influx-writer") for t in threading.enumerate()))
+
+
+class ImportProfileTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="Group 1"), name="Run")
+        self.thrust, _ = MeasuredQuantity.objects.get_or_create(key="thrust", defaults={"name": "Thrust", "unit": "N"})
+        stand = Stand.objects.create(name="Twin stand")
+        self.left = Sensor.objects.create(stand=stand, name="Left cell")
+        self.right = Sensor.objects.create(stand=stand, name="Right cell")
+        self.profile = ImportProfile.objects.create(name="Twin", timestamp_column="time")
+        ImportProfileColumn.objects.create(profile=self.profile, column="thrust_l", quantity=self.thrust, sensor=self.left)
+        ImportProfileColumn.objects.create(profile=self.profile, column="thrust_r", quantity=self.thrust, sensor=self.right)
+
+    def _import(self, rows):
+        body = "time,thrust_l,thrust_r,comment\n" + "".join(
+            f"2025-01-01 10:00:{i:02d},{i},{i * 2},x\n" for i in range(rows)
+        )
+        repo = RecordingRepo()
+        with patch("telemetry.services.get_influx_repo", return_value=repo):
+            csv_import = import_csv_to_session(self.session, io.StringIO(body), profile=self.profile)
+        return csv_import, repo
+
+    def test_columns_are_routed_to_their_own_channels(self):
+        csv_import, repo = self._import(3)
+        self.assertEqual(csv_import.status, CsvImport.STATUS_SUCCESS)
+        self.assertEqual(csv_import.rows_processed, 3)
+        by_sensor = {p["sensor_id"] for p in repo.points if p["quantity"] == "thrust"}
+        self.assertEqual(by_sensor, {self.left.id, self.right.id})
+        self.assertEqual(SensorChannel.objects.filter(quantity=self.thrust).count(), 2)
+
+    def test_successful_import_stores_preview(self):
+        self._import(50)
+        self._import(3)  # a second import is merged into the same buckets
+        self.session.refresh_from_db()
+        buckets = self.session.preview["quantities"]["thrust"]
+        self.assertEqual(len(buckets), PREVIEW_POINTS)
+        filled = [b for b in buckets if b is not None]
+        self.assertEqual(min(b[0] for b in filled), 0.0)
+        self.assertEqual(max(b[1] for b in filled), 98.0)
+        resp = APIClient()
+        resp.force_authenticate(get_user_model().objects.create_user(username="u", password="p"))
+        self.assertIn("thrust", resp.get("/api/sessions/").data["results"][0]["preview"]["quantities"])
+
+    def test_row_loop_does_not_query_database(self):
+        self._import(1)  # creates the channels and resets the registry
+        registry.quantities()
+        with CaptureQueriesContext(connection) as small:
+            self._import(2)
+        with CaptureQueriesContext(connection) as large:
+            self._import(40)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class MetadataRegistryTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        self.quantity, _ = MeasuredQuantity.objects.get_or_create(key="thrust", defaults={"name": "Thrust", "unit": "N"})
+
+    def test_catalog_is_loaded_with_single_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.quantity("thrust").id, self.quantity.id)
+            registry.channels_for("thrust")
+            registry.quantities()
+
+    def test_channel_changes_invalidate_registry(self):
+        self.assertEqual(registry.channels_for("thrust"), [])
+        stand = Stand.objects.create(name="Stand A")
+        sensor = Sensor.objects.create(stand=stand, name="Load cell")
+        channel = SensorChannel.objects.create(sensor=sensor, quantity=self.quantity)
+        channels = registry.channels_for("thrust")
+        self.assertEqual([c.id for c in channels], [channel.id])
+        channel.delete()
+        self.assertEqual(registry.channels_for("thrust"), [])
+
+
+class ListingQueryCountTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.force_login(user)
+        self.api = APIClient()
+        self.api.force_authenticate(user)
+        stand = Stand.objects.create(name="Stand A")
+        quantity = MeasuredQuantity.objects.first()
+        for g in range(3):
+            group = MotorGroup.objects.create(name=f"Group {g}")
+            sensor = Sensor.objects.create(stand=stand, name=f"Sensor {g}")
+            SensorChannel.objects.create(sensor=sensor, quantity=quantity)
+            for i in range(4):
+                session = Session.objects.create(motor_group=group, name=f"Run {g}.{i}")
+                CsvImport.objects.create(session=session, status=CsvImport.STATUS_SUCCESS)
+
+    def test_session_list_page(self):
+        quantity = MeasuredQuantity.objects.first()
+        Session.objects.update(preview={"start": 0, "width": 1, "quantities": {quantity.key: [[0, 1], None, [2, 3]]}})
+        registry.quantities()  # process-local, loaded once per worker
+        with self.assertNumQueries(3):
+            resp = self.client.get("/sessions/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["sessions"][0].import_count, 1)
+        self.assertEqual(resp.context["sessions"][0].last_import_status, CsvImport.STATUS_SUCCESS)
+        self.assertContains(resp, "<polygon points=", count=12)
+
+    def test_session_list_page_is_cursor_paginated(self):
+        resp = self.client.get("/sessions/?page_size=5")
+        self.assertEqual(len(resp.context["sessions"]), 5)
+        self.assertIn("cursor=", resp.context["next_page_url"])
+        resp = self.client.get(resp.context["next_page_url"])
+        self.assertEqual(len(resp.context["sessions"]), 5)
+
+    def test_motor_group_list_page(self):
+        with self.assertNumQueries(3):
+            resp = self.client.get("/motor-groups/")
+        self.assertEqual(resp.context["motor_groups"][0].session_count, 4)
+
+    def test_sensor_list_page(self):
+        with self.assertNumQueries(4):
+            resp = self.client.get("/sensors/")
+        self.assertEqual(resp.status_code, 200)
+
+    def test_session_api_list(self):
+        with self.assertNumQueries(1):
+            resp = self.api.get("/api/sessions/")
+        self.assertEqual(len(resp.data["results"]), 12)
+        self.assertEqual(resp.data["results"][0]["import_count"], 1)
+
+    def test_session_api_filters_by_motor_group(self):
+        group = MotorGroup.objects.get(name="Group 1")
+        resp = self.api.get(f"/api/sessions/?motor_group={group.id}")
+        self.assertEqual({row["motor_group"] for row in resp.data["results"]}, {group.id})
+
+    def test_sensor_api_list(self):
+        with self.assertNumQueries(1):
+            resp = self.api.get("/api/sensors/")
+        self.assertEqual(resp.data["results"][0]["channel_count"], 1)
+
+    def test_sensor_channel_api_list(self):
+        with self.assertNumQueries(1):
+            resp = self.api.get("/api/sensor-channels/")
+        self.assertEqual(len(resp.data["results"]), 3)
+
+
 class SessionSeriesApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -63,3 +335,1010 @@ class SessionSeriesApiTests(TestCase):
     def test_invalid_datetime_returns_400(self):
         resp = self.client.get(f"/api/sessions/{self.session.id}/series/?quantity=temperature&from=bad-date")
         self.assertEqual(resp.status_code, 400)
+
+    def test_unbounded_resolution_returns_400(self):
+        for value in ("1e20", "inf", "nan", "400d"):
+            resp = self.client.get(f"/api/sessions/{self.session.id}/series/?quantity=temperature&resolution={value}")
+            self.assertEqual(resp.status_code, 400, value)
+        resp = self.client.get(f"/api/sessions/{self.session.id}/resample/?quantities=temperature&resolution=1e20")
+        self.assertEqual(resp.status_code, 400)
+
+
+class SeriesCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(SERIES_CACHE_DIR=tmp.name, SERIES_CACHE_MAX_BYTES=10**6)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        registry.invalidate()
+        MeasuredQuantity.objects.get_or_create(key="rpm", defaults={"name": "RPM", "unit": "rpm"})
+        self.client.force_login(get_user_model().objects.create_user(username="user", password="pass"))
+        start = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+        self.session = Session.objects.create(
+            motor_group=MotorGroup.objects.create(name="G"), name="S", started_at=start, ended_at=start + timedelta(hours=1)
+        )
+        CsvImport.objects.create(session=self.session, status=CsvImport.STATUS_SUCCESS, finished_at=start)
+        # Two sensors interleaved, as Influx returns them table by table.
+        times = [start + timedelta(seconds=i) for i in range(0, 10, 2)] + [start + timedelta(seconds=i) for i in range(1, 10, 2)]
+        self.repo = MagicMock()
+        self.repo.query_raw_columns.return_value = (times, [float(t.second) for t in times])
+        self.repo.query_series.return_value = [{"ts": start.isoformat(), "value": 3.0}]
+        self.start = start
+
+    def _get(self, query):
+        with patch("telemetry.api_views.get_influx_repo", return_value=self.repo):
+            return self.client.get(f"/api/sessions/{self.session.id}/series/?quantity=rpm{query}")
+
+    def test_miss_asks_influx_for_the_window_only(self):
+        resp = self._get("&from=2025-01-01T10:00:03Z&to=2025-01-01T10:00:06Z")
+        self.assertEqual(resp.json(), [{"ts": self.start.isoformat(), "value": 3.0}])
+        self.repo.query_raw_columns.assert_not_called()
+        self.assertEqual(get_series_cache().usage(), 0)
+
+    def test_closed_session_is_served_from_cache(self):
+        with patch("telemetry.series_cache.get_influx_repo", return_value=self.repo):
+            call_command("fill_series_cache", stdout=io.StringIO())
+        first = self._get("")
+        self.assertEqual([p["value"] for p in first.json()], [float(i) for i in range(10)])
+        self.assertEqual(first.json()[0]["ts"], self.start.isoformat())
+        window = self._get("&from=2025-01-01T10:00:03Z&to=2025-01-01T10:00:06Z")
+        self.assertEqual([p["value"] for p in window.json()], [3.0, 4.0, 5.0])
+        self.repo.query_series.assert_not_called()
+        self.repo.query_last_points.assert_not_called()
+
+        self.session.ended_at = None
+        self.session.save()
+        self.assertEqual(get_series_cache().usage(), 0)
+
+    def test_fill_is_queued_when_session_ends_or_import_succeeds(self):
+        running = Session.objects.create(motor_group=self.session.motor_group, name="R")
+        csv_import = CsvImport.objects.create(session=running)
+        with patch("telemetry.series_cache._start_fill") as start_fill, self.captureOnCommitCallbacks(execute=True):
+            csv_import.status = CsvImport.STATUS_SUCCESS
+            csv_import.save()  # still running: nothing to cache yet
+            running.ended_at = self.start + timedelta(hours=1)
+            running.save()
+            running.save()  # already ended
+            csv_import.save()
+        self.assertEqual([c.args for c in start_fill.call_args_list], [(running.id,), (running.id,)])
+
+    def test_fill_session_stores_every_quantity(self):
+        session = annotate_data_version(Session.objects.filter(pk=self.session.pk)).get()
+        with patch("telemetry.series_cache.get_influx_repo", return_value=self.repo):
+            self.assertEqual(fill_session(session), 10 * MeasuredQuantity.objects.count())
+        self.assertEqual(len(get_series_cache().load(session.id, "rpm", None, data_version(session))), 10)
+
+    def test_least_recently_read_entries_are_evicted(self):
+        cache = get_series_cache()
+        times = [self.start + timedelta(seconds=i) for i in range(1000)]
+        cache.store(1, "rpm", None, "v1", times, [0.0] * 1000)
+        entry_size = cache.usage()
+        cache.max_bytes = entry_size * 2
+        cache.store(2, "rpm", None, "v1", times, [0.0] * 1000)
+        os.utime(cache._paths(1, "rpm", None, "v1")[0], (0, 0))
+        cache.store(3, "rpm", None, "v1", times, [0.0] * 1000)
+        self.assertIsNone(cache.load(1, "rpm", None, "v1"))
+        self.assertEqual(len(cache.load(3, "rpm", None, "v1")), 1000)
+
+
+class RollupTierSelectionTests(TestCase):
+    def setUp(self):
+        self.repo = InfluxRepository(
+            url="http://influx", token="t", org="o", bucket="raw", rollup_buckets={"1s": "raw-1s", "1m": "raw-1m"}
+        )
+
+    def test_coarsest_tier_meeting_resolution(self):
+        tiers = ["1s", "1m"]
+        self.assertIsNone(self.repo.select_tier(timedelta(milliseconds=200), tiers))
+        self.assertEqual(self.repo.select_tier(timedelta(seconds=30), tiers), "1s")
+        self.assertEqual(self.repo.select_tier(timedelta(minutes=10), tiers), "1m")
+        self.assertEqual(self.repo.select_tier(timedelta(minutes=10), ["1s"]), "1s")
+
+    def test_finest_tier_once_raw_expired(self):
+        self.assertIsNone(self.repo.select_tier(None, ["1s", "1m"]))
+        self.assertEqual(self.repo.select_tier(None, ["1s", "1m"], raw_available=False), "1s")
+
+    def test_series_api_passes_fresh_tiers(self):
+        user = get_user_model().objects.create_user(username="user", password="pass")
+        client = APIClient()
+        client.force_authenticate(user)
+        session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        SessionRollup.objects.create(session=session, tier="1s")
+        SessionRollup.objects.create(session=session, tier="1m", is_stale=True)
+        with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.query_series.return_value = []
+            resp = client.get(
+                f"/api/sessions/{session.id}/series/?quantity=rpm"
+                "&from=2025-01-01T00:00:00Z&to=2025-01-01T10:00:00Z&points=100"
+            )
+        self.assertEqual(resp.status_code, 200)
+        kwargs = mock_repo.return_value.query_series.call_args.kwargs
+        self.assertEqual(kwargs["resolution"], timedelta(minutes=6))
+        self.assertEqual(kwargs["tiers"], ["1s"])
+        self.assertTrue(kwargs["raw_available"])
+
+
+class AsyncSessionSeriesViewTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+
+    async def test_requires_authentication(self):
+        resp = await self.async_client.get(f"/api/sessions/{self.session.id}/series/async/?quantity=rpm")
+        self.assertEqual(resp.status_code, 403)
+
+    async def test_returns_series_from_async_repository(self):
+        await self.async_client.aforce_login(self.user)
+        points = [{"ts": "2025-01-01T10:00:00+00:00", "value": 1200.0}]
+        with patch("telemetry.async_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.aquery_last_points = AsyncMock(return_value=points)
+            resp = await self.async_client.get(f"/api/sessions/{self.session.id}/series/async/?quantity=rpm")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), points)
+        kwargs = mock_repo.return_value.aquery_last_points.call_args.kwargs
+        self.assertEqual((kwargs["session_id"], kwargs["quantity"]), (self.session.id, "rpm"))
+
+    async def test_unknown_quantity_returns_404(self):
+        await self.async_client.aforce_login(self.user)
+        resp = await self.async_client.get(f"/api/sessions/{self.session.id}/series/async/?quantity=nope")
+        self.assertEqual(resp.status_code, 404)
+
+
+class SeriesConditionalRequestTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.force_login(user)
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        CsvImport.objects.create(session=self.session, status=CsvImport.STATUS_SUCCESS, finished_at=datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+        self.url = f"/api/sessions/{self.session.id}/series/?quantity=rpm"
+
+    def _get(self, points, **headers):
+        with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.query_last_points.return_value = points
+            resp = self.client.get(self.url, headers=headers)
+        return resp, mock_repo.return_value.query_last_points
+
+    def test_matching_etag_returns_304_without_influx(self):
+        resp, _ = self._get([])
+        etag = resp["ETag"]
+        resp, query = self._get([], if_none_match=etag)
+        self.assertEqual(resp.status_code, 304)
+        query.assert_not_called()
+
+    def test_new_import_changes_etag(self):
+        etag = self._get([])[0]["ETag"]
+        CsvImport.objects.create(session=self.session, status=CsvImport.STATUS_SUCCESS, finished_at=datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+        resp, query = self._get([], if_none_match=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        query.assert_called_once()
+
+    def test_failed_import_changes_etag(self):
+        # Batches written before the failure are already in InfluxDB.
+        etag = self._get([])[0]["ETag"]
+        CsvImport.objects.create(session=self.session, status=CsvImport.STATUS_FAILED, finished_at=datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+        resp, query = self._get([], if_none_match=etag)
+        self.assertEqual(resp.status_code, 200)
+        query.assert_called_once()
+
+    def test_influx_is_queried_while_import_is_pending(self):
+        etag = self._get([])[0]["ETag"]
+        CsvImport.objects.create(session=self.session, status=CsvImport.STATUS_PENDING)
+        resp, query = self._get([{"ts": "2025-01-01T10:00:00+00:00", "value": 1.0}], if_none_match=etag)
+        self.assertEqual(resp.status_code, 200)
+        query.assert_called_once()
+
+    def test_large_body_is_gzipped_and_etag_still_matches(self):
+        points = [{"ts": f"2025-01-01T10:00:{i % 60:02d}+00:00", "value": float(i)} for i in range(200)]
+        resp, _ = self._get(points, accept_encoding="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp["Vary"])
+        self.assertEqual(len(json.loads(gzip.decompress(resp.content))), 200)
+        self.assertTrue(resp["ETag"].endswith('-gzip"'))
+        resp, query = self._get(points, accept_encoding="gzip", if_none_match=resp["ETag"])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_compressed_api_list_revalidates(self):
+        for i in range(40):
+            MeasuredQuantity.objects.create(key=f"q{i}", name=f"Величина {i}", unit="u")
+        resp = self.client.get("/api/quantities/?page_size=100", headers={"accept_encoding": "gzip"})
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertTrue(resp["ETag"].endswith('-gzip"'))
+        etag = resp["ETag"]
+        resp = self.client.get("/api/quantities/?page_size=100", headers={"accept_encoding": "gzip", "if_none_match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+    def test_small_body_is_not_compressed(self):
+        resp, _ = self._get([], accept_encoding="gzip")
+        self.assertFalse(resp.has_header("Content-Encoding"))
+
+
+class FakeDeletionRepo:
+    def __init__(self, bounds, tag_values=()):
+        self.bounds = bounds
+        self.values = tag_values
+        self.deleted = []
+
+    def all_buckets(self):
+        return ["raw", "rollup"]
+
+    def data_bounds(self, tag, value, bucket):
+        return self.bounds.get(bucket)
+
+    def delete_range(self, tag, value, start, stop, bucket):
+        self.deleted.append((tag, value, bucket, start, stop))
+
+    def tag_values(self, tag, bucket):
+        return [str(v) for t, v in self.values if t == tag]
+
+
+class InfluxDeletionTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="user", password="pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user)
+        self.group = MotorGroup.objects.create(name="G")
+        self.session = Session.objects.create(motor_group=self.group, name="S")
+
+    def test_api_delete_enqueues_job(self):
+        resp = self.api.delete(f"/api/sessions/{self.session.id}/")
+        self.assertEqual(resp.status_code, 202)
+        job = InfluxDeletionJob.objects.get(pk=resp.json()["id"])
+        self.assertEqual(job.tag, ("session_id", self.session.id))
+        self.assertEqual(job.status, InfluxDeletionJob.STATUS_PENDING)
+        self.assertFalse(Session.objects.exists())
+
+    def test_motor_group_delete_filters_by_group_tag(self):
+        self.api.delete(f"/api/motor-groups/{self.group.id}/")
+        job = InfluxDeletionJob.objects.get()
+        self.assertEqual(job.tag, ("motor_group_id", self.group.id))
+
+    def test_job_deletes_in_time_bounded_batches(self):
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        repo = FakeDeletionRepo({"raw": (start, start + timedelta(hours=60))})
+        job = InfluxDeletionJob.objects.create(session_id=7, reason=InfluxDeletionJob.REASON_SESSION)
+        run_deletion_job(job, repo, batch=timedelta(hours=24))
+        job.refresh_from_db()
+        self.assertEqual(job.status, InfluxDeletionJob.STATUS_DONE)
+        self.assertEqual((job.batches_done, job.batches_total), (3, 3))
+        self.assertEqual(len(repo.deleted), 3)
+        self.assertTrue(all(stop - begin <= timedelta(hours=24) for *_, begin, stop in repo.deleted))
+
+    def test_failed_batch_is_reported(self):
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        repo = FakeDeletionRepo({"raw": (start, start)})
+        repo.delete_range = lambda *args: (_ for _ in ()).throw(RuntimeError("influx down"))
+        job = run_deletion_job(InfluxDeletionJob.objects.create(session_id=7, reason="session"), repo)
+        self.assertEqual(job.status, InfluxDeletionJob.STATUS_FAILED)
+        self.assertEqual(job.error_message, "influx down")
+
+    def test_find_orphans_skips_live_and_queued_ids(self):
+        InfluxDeletionJob.objects.create(session_id=900, reason=InfluxDeletionJob.REASON_SESSION)
+        # Points that reappeared after a finished job are reported again.
+        InfluxDeletionJob.objects.create(session_id=902, reason=InfluxDeletionJob.REASON_SESSION, status=InfluxDeletionJob.STATUS_DONE)
+        repo = FakeDeletionRepo(
+            {},
+            [("session_id", self.session.id), ("session_id", 900), ("session_id", 901), ("session_id", 902), ("motor_group_id", self.group.id)],
+        )
+        self.assertEqual(find_orphans(repo), [("session_id", 901), ("session_id", 902)])
+
+
+class AnomalyDetectionTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        self.group = MotorGroup.objects.create(name="G")
+        self.session = Session.objects.create(motor_group=self.group, name="S")
+        self.temperature, _ = MeasuredQuantity.objects.get_or_create(key="temperature", defaults={"name": "T", "unit": "C"})
+        self.rpm, _ = MeasuredQuantity.objects.get_or_create(key="rpm", defaults={"name": "RPM", "unit": "1/min"})
+
+    def _import(self, values, column="temperature"):
+        start = datetime(2025, 1, 1, 10, 0)
+        body = f"ts,{column}\n" + "".join(
+            f"{(start + timedelta(seconds=i)).isoformat()},{value}\n" for i, value in enumerate(values)
+        )
+        with patch("telemetry.services.get_influx_repo", return_value=RecordingRepo()):
+            return import_csv_to_session(self.session, io.StringIO(body))
+
+    def test_limit_violations_are_grouped_into_events(self):
+        DetectorRule.objects.create(quantity=self.temperature, name="Перегрев", kind=DetectorRule.KIND_LIMIT, max_value=80)
+        self._import([20, 85, 90, 20, 20, 81, 20])
+        events = list(AnomalyEvent.objects.order_by("started_at"))
+        self.assertEqual([e.point_count for e in events], [2, 1])
+        self.assertEqual(events[0].peak_value, 90)
+        self.assertEqual(events[0].motor_group_id, self.group.id)
+
+    def test_event_spanning_chunks_is_merged(self):
+        DetectorRule.objects.create(quantity=self.temperature, name="Перегрев", kind=DetectorRule.KIND_LIMIT, max_value=80)
+        with patch("telemetry.services.IMPORT_CHUNK_ROWS", 3):
+            self._import([20, 20, 85, 86, 87, 88, 20])
+        event = AnomalyEvent.objects.get()
+        self.assertEqual((event.point_count, event.peak_value), (4, 88))
+
+    def test_rate_of_change_detects_rpm_dropout(self):
+        DetectorRule.objects.create(quantity=self.rpm, name="Провал", kind=DetectorRule.KIND_RATE, max_rate=1000)
+        with patch("telemetry.services.IMPORT_CHUNK_ROWS", 2):
+            self._import([5000, 5100, 5050, 200, 250], column="rpm")
+        event = AnomalyEvent.objects.get()
+        self.assertEqual(event.kind, DetectorRule.KIND_RATE)
+        self.assertEqual(event.peak_value, 200)
+
+    def test_rolling_zscore_flags_spike(self):
+        DetectorRule.objects.create(quantity=self.temperature, name="Выброс", kind=DetectorRule.KIND_ZSCORE, window=10, threshold=4)
+        values = [50 + (i % 3) * 0.5 for i in range(30)]
+        values[25] = 70
+        with patch("telemetry.services.IMPORT_CHUNK_ROWS", 7):
+            self._import(values)
+        event = AnomalyEvent.objects.get()
+        self.assertEqual(event.peak_value, 70)
+
+    def test_events_api_filters_by_motor_group(self):
+        DetectorRule.objects.create(quantity=self.temperature, name="Перегрев", kind=DetectorRule.KIND_LIMIT, max_value=80)
+        self._import([90])
+        api = APIClient()
+        api.force_authenticate(get_user_model().objects.create_user(username="user", password="pass"))
+        resp = api.get(f"/api/anomaly-events/?motor_group={self.group.id}&quantity=temperature")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()["results"]), 1)
+        resp = api.get(f"/api/anomaly-events/?motor_group={self.group.id + 1}")
+        self.assertEqual(resp.json()["results"], [])
+
+
+class SessionDistributionTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        cache.clear()
+        MeasuredQuantity.objects.get_or_create(key="noise", defaults={"name": "Noise", "unit": "dB"})
+        user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.force_login(user)
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        CsvImport.objects.create(session=self.session, status=CsvImport.STATUS_SUCCESS, finished_at=datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+        self.url = f"/api/sessions/{self.session.id}/distribution/?quantity=noise&bins=4"
+
+    def _get(self, url=None):
+        with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.query_distribution.return_value = {"count": 3, "bins": []}
+            resp = self.client.get(url or self.url)
+        return resp, mock_repo.return_value.query_distribution
+
+    def test_result_is_cached_until_next_import(self):
+        resp, query = self._get()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(query.call_args.kwargs["bins"], 4)
+        _, query = self._get()
+        query.assert_not_called()
+        CsvImport.objects.create(session=self.session, status=CsvImport.STATUS_SUCCESS, finished_at=datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+        _, query = self._get()
+        query.assert_called_once()
+
+    def test_invalid_bins_returns_400(self):
+        resp, query = self._get(self.url.replace("bins=4", "bins=0"))
+        self.assertEqual(resp.status_code, 400)
+        query.assert_not_called()
+
+    def test_histogram_counts_from_cumulative_buckets(self):
+        # edges 0, 1, 2 plus +Inf: two points on 0, one in (0, 1], two in (1, 2]
+        self.assertEqual(InfluxRepository._histogram_counts([2, 3, 5, 5]), [3, 2])
+        self.assertEqual(InfluxRepository._bin_edges(0.0, 2.0, 2), [0.0, 1.0, 2.0])
+
+
+class CompressedUploadTests(TestCase):
+    CSV = "ts,rpm\n" + "".join(f"2025-01-01T10:00:{i:02d},{1000 + i}\n" for i in range(30))
+
+    def setUp(self):
+        registry.invalidate()
+        MeasuredQuantity.objects.get_or_create(key="rpm", defaults={"name": "RPM", "unit": "1/min"})
+        self.api = APIClient()
+        self.api.force_authenticate(get_user_model().objects.create_user(username="user", password="pass"))
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        self.url = f"/api/sessions/{self.session.id}/import-csv/"
+        self.repo = RecordingRepo()
+        patcher = patch("telemetry.services.get_influx_repo", return_value=self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_multipart_gzip_file(self):
+        upload = io.BytesIO(gzip.compress(self.CSV.encode()))
+        upload.name = "log.csv.gz"
+        resp = self.api.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.json()["rows_processed"], 30)
+        self.assertEqual(len(self.repo.points), 30)
+
+    def test_raw_body_with_content_encoding(self):
+        resp = self.api.generic(
+            "POST", self.url, gzip.compress(self.CSV.encode()), content_type="text/csv", headers={"content-encoding": "gzip"}
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(CsvImport.objects.get().file_name, "upload.csv")
+
+    def test_zstd_file_is_detected_by_magic_bytes(self):
+        if uploads.zstandard is None:
+            self.skipTest("zstandard is not installed")
+        upload = io.BytesIO(uploads.zstandard.ZstdCompressor().compress(self.CSV.encode()))
+        upload.name = "log.bin"
+        resp = self.api.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual(resp.json()["rows_processed"], 30)
+
+    def test_truncated_gzip_fails_the_import(self):
+        upload = io.BytesIO(gzip.compress(self.CSV.encode())[:-20])
+        upload.name = "log.csv.gz"
+        resp = self.api.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["status"], CsvImport.STATUS_FAILED)
+
+
+class ResumableUploadTests(TestCase):
+    CSV = ("ts,rpm\n" + "".join(f"2025-01-01T10:00:{i:02d},{1000 + i}\n" for i in range(40))).encode()
+
+    def setUp(self):
+        registry.invalidate()
+        MeasuredQuantity.objects.get_or_create(key="rpm", defaults={"name": "RPM", "unit": "1/min"})
+        self.api = APIClient()
+        self.api.force_authenticate(get_user_model().objects.create_user(username="user", password="pass"))
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        self.repo = RecordingRepo()
+        patcher = patch("telemetry.services.get_influx_repo", return_value=self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        resp = self.api.post(
+            f"/api/sessions/{self.session.id}/uploads/", {"file_name": "endurance.csv", "size": len(self.CSV)}, format="json"
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.upload_id = resp.json()["id"]
+        self.url = f"/api/uploads/{self.upload_id}/"
+
+    def _put(self, start, end, **headers):
+        body = self.CSV[start:end]
+        if headers.get("content_encoding") == "gzip":
+            body = gzip.compress(body)
+        headers["content_range"] = f"bytes {start}-{end - 1}/{len(self.CSV)}"
+        return self.api.generic("PUT", self.url, body, content_type="application/octet-stream", headers=headers)
+
+    @override_settings(CSV_REORDER_WINDOW=1)  # rows beyond the reorder window are written right away
+    def test_lines_are_imported_as_chunks_arrive(self):
+        resp = self._put(0, 100)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["bytes_received"], 100)
+        written = len(self.repo.points)
+        self.assertGreater(written, 0)
+        resp = self._put(100, len(self.CSV), content_encoding="gzip")
+        self.assertEqual(resp.json()["rows_processed"], 40)
+        resp = self.api.post(f"{self.url}finalize/")
+        self.assertEqual(resp.json()["status"], CsvImport.STATUS_SUCCESS)
+        self.assertEqual(len(self.repo.points), 40)
+        self.assertIsNone(CsvImport.objects.get().upload_state)
+
+    def test_resume_after_overlap_and_gap(self):
+        self._put(0, 150)
+        resp = self._put(200, 300)
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()["bytes_received"], 150)
+        self._put(100, len(self.CSV))  # overlaps the received prefix
+        self.api.post(f"{self.url}finalize/")
+        self.assertEqual([p["value"] for p in self.repo.points], [1000.0 + i for i in range(40)])
+
+    def test_finalize_rejects_incomplete_upload(self):
+        self._put(0, 100)
+        resp = self.api.post(f"{self.url}finalize/")
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(CsvImport.objects.get().status, CsvImport.STATUS_PENDING)
+
+    def test_detector_event_spans_chunks(self):
+        rpm = MeasuredQuantity.objects.get(key="rpm")
+        DetectorRule.objects.create(quantity=rpm, name="Обороты", kind=DetectorRule.KIND_LIMIT, max_value=1010)
+        cut = self.CSV.index(b"10:00:20")
+        self._put(0, cut)
+        self._put(cut, len(self.CSV))
+        self.api.post(f"{self.url}finalize/")
+        event = AnomalyEvent.objects.get()
+        self.assertEqual((event.point_count, event.peak_value), (29, 1039))
+
+    @override_settings(CSV_REORDER_WINDOW=1)
+    def test_influx_write_error_leaves_chunk_unacknowledged(self):
+        with patch.object(self.repo, "write_points", side_effect=ConnectionError("refused")):
+            resp = self._put(0, 100)
+        self.assertEqual(resp.status_code, 502)
+        self.assertIn("Ошибка запроса к InfluxDB", resp.json()["detail"])
+        self.assertEqual(CsvImport.objects.get().bytes_received, 0)
+        self.assertEqual(self._put(0, 100).json()["bytes_received"], 100)
+
+    def test_long_file_name_is_rejected(self):
+        resp = self.api.post(f"/api/sessions/{self.session.id}/uploads/", {"file_name": "x" * 256}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+
+class SessionResampleTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        for key in ("thrust", "rpm"):
+            MeasuredQuantity.objects.get_or_create(key=key, defaults={"name": key, "unit": "u"})
+        self.client.force_login(get_user_model().objects.create_user(username="user", password="pass"))
+        start = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+        self.session = Session.objects.create(
+            motor_group=MotorGroup.objects.create(name="G"), name="S", started_at=start, ended_at=start + timedelta(hours=1)
+        )
+        self.times = [start + timedelta(seconds=i) for i in range(4)]
+
+    def _get(self, query):
+        columns = {"thrust": [1.0, None, 3.0, None], "rpm": [100.0, 200.0, None, 400.0]}
+        with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.query_aligned.return_value = (self.times, columns)
+            mock_repo.return_value.data_bounds.return_value = None
+            resp = self.client.get(f"/api/sessions/{self.session.id}/resample/?{query}")
+        return resp, mock_repo.return_value.query_aligned
+
+    def test_columns_are_interpolated_on_the_grid(self):
+        resp, query = self._get("quantities=thrust,rpm")
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(body["columns"]["thrust"], [1.0, 2.0, 3.0, None])
+        self.assertEqual(body["columns"]["rpm"], [100.0, 200.0, 300.0, 400.0])
+        # one hour over the default 1000 cells
+        self.assertEqual(query.call_args.args[2], timedelta(seconds=3.6))
+
+    def test_interpolation_follows_time_across_dropped_cells(self):
+        times = [self.times[0], self.times[1], self.times[0] + timedelta(seconds=4)]
+        with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.query_aligned.return_value = (times, {"thrust": [0.0, None, 4.0]})
+            mock_repo.return_value.data_bounds.return_value = None
+            resp = self.client.get(f"/api/sessions/{self.session.id}/resample/?quantities=thrust")
+        self.assertEqual(resp.json()["columns"]["thrust"], [0.0, 1.0, 4.0])
+
+    def test_grid_spans_imported_data_not_session_times(self):
+        # Created today, holding a CSV logged an hour long in 2025.
+        start = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+        preview = {"start": start.timestamp(), "width": 1200, "quantities": {"thrust": [[0, 1], [0, 1], [0, 1]]}}
+        Session.objects.filter(pk=self.session.pk).update(started_at=timezone.now(), ended_at=None, preview=preview)
+        _, query = self._get("quantities=thrust&points=100")
+        self.assertEqual(query.call_args.args[2], timedelta(seconds=36))
+        self.assertEqual((query.call_args.kwargs["from_dt"], query.call_args.kwargs["to_dt"]), (start, start + timedelta(hours=1)))
+
+    def test_grid_falls_back_to_influx_data_bounds(self):
+        start = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+        Session.objects.filter(pk=self.session.pk).update(started_at=timezone.now(), ended_at=None)
+        with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.query_aligned.return_value = (self.times, {"thrust": [1.0] * 4})
+            mock_repo.return_value.data_bounds.return_value = (start, start + timedelta(hours=2))
+            self.client.get(f"/api/sessions/{self.session.id}/resample/?quantities=thrust&resolution=0.001")
+        query = mock_repo.return_value.query_aligned
+        # two hours capped at 5000 cells
+        self.assertAlmostEqual(query.call_args.args[2].total_seconds(), 1.44, places=3)
+        self.assertEqual(query.call_args.kwargs["from_dt"], start)
+
+    def test_running_session_grid_ends_now(self):
+        Session.objects.filter(pk=self.session.pk).update(started_at=timezone.now() - timedelta(hours=2), ended_at=None)
+        _, query = self._get("quantities=thrust&resolution=0.001")
+        # two hours capped at 5000 cells
+        self.assertAlmostEqual(query.call_args.args[2].total_seconds(), 1.44, places=2)
+
+    def test_xy_pairs_skip_incomplete_cells(self):
+        resp, _ = self._get("x=rpm&y=thrust&fill=none")
+        self.assertEqual(resp.json()["points"], [[100.0, 1.0]])
+
+    def test_unknown_quantity_returns_404(self):
+        resp, query = self._get("quantities=thrust,warp")
+        self.assertEqual(resp.status_code, 404)
+        query.assert_not_called()
+
+
+class ThrottleStepAnalysisTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        for key in ("throttle", "rpm", "thrust"):
+            MeasuredQuantity.objects.get_or_create(key=key, defaults={"name": key, "unit": "u"})
+        self.group = MotorGroup.objects.create(name="G")
+        self.session = Session.objects.create(motor_group=self.group, name="Sweep")
+
+    @staticmethod
+    def _sweep():
+        # 10 s plateaus at 20/40/60 % with a 2 s spin-up each and a 3 s ramp at the end.
+        throttle, rpm = [], []
+        for level in (20, 40, 60):
+            throttle += [level] * 10
+            rpm += [level * 50 + (500 if i < 2 else i % 2) for i in range(10)]
+        throttle += [62, 64, 66]
+        rpm += [3100, 3200, 3300]
+        start = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+        times = [start + timedelta(seconds=i) for i in range(len(throttle))]
+        return times, {"throttle": throttle, "rpm": rpm, "thrust": [None] * len(throttle)}
+
+    def test_segmentation_trims_transients_and_skips_ramps(self):
+        _, columns = self._sweep()
+        segments = segment_throttle_steps(columns["throttle"], 1.0, tolerance=1.0, min_duration=3.0, settle=2.0)
+        self.assertEqual([(s.start, s.stop, s.throttle) for s in segments], [(2, 10, 20.0), (12, 20, 40.0), (22, 30, 60.0)])
+
+    def test_analysis_stores_steady_state_metrics(self):
+        repo = type("Repo", (), {"query_aligned": lambda *args, **kwargs: self._sweep()})()
+        steps = analyze_session_steps(self.session, repo, settle=2.0)
+        self.assertEqual(len(steps), 3)
+        metric = StepMetric.objects.get(step__index=2, quantity__key="rpm")
+        self.assertAlmostEqual(metric.mean, 2000.5)
+        self.assertAlmostEqual(metric.std, 0.5)
+        self.assertFalse(StepMetric.objects.filter(quantity__key="thrust").exists())
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.steps_analyzed_at)
+
+        user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.force_login(user)
+        resp = self.client.get(f"/api/motor-groups/{self.group.id}/performance/?y=rpm")
+        points = resp.json()["sessions"][0]["points"]
+        self.assertEqual([p["x"] for p in points], [20.0, 40.0, 60.0])
+        resp = self.client.get(f"/api/sessions/{self.session.id}/steps/")
+        self.assertEqual(resp.json()["steps"][0]["metrics"]["rpm"]["count"], 8)
+
+
+class LazyImportTests(TestCase):
+    def test_urlconf_does_not_load_heavy_dependencies(self):
+        probe = (
+            "import sys, django; django.setup(); import telemetry.urls; "
+            "print(','.join(m for m in ('influxdb_client', 'numpy') if m in sys.modules))"
+        )
+        proc = subprocess.run([sys.executable, "-c", probe], env=os.environ, capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), "")
+
+
+class MotorGroupDashboardTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username="user", password="pass"))
+        self.group = MotorGroup.objects.create(name="G")
+        start = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+        self.first = Session.objects.create(motor_group=self.group, name="A", started_at=start)
+        self.second = Session.objects.create(motor_group=self.group, name="B", started_at=start + timedelta(days=1))
+        CsvImport.objects.create(session=self.first, status=CsvImport.STATUS_SUCCESS, finished_at=start)
+        summary = {str(self.first.id): {"first": start, "last": start + timedelta(seconds=90), "thrust": 12.5, "rpm": 3000.0}}
+        self.repo = type("Repo", (), {"calls": []})()
+        self.repo.query_group_summary = lambda *args, **kwargs: self.repo.calls.append(args) or summary
+        cache.clear()
+
+    def _get(self, url):
+        with patch("telemetry.services.get_influx_repo", return_value=self.repo):
+            return self.client.get(url)
+
+    def test_one_grouped_query_cached_until_next_import(self):
+        data = self._get(f"/api/motor-groups/{self.group.id}/dashboard/").json()
+        rows = {row["name"]: row for row in data["sessions"]}
+        self.assertEqual(rows["A"]["peak_thrust"], 12.5)
+        self.assertEqual(rows["A"]["duration_s"], 90.0)
+        self.assertIsNone(rows["A"]["max_temperature"])
+        self.assertIsNone(rows["B"]["duration_s"])
+        self.assertEqual(len(self.repo.calls), 1)
+
+        self.assertContains(self._get(f"/motor-groups/{self.group.id}/dashboard/"), "12.50")
+        self.assertEqual(len(self.repo.calls), 1)
+        CsvImport.objects.create(session=self.second, status=CsvImport.STATUS_SUCCESS, finished_at=timezone.now())
+        self._get(f"/api/motor-groups/{self.group.id}/dashboard/")
+        self.assertEqual(len(self.repo.calls), 2)
+
+
+ADMISSION_TEST_LIMITS = {
+    "import": {"global": 1, "user": 1, "session": 1, "wait": 0, "lease": 60, "retry_after": 10},
+    "query": {"global": 2, "user": 2, "session": 1, "wait": 0, "lease": 60, "retry_after": 3},
+}
+
+
+@override_settings(ADMISSION_LIMITS=ADMISSION_TEST_LIMITS)
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        group = MotorGroup.objects.create(name="G")
+        self.session = Session.objects.create(motor_group=group, name="S")
+        self.other = Session.objects.create(motor_group=group, name="T")
+
+    def _series(self, session):
+        with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+            mock_repo.return_value.query_last_points.return_value = []
+            return self.client.get(f"/api/sessions/{session.id}/series/?quantity=rpm")
+
+    def test_over_limit_rejected_with_retry_after_until_released(self):
+        lease = admission.acquire(admission.QUERY, self.user.id, self.session.id)
+        resp = self._series(self.session)
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "3")
+        # The per-session limit does not hold back another session.
+        self.assertEqual(self._series(self.other).status_code, 200)
+        lease.release()
+        self.assertEqual(self._series(self.session).status_code, 200)
+
+        stats = self.client.get("/api/admission/").json()["query"]
+        self.assertEqual((stats["in_use"], stats["waiting"]), (0, 0))
+        self.assertEqual((stats["admitted"], stats["rejected"]), (3, 1))
+
+    def test_waiting_request_admitted_when_slot_frees(self):
+        limits = {**ADMISSION_TEST_LIMITS, "import": {**ADMISSION_TEST_LIMITS["import"], "wait": 5}}
+        with override_settings(ADMISSION_LIMITS=limits):
+            lease = admission.acquire(admission.IMPORT, self.user.id, self.session.id)
+            threading.Timer(0.2, lease.release).start()
+            with admission.admit(admission.IMPORT, self.user.id, self.session.id) as second:
+                self.assertEqual(len(second.keys), 3)
+        self.assertEqual(admission.stats()["import"]["admitted"], 2)
+
+
+class LoadTestStandInTests(TestCase):
+    def test_standin_serves_written_points_and_synthetic_series(self):
+        repo = StandInInfluxRepository(write_latency=0, point_cost=0, query_latency=0)
+        session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        # Out of order on purpose: the stand-in keeps each series sorted.
+        repo.write_points(session, [{"ts": start + timedelta(seconds=i), "value": float(i), "quantity": "rpm"} for i in (2, 0, 1)])
+        self.assertEqual([p["value"] for p in repo.query_last_points(session.id, "rpm", limit=2)], [1.0, 2.0])
+        self.assertEqual(len(repo.query_series(session.id, "rpm", from_dt=start + timedelta(seconds=1))), 2)
+        self.assertEqual(len(repo.query_last_points(session.id, "thrust", limit=50)), 50)
+        times, values = repo.query_raw_columns(session.id, "thrust")
+        self.assertEqual((len(times), len(values)), (SYNTHETIC_MAX_POINTS, SYNTHETIC_MAX_POINTS))
+
+    def test_async_queries_do_not_block_the_event_loop(self):
+        repo = StandInInfluxRepository(point_cost=0, query_latency=0.3)
+
+        async def two_queries():
+            started = time.monotonic()
+            await asyncio.gather(repo.aquery_last_points(1, "rpm", limit=5), repo.aquery_series(2, "rpm"))
+            return time.monotonic() - started
+
+        self.assertLess(asyncio.run(two_queries()), 0.55)
+
+    def test_setting_switches_repository_and_mix_is_validated(self):
+        with override_settings(INFLUX_SETTINGS={"standin": True}):
+            self.assertIs(get_influx_repo(), get_influx_repo())
+            self.assertIsInstance(get_influx_repo(), StandInInfluxRepository)
+        self.assertEqual(parse_mix("series=10,upload"), {"series": 10.0, "upload": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("series=1,export=2")
+
+
+class FakeFluxRecord:
+    def __init__(self, ts, value):
+        self.values = {"_time": ts, "_value": value}
+
+    def get_time(self):
+        return self.values["_time"]
+
+    def get_value(self):
+        return self.values["_value"]
+
+
+class FakeFluxClient:
+    """Stands in for InfluxDBClient: every query returns one table of ``records``."""
+
+    def __init__(self, records):
+        self.table = type("Table", (), {"records": records})()
+        self.queries = []
+        self.params = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def query_api(self):
+        return self
+
+    def query(self, flux, params=None):
+        self.queries.append(flux)
+        self.params.append(params)
+        return [self.table]
+
+
+@override_settings(INFLUX_SLOW_QUERY_MS=0.001, INFLUX_SLOW_QUERY_LOG_SIZE=2)
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        self.user = get_user_model().objects.create_superuser(username="admin", password="pass", email="a@example.com")
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.client_stub = FakeFluxClient([FakeFluxRecord(start + timedelta(seconds=i), float(i)) for i in range(3)])
+        self.repo = InfluxRepository(url="http://influx", token="t", org="o", bucket="raw")
+        self.repo._client = lambda: self.client_stub
+
+    def test_slow_query_recorded_with_view_params_and_ring_limit(self):
+        self.client.force_login(self.user)
+        with patch("telemetry.api_views.get_influx_repo", return_value=self.repo):
+            resp = self.client.get(f"/api/sessions/{self.session.id}/series/?quantity=rpm")
+        self.assertEqual(resp.status_code, 200)
+        entry = SlowQuery.objects.get()
+        self.assertEqual((entry.method, entry.view), ("query_last_points", "telemetry:session_series_api"))
+        self.assertEqual(entry.params["session_id"], self.session.id)
+        self.assertEqual(entry.rows, 3)
+        self.assertGreater(entry.bytes, 0)
+        self.assertEqual(entry.flux, self.client_stub.queries[0])
+
+        self.repo.query_series(self.session.id, "thrust")
+        self.repo.query_series(self.session.id + 1, "rpm", from_dt=datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(SlowQuery.objects.count(), 2)
+        self.assertFalse(SlowQuery.objects.filter(pk=entry.pk).exists())
+        self.assertEqual(SlowQuery.objects.values("shape").distinct().count(), 2)
+
+        shapes = self.client.get("/admin/telemetry/slowquery/shapes/")
+        self.assertContains(shapes, "query_series")
+        shape = SlowQuery.objects.first().shape
+        self.assertEqual(self.client.get(f"/admin/telemetry/slowquery/?shape={shape}").status_code, 200)
+
+    def test_shape_ignores_literals_and_list_length(self):
+        one = query_shape('filter(fn: (r) => r.session_id == "1" and (r.quantity == "a" or r.quantity == "b"))\n  |> limit(n: 500)')
+        two = query_shape('filter(fn: (r) => r.session_id == "42" and (r.quantity == "x" or r.quantity == "y" or r.quantity == "z"))\n|> limit(n: 10)')
+        self.assertEqual(one, two)
+        self.assertIn("r.session_id == ?", one[1])
+        self.assertNotEqual(one[0], query_shape('filter(fn: (r) => r.sensor_id == "1")')[0])
+
+
+class FluxPlanTests(TestCase):
+    def setUp(self):
+        self.client_stub = FakeFluxClient([])
+        self.repo = InfluxRepository(url="http://influx", token="t", org="o", bucket="raw")
+        self.repo._client = lambda: self.client_stub
+
+    def flux(self):
+        return self.client_stub.queries[-1]
+
+    def test_predicates_merged_into_one_filter_measurement_first(self):
+        self.repo.query_series(7, "rpm", sensor_id=3, resolution=timedelta(seconds=1))
+        flux = self.flux()
+        self.assertEqual(flux.count("filter("), 1)
+        self.assertIn('filter(fn: (r) => r._measurement == "readings" and r.quantity == "rpm"', flux)
+        self.assertIn('r.sensor_id == "3"', flux)
+        self.assertLess(flux.index("range("), flux.index("filter("))
+
+    def test_sort_only_when_several_series_are_merged(self):
+        self.repo.query_series(7, "rpm", sensor_id=3, motor_group_id=2)
+        self.assertIn('r.motor_group_id == "2"', self.flux())
+        self.assertNotIn("sort(", self.flux())
+        # Without the group a session reassigned to another group may have a series under each.
+        self.repo.query_series(7, "rpm", sensor_id=3)
+        self.assertIn('sort(columns: ["_time"])', self.flux())
+        self.repo.query_series(7, "rpm", motor_group_id=2)
+        self.assertIn('sort(columns: ["_time"])', self.flux())
+
+    def test_series_api_pins_group_until_the_session_moves(self):
+        group = MotorGroup.objects.create(name="G")
+        session = Session.objects.create(motor_group=group, name="S", influx_shard="default")
+        self.client.force_login(get_user_model().objects.create_user(username="user", password="pass"))
+        MeasuredQuantity.objects.get_or_create(key="rpm", defaults={"name": "RPM", "unit": "rpm"})
+        registry.invalidate()
+
+        def pinned_group():
+            with patch("telemetry.api_views.get_influx_repo") as mock_repo:
+                mock_repo.return_value.query_last_points.return_value = []
+                self.client.get(f"/api/sessions/{session.id}/series/?quantity=rpm&sensor=1")
+            return mock_repo.return_value.query_last_points.call_args.kwargs["motor_group_id"]
+
+        self.assertEqual(pinned_group(), group.id)
+        session.motor_group = MotorGroup.objects.create(name="H")
+        session.save()
+        self.assertIsNone(pinned_group())
+
+    def test_last_points_use_tail(self):
+        self.repo.query_last_points(7, "rpm", limit=50, sensor_id=3)
+        self.assertTrue(self.flux().rstrip().endswith("|> tail(n: 50)"))
+        self.assertNotIn("limit(", self.flux())
+        self.assertNotIn("desc", self.flux())
+
+    def test_redundant_group_dropped(self):
+        self.repo.data_bounds("session_id", 7)
+        self.assertIn('keep(columns: ["_time"])', self.flux())
+        self.assertNotIn("group(", self.flux())
+
+    def test_values_escaped_and_names_checked(self):
+        self.repo.query_series(7, 'rpm") or true or (r.x == "${secret}')
+        self.assertIn('r.quantity == "rpm\\") or true or (r.x == \\"\\${secret}"', self.flux())
+        with self.assertRaises(ValueError):
+            self.repo.data_bounds("session_id) or (true", 7)
+        self.assertEqual(
+            delete_predicate("telemetry", session_id='1" OR "a"="a'), '_measurement="telemetry" AND session_id="1\\" OR \\"a\\"=\\"a"'
+        )
+
+    def test_query_params_mode(self):
+        self.repo.query_params = True
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.repo.query_series(7, "rpm", from_dt=start, sensor_id=7)
+        self.assertIn("range(start: params.p0)", self.flux())
+        self.assertIn("r._measurement == params.p1 and r.quantity == params.p2", self.flux())
+        # Equal values share a parameter.
+        self.assertIn("r.session_id == params.p3 and r.sensor_id == params.p3", self.flux())
+        self.assertEqual(self.client_stub.params[-1], {"p0": start, "p1": "readings", "p2": "rpm", "p3": "7"})
+
+
+class SessionDetailChartsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="user", password="pass")
+        self.client.force_login(self.user)
+        self.started = datetime(2025, 3, 1, 12, tzinfo=dt_timezone.utc)
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S", started_at=self.started)
+
+    def test_range_from_preview_span(self):
+        preview = {"start": 100.0, "width": 2.0, "quantities": {"rpm": [[0, 1], None, None], "thrust": [None, [1, 2], None]}}
+        self.assertEqual(preview_span(preview), (100.0, 104.0))
+        self.assertIsNone(preview_span({"start": 100.0, "width": 2.0, "quantities": {"rpm": [None]}}))
+        Session.objects.filter(pk=self.session.pk).update(preview=preview)
+        resp = self.client.get(f"/sessions/{self.session.id}/")
+        self.assertEqual(resp.context["series_range"], {"from": "1970-01-01T00:01:40+00:00", "to": "1970-01-01T00:01:44+00:00"})
+        self.assertContains(resp, 'id="series-range"')
+
+    def test_running_session_without_data_opens_at_start(self):
+        resp = self.client.get(f"/sessions/{self.session.id}/")
+        self.assertEqual(resp.context["series_range"], {"from": self.started.isoformat(), "to": None})
+
+
+@override_settings(
+    INFLUX_SHARDS={"a": {"standin": True}, "b": {"standin": True}},
+    INFLUX_SHARD_MAP={"stands": {"Stand B": "b"}, "motor_groups": {"G": "a"}},
+)
+class ShardRoutingTests(TestCase):
+    CSV = "ts,rpm\n" + "".join(f"2025-01-01T10:00:0{i},{1000 + i}\n" for i in range(5))
+
+    def setUp(self):
+        shards._REPOS.clear()  # fresh stand-ins per test
+        self.rpm = MeasuredQuantity.objects.get_or_create(key="rpm", defaults={"name": "rpm", "unit": "u"})[0]
+        self.session = Session.objects.create(motor_group=MotorGroup.objects.create(name="G"), name="S")
+
+    def stored(self, shard):
+        return [record["value"] for record in shards.shard_repo(shard).export_points(self.session.id)]
+
+    def test_first_import_pins_shard_by_group_then_stand(self):
+        import_csv_to_session(self.session, io.StringIO(self.CSV))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.influx_shard, "a")
+        self.assertEqual(self.stored("a"), [1000.0, 1001.0, 1002.0, 1003.0, 1004.0])
+        self.assertEqual(self.stored("b"), [])
+        self.assertIs(get_influx_repo(self.session), shards.shard_repo("a"))
+
+        other = Session.objects.create(motor_group=self.session.motor_group, name="S2")
+        sensor = Sensor.objects.create(stand=Stand.objects.create(name="Stand B"), name="rpm-1")
+        profile = ImportProfile.objects.create(name="B")
+        ImportProfileColumn.objects.create(profile=profile, column="rpm", quantity=self.rpm, sensor=sensor)
+        import_csv_to_session(other, io.StringIO(self.CSV), profile=profile)
+        other.refresh_from_db()
+        self.assertEqual(other.influx_shard, "b")
+
+    def test_move_copies_switches_and_queues_old_copy(self):
+        import_csv_to_session(self.session, io.StringIO(self.CSV))
+        out = io.StringIO()
+        call_command("move_session_shard", "--to", "b", "--session", str(self.session.id), stdout=out)
+        self.assertIn("a -> b, точек 5", out.getvalue())
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.influx_shard, "b")
+        self.assertEqual(len(self.stored("b")), 5)
+
+        job = InfluxDeletionJob.objects.get(reason=InfluxDeletionJob.REASON_MOVED)
+        self.assertEqual((job.session_id, job.shard), (self.session.id, "a"))
+        run_deletion_job(job)
+        self.assertEqual(self.stored("a"), [])
+        self.assertEqual(len(self.stored("b")), 5)
+
+        self.client.force_login(get_user_model().objects.create_user(username="user", password="pass"))
+        resp = self.client.get(f"/api/sessions/{self.session.id}/series/?quantity=rpm")
+        self.assertEqual([p["value"] for p in resp.json()], [1000.0, 1001.0, 1002.0, 1003.0, 1004.0])
+
+    def test_move_refused_when_an_import_ran_during_the_copy(self):
+        import_csv_to_session(self.session, io.StringIO(self.CSV))
+        source = shards.shard_repo("a")
+        export = source.export_points
+
+        def export_during_import(session_id, bucket=None):
+            yield from export(session_id, bucket)
+            # A whole import starts and finishes while the copy is running.
+            import_csv_to_session(self.session, io.StringIO(self.CSV.replace("10:00:0", "11:00:0")))
+
+        with patch.object(source, "export_points", export_during_import):
+            with self.assertRaisesMessage(ValueError, "шёл импорт"):
+                shards.move_session(self.session, "b")
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.influx_shard, "a")
+        self.assertFalse(InfluxDeletionJob.objects.exists())
+
+    def test_move_back_refused_until_old_copy_is_deleted(self):
+        import_csv_to_session(self.session, io.StringIO(self.CSV))
+        shards.move_session(self.session, "b")
+        with self.assertRaisesMessage(ValueError, "ещё не удалена"):
+            shards.move_session(self.session, "a")
+        run_deletion_job(InfluxDeletionJob.objects.get())
+        shards.move_session(self.session, "a")
+        self.assertEqual(len(self.stored("a")), 5)
@@ -0,0 +1,114 @@
+"""Opening uploaded CSV files, compressed or not, as a text stream.
+
+Stands upload ``.csv.gz``/``.csv.zst`` over slow links. The decompressor
+is layered directly under the CSV reader, so only a small read buffer of
+decompressed text exists at any time; nothing is spooled back to memory or
+disk.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import zlib
+
+from rest_framework.parsers import BaseParser
+
+try:  # zstd support is optional, like brotli in CompressionMiddleware
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+GZIP = "gzip"
+ZSTD = "zstd"
+FILE_SUFFIXES = {".gz": GZIP, ".gzip": GZIP, ".zst": ZSTD, ".zstd": ZSTD}
+CONTENT_ENCODINGS = {"gzip": GZIP, "x-gzip": GZIP, "zstd": ZSTD, "identity": None}
+MAGIC_BYTES = ((b"\x1f\x8b", GZIP), (b"\x28\xb5\x2f\xfd", ZSTD))
+
+# Raised while reading a truncated or corrupt compressed upload; the importer
+# reports them as a failed import rather than a server error.
+CORRUPT_INPUT_ERRORS: tuple[type[Exception], ...] = (EOFError, gzip.BadGzipFile, zlib.error)
+if zstandard is not None:
+    CORRUPT_INPUT_ERRORS += (zstandard.ZstdError,)
+
+
+def detect_compression(file_obj, file_name: str = "", content_encoding: str | None = None) -> str | None:
+    """Compression of an upload: explicit ``Content-Encoding``, then file suffix, then magic bytes."""
+    if content_encoding:
+        encoding = content_encoding.strip().lower()
+        if encoding not in CONTENT_ENCODINGS:
+            raise ValueError(f"Неподдерживаемое сжатие: {content_encoding}")
+        return CONTENT_ENCODINGS[encoding]
+    name = (file_name or "").lower()
+    for suffix, compression in FILE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return compression
+    seekable = getattr(file_obj, "seekable", None)
+    if seekable is not None and seekable():
+        position = file_obj.tell()
+        head = file_obj.read(4)
+        file_obj.seek(position)
+        if isinstance(head, bytes):
+            for magic, compression in MAGIC_BYTES:
+                if head.startswith(magic):
+                    return compression
+    return None
+
+
+def open_binary(file_obj, compression: str | None = None) -> io.BufferedIOBase:
+    """Binary stream of the decompressed content of ``file_obj``."""
+    if compression == GZIP:
+        return gzip.GzipFile(fileobj=file_obj, mode="rb")
+    if compression == ZSTD:
+        if zstandard is None:
+            raise ValueError("Для файлов .zst установите пакет zstandard")
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(file_obj, read_across_frames=True, closefd=False)
+        )
+    if isinstance(file_obj, io.BufferedIOBase):
+        return file_obj
+    return io.BufferedReader(_ReadableAdapter(file_obj))
+
+
+def open_csv_text(file_obj, compression: str | None = None, encoding: str = "utf-8") -> io.TextIOBase:
+    """Wrap a binary (or already text) upload into a decompressing text stream."""
+    if isinstance(file_obj.read(0), str):
+        if compression:
+            raise ValueError("Сжатый файл открыт в текстовом режиме")
+        return file_obj
+    return io.TextIOWrapper(open_binary(file_obj, compression), encoding=encoding, newline="")
+
+
+def read_body(stream, compression: str | None, limit: int) -> bytes:
+    """Read and decompress a request body of at most ``limit`` decompressed bytes."""
+    if stream is None:
+        return b""
+    data = open_binary(stream, compression).read(limit + 1)
+    if len(data) > limit:
+        raise ValueError(f"Блок больше {limit} байт")
+    return data
+
+
+class _ReadableAdapter(io.RawIOBase):
+    """Minimal raw stream over objects that only implement ``read`` (uploads, request bodies)."""
+
+    def __init__(self, source) -> None:
+        self._source = source
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._source.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class CsvStreamParser(BaseParser):
+    """DRF parser that hands a raw ``text/csv`` request body over unread."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
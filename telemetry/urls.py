@@ -2,13 +2,27 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from . import views
+from .async_views import AsyncSessionSeriesView
 from .api_views import (
+    AdmissionStatsView,
+    MotorGroupDashboardView,
+    MotorGroupPerformanceView,
+    CsvUploadCreateView,
+    CsvUploadFinalizeView,
+    CsvUploadView,
+    AnomalyEventViewSet,
+    DetectorRuleViewSet,
+    ImportProfileViewSet,
+    InfluxDeletionJobViewSet,
     MeasuredQuantityViewSet,
     MotorGroupViewSet,
+    SessionDistributionView,
     SessionImportCsvView,
+    SessionResampleView,
     SensorChannelViewSet,
     SensorViewSet,
     SessionSeriesView,
+    SessionStepsView,
     SessionViewSet,
 )
 
@@ -18,6 +32,10 @@ router.register(r"sessions", SessionViewSet)
 router.register(r"sensors", SensorViewSet)
 router.register(r"sensor-channels", SensorChannelViewSet)
 router.register(r"quantities", MeasuredQuantityViewSet)
+router.register(r"import-profiles", ImportProfileViewSet)
+router.register(r"deletion-jobs", InfluxDeletionJobViewSet)
+router.register(r"detector-rules", DetectorRuleViewSet)
+router.register(r"anomaly-events", AnomalyEventViewSet)
 
 app_name = "telemetry"
 
@@ -27,6 +45,7 @@ urlpatterns = [
     path("motor-groups/add/", views.MotorGroupCreateView.as_view(), name="motor_group_add"),
     path("motor-groups/<int:pk>/edit/", views.MotorGroupUpdateView.as_view(), name="motor_group_edit"),
     path("motor-groups/<int:pk>/delete/", views.MotorGroupDeleteView.as_view(), name="motor_group_delete"),
+    path("motor-groups/<int:pk>/dashboard/", views.MotorGroupDashboardView.as_view(), name="motor_group_dashboard"),
 
     path("sensors/", views.SensorListView.as_view(), name="sensor_list"),
     path("sensors/add/", views.SensorCreateView.as_view(), name="sensor_add"),
@@ -41,6 +60,16 @@ urlpatterns = [
 
     path("api/openapi.yaml", views.openapi_yaml, name="openapi"),
     path("api/sessions/<int:pk>/series/", SessionSeriesView.as_view(), name="session_series_api"),
+    path("api/sessions/<int:pk>/series/async/", AsyncSessionSeriesView.as_view(), name="session_series_async_api"),
+    path("api/sessions/<int:pk>/resample/", SessionResampleView.as_view(), name="session_resample_api"),
+    path("api/sessions/<int:pk>/steps/", SessionStepsView.as_view(), name="session_steps_api"),
+    path("api/motor-groups/<int:pk>/dashboard/", MotorGroupDashboardView.as_view(), name="motor_group_dashboard_api"),
+    path("api/motor-groups/<int:pk>/performance/", MotorGroupPerformanceView.as_view(), name="motor_group_performance_api"),
+    path("api/sessions/<int:pk>/distribution/", SessionDistributionView.as_view(), name="session_distribution_api"),
     path("api/sessions/<int:pk>/import-csv/", SessionImportCsvView.as_view(), name="session_import_csv_api"),
+    path("api/sessions/<int:pk>/uploads/", CsvUploadCreateView.as_view(), name="session_upload_create_api"),
+    path("api/uploads/<int:pk>/", CsvUploadView.as_view(), name="upload_api"),
+    path("api/uploads/<int:pk>/finalize/", CsvUploadFinalizeView.as_view(), name="upload_finalize_api"),
+    path("api/admission/", AdmissionStatsView.as_view(), name="admission_api"),
     path("api/", include(router.urls)),
 ]
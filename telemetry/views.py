@@ -1,3 +1,5 @@
+from datetime import datetime, timezone as dt_timezone
+
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -5,19 +7,48 @@ from django.http import FileResponse, Http404
 from django.shortcuts import redirect
 from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView, DeleteView, DetailView, ListView, UpdateView
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
 
+from .deletion import delete_motor_group, delete_session
 from .forms import MotorGroupForm, SensorForm, SessionForm
-from .models import CsvImport, MeasuredQuantity, MotorGroup, Sensor, Session, Stand
+from .models import CsvImport, MotorGroup, Sensor, Session, Stand
+from .pagination import NamedCursorPagination, SessionCursorPagination, TelemetryCursorPagination
+from .previews import preview_span, sparkline_polygon
+from .queries import motor_group_list_queryset, sensor_list_queryset, session_list_queryset
+from .registry import get_registry
+from .services import DASHBOARD_METRICS, motor_group_dashboard
 
 
 def redirect_to_sessions(request):
     return redirect("telemetry:session_list")
 
 
-class MotorGroupListView(LoginRequiredMixin, ListView):
+class CursorPaginatedListMixin:
+    """Cursor-paginate a ListView with the same paginator classes as the API."""
+
+    pagination_class = TelemetryCursorPagination
+
+    def get_context_data(self, **kwargs):
+        paginator = self.pagination_class()
+        try:
+            page = paginator.paginate_queryset(self.object_list, Request(self.request))
+        except NotFound as exc:
+            raise Http404("Некорректный курсор") from exc
+        context = super().get_context_data(object_list=page, **kwargs)
+        context["next_page_url"] = paginator.get_next_link()
+        context["previous_page_url"] = paginator.get_previous_link()
+        return context
+
+
+class MotorGroupListView(LoginRequiredMixin, CursorPaginatedListMixin, ListView):
     model = MotorGroup
     template_name = "telemetry/motor_group_list.html"
     context_object_name = "motor_groups"
+    pagination_class = NamedCursorPagination
+
+    def get_queryset(self):
+        return motor_group_list_queryset()
 
 
 class MotorGroupCreateView(LoginRequiredMixin, CreateView):
@@ -47,18 +78,52 @@ class MotorGroupDeleteView(LoginRequiredMixin, DeleteView):
     template_name = "telemetry/confirm_delete.html"
     success_url = reverse_lazy("telemetry:motor_group_list")
 
-    def delete(self, request, *args, **kwargs):
-        messages.success(self.request, "Группа удалена")
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        delete_motor_group(self.object)
+        messages.success(self.request, "Группа удалена, данные InfluxDB будут удалены в фоне")
+        return redirect(self.get_success_url())
+
+
+class MotorGroupDashboardView(LoginRequiredMixin, DetailView):
+    model = MotorGroup
+    template_name = "telemetry/motor_group_dashboard.html"
+    context_object_name = "motor_group"
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        try:
+            rows = motor_group_dashboard(self.object)
+        except Exception as exc:  # noqa: BLE001
+            rows = []
+            ctx["error"] = f"Ошибка запроса к InfluxDB: {exc}"
+        registry = get_registry()
+        ctx["metrics"] = [
+            {"column": column, "key": key, "quantity": registry.quantity(key)} for column, key in DASHBOARD_METRICS.items()
+        ]
+        for row in rows:
+            row["values"] = [row[column] for column in DASHBOARD_METRICS]
+        ctx["rows"] = rows
+        ctx["chart_data"] = {
+            "labels": [row["name"] for row in rows],
+            "metrics": [
+                {
+                    "label": metric["quantity"].name if metric["quantity"] else metric["key"],
+                    "values": [row[metric["column"]] for row in rows],
+                }
+                for metric in ctx["metrics"]
+            ],
+        }
+        return ctx
 
-class SensorListView(LoginRequiredMixin, ListView):
+
+class SensorListView(LoginRequiredMixin, CursorPaginatedListMixin, ListView):
     model = Sensor
     template_name = "telemetry/sensor_list.html"
     context_object_name = "sensors"
+    pagination_class = NamedCursorPagination
 
     def get_queryset(self):
-        return Sensor.objects.select_related("stand").prefetch_related("channels__quantity").all()
+        return sensor_list_queryset(with_channels=True)
 
 
 class SensorCreateView(LoginRequiredMixin, CreateView):
@@ -100,13 +165,30 @@ class SensorDeleteView(LoginRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
-class SessionListView(LoginRequiredMixin, ListView):
+class SessionListView(LoginRequiredMixin, CursorPaginatedListMixin, ListView):
     model = Session
     template_name = "telemetry/session_list.html"
     context_object_name = "sessions"
+    pagination_class = SessionCursorPagination
 
     def get_queryset(self):
-        return Session.objects.select_related("motor_group").all()
+        motor_group = self.request.GET.get("motor_group")
+        if motor_group and motor_group.isdigit():
+            return session_list_queryset(motor_group_id=int(motor_group))
+        return session_list_queryset()
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # Drawn from Session.preview alone: no extra query or Influx request per row.
+        quantities = get_registry().quantities()
+        for session in ctx["sessions"]:
+            preview = (session.preview or {}).get("quantities", {})
+            session.sparklines = [
+                {"name": q.name, "unit": q.unit, "points": sparkline_polygon(preview[q.key])}
+                for q in quantities
+                if q.key in preview
+            ]
+        return ctx
 
 
 class SessionCreateView(LoginRequiredMixin, CreateView):
@@ -136,9 +218,10 @@ class SessionDeleteView(LoginRequiredMixin, DeleteView):
     template_name = "telemetry/confirm_delete.html"
     success_url = reverse_lazy("telemetry:session_list")
 
-    def delete(self, request, *args, **kwargs):
-        messages.success(self.request, "Сессия удалена")
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        delete_session(self.object)
+        messages.success(self.request, "Сессия удалена, данные InfluxDB будут удалены в фоне")
+        return redirect(self.get_success_url())
 
 
 class SessionDetailView(LoginRequiredMixin, DetailView):
@@ -149,9 +232,25 @@ class SessionDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["imports"] = self.object.csv_imports.all()
-        ctx["quantities_data"] = list(MeasuredQuantity.objects.values("key", "name", "unit"))
+        ctx["anomaly_events"] = self.object.anomaly_events.select_related("quantity", "sensor")[:50]
+        ctx["quantities_data"] = [
+            {"key": q.key, "name": q.name, "unit": q.unit} for q in get_registry().quantities()
+        ]
+        ctx["series_range"] = self.series_range()
         return ctx
 
+    def series_range(self) -> dict:
+        """Full span the charts open at: the imported data per the preview, else the session times.
+
+        ``to`` is ``None`` for a session still running; the page uses the current time.
+        """
+        span = preview_span(self.object.preview)
+        if span is not None:
+            start, stop = (datetime.fromtimestamp(t, tz=dt_timezone.utc) for t in span)
+        else:
+            start, stop = self.object.started_at, self.object.ended_at
+        return {"from": start.isoformat(), "to": stop.isoformat() if stop else None}
+
 
 def openapi_yaml(request):
     openapi_path = settings.BASE_DIR / "openapi.yaml"
@@ -0,0 +1,77 @@
+"""Preloading for server workers.
+
+Heavy dependencies (influxdb_client, numpy) are imported lazily so that
+management commands and CRUD-only processes start fast. Long-running
+servers would rather pay that cost once, before the first request: the WSGI
+and ASGI entry points call :func:`warmup` when ``TELEMETRY_WARMUP`` is on.
+With ``gunicorn --preload`` this runs in the master process, so the loaded
+modules are shared copy-on-write by every forked worker.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODULES = (
+    "influxdb_client",
+    "influxdb_client.client.write_api",
+    "numpy",
+    "telemetry.analysis",
+    "telemetry.detectors",
+)
+
+
+def warmup(ping_influx: bool = False) -> dict[str, float]:
+    """Import heavy modules, build the URL resolver and load the metadata registry.
+
+    Returns the seconds spent per step. Database connections opened here are
+    closed again so they are never shared across a fork.
+    """
+    timings: dict[str, float] = {}
+
+    started = time.perf_counter()
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:  # optional extras are allowed to be missing
+            logger.warning("warmup: cannot import %s", module)
+    timings["imports"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    get_resolver().url_patterns  # noqa: B018 - builds the URLconf and imports every view module
+    timings["urls"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        from .registry import get_registry
+
+        get_registry().quantities()
+    except Exception:  # noqa: BLE001 - a missing database must not stop the server from booting
+        logger.warning("warmup: metadata registry not loaded", exc_info=True)
+    finally:
+        connections.close_all()
+    timings["registry"] = time.perf_counter() - started
+
+    if ping_influx:
+        started = time.perf_counter()
+        from .influx_repo import get_influx_repo
+
+        with get_influx_repo()._client() as client:
+            client.ping()
+        timings["influx_ping"] = time.perf_counter() - started
+
+    logger.info("warmup: %s", ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in timings.items()))
+    return timings
+
+
+def warmup_if_enabled() -> None:
+    if getattr(settings, "TELEMETRY_WARMUP", False):
+        warmup()
@@ -0,0 +1,82 @@
+"""Concurrent InfluxDB writes for the CSV importer.
+
+Without this the importer alternates between parsing a chunk and waiting
+for ``write_api.write`` to return. :class:`WriterPool` hands line-protocol
+batches to a few writer threads through a bounded queue: the importer keeps
+parsing while batches are in flight, and blocks only when ``queue_size``
+batches are already waiting, so memory stays bounded however fast parsing
+is. The first write error stops further writes and is raised to the
+importer on its next call, which fails the CsvImport with that message.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import List, Optional
+
+_STOP = object()
+
+
+class WriterPool:
+    def __init__(self, repo, session, workers: int = 2, queue_size: int = 8) -> None:
+        self.repo = repo
+        self.session = session
+        self.workers = workers
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(queue_size, 1))
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._abort = False
+
+    def submit(self, points: List[dict]) -> None:
+        """Queue one batch; written inline when the pool has no workers."""
+        self._raise()
+        if self.workers <= 0:
+            self.repo.write_points(self.session, points)
+            return
+        if not self._threads:
+            self._start()
+        self._queue.put(points)
+
+    def join(self, abort: bool = False) -> None:
+        """Wait for every queued batch (or drop them when ``abort``) and stop the threads.
+
+        Raises the first write error unless aborting; the pool can be reused afterwards.
+        """
+        self._abort = abort
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._abort = False
+        if not abort:
+            self._raise()
+
+    def _start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"influx-writer-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            points = self._queue.get()
+            if points is _STOP:
+                return
+            # After a failure or an abort the queue is still drained, so the producer never blocks.
+            if self._error is not None or self._abort:
+                continue
+            try:
+                self.repo.write_points(self.session, points)
+            except Exception as exc:  # noqa: BLE001 - handed over to the importer thread
+                with self._lock:
+                    if self._error is None:
+                        self._error = exc
+
+    def _raise(self) -> None:
+        error = self._error
+        if error is not None:
+            self._error = None
+            raise error